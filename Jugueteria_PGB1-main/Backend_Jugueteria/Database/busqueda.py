@@ -0,0 +1,253 @@
+import bisect
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+import unicodedata
+
+_TOKEN = re.compile(r'\w+')
+
+# Puntaje por término: exacto/prefijo en Nombre, exacto/prefijo en Descripcion
+PUNTAJE_NOMBRE_EXACTO = 4.5
+PUNTAJE_NOMBRE_PREFIJO = 3.0
+PUNTAJE_DESCRIPCION_EXACTO = 1.5
+PUNTAJE_DESCRIPCION_PREFIJO = 1.0
+
+# Términos que puntúan por combinación de niveles; el resto solo filtra
+MAX_TERMINOS_PUNTUADOS = 4
+# Términos más cortos solo coinciden exactos ('m' no expande a todo el vocabulario con m)
+BUSQUEDA_PREFIJO_MINIMO = int(os.getenv('BUSQUEDA_PREFIJO_MINIMO', 2))
+# Tokens del vocabulario que puede cubrir un prefijo (las completaciones más cortas)
+BUSQUEDA_MAX_EXPANSION = int(os.getenv('BUSQUEDA_MAX_EXPANSION', 64))
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Muñeca Vehículos' -> 'muneca vehiculos'"""
+    texto = texto or ''
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+def tokenizar(texto):
+    return _TOKEN.findall(normalizar(texto))
+
+class IndiceProductos:
+    """Índice invertido en memoria sobre Nombre y Descripcion con búsqueda por prefijo"""
+
+    # Los conjuntos de postings nunca se modifican en sitio (se reemplazan): buscar() toma
+    # referencias bajo el lock y hace las intersecciones fuera de él
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._nombre = {}         # token -> set(id_producto)
+        self._descripcion = {}    # token -> set(id_producto)
+        self._vocabulario = []    # tokens ordenados, para rangos de prefijo
+        self._documentos = {}     # id_producto -> (tokens nombre, tokens descripción)
+        self._cambios = None      # agregar/eliminar durante una reconstrucción, para reaplicarlos
+        self._invalidaciones = 0
+        self.cargado_en = None
+        self.listo = False
+
+    def _indexar(self, postings, token, id_producto):
+        ids = postings.get(token)
+        if ids is None:
+            if token not in self._nombre and token not in self._descripcion:
+                bisect.insort(self._vocabulario, token)
+            postings[token] = {id_producto}
+        elif id_producto not in ids:
+            postings[token] = ids | {id_producto}
+
+    def _desindexar(self, postings, token, id_producto):
+        ids = postings.get(token)
+        if ids is None or id_producto not in ids:
+            return
+        if len(ids) > 1:
+            postings[token] = ids - {id_producto}
+            return
+        del postings[token]
+        if token not in self._nombre and token not in self._descripcion:
+            posicion = bisect.bisect_left(self._vocabulario, token)
+            if posicion < len(self._vocabulario) and self._vocabulario[posicion] == token:
+                self._vocabulario.pop(posicion)
+
+    def agregar(self, producto):
+        """Indexa (o reindexa) un producto con claves Id_Producto, Nombre, Descripcion"""
+        with self._lock:
+            id_producto = producto['Id_Producto']
+            self.eliminar(id_producto)
+            tokens_nombre = frozenset(tokenizar(producto.get('Nombre')))
+            tokens_descripcion = frozenset(tokenizar(producto.get('Descripcion')))
+            for token in tokens_nombre:
+                self._indexar(self._nombre, token, id_producto)
+            for token in tokens_descripcion:
+                self._indexar(self._descripcion, token, id_producto)
+            self._documentos[id_producto] = (tokens_nombre, tokens_descripcion)
+            if self._cambios is not None:
+                self._cambios.append((id_producto, producto))
+
+    def eliminar(self, id_producto):
+        with self._lock:
+            if self._cambios is not None:
+                self._cambios.append((id_producto, None))
+            documento = self._documentos.pop(id_producto, None)
+            if not documento:
+                return
+            for token in documento[0]:
+                self._desindexar(self._nombre, token, id_producto)
+            for token in documento[1]:
+                self._desindexar(self._descripcion, token, id_producto)
+
+    def comenzar_reconstruccion(self):
+        """Llamar antes de leer las filas: lo que se agregue o elimine mientras tanto se
+        reaplica sobre el índice nuevo. Devuelve la marca que espera reconstruir()"""
+        with self._lock:
+            self._cambios = []
+            return self._invalidaciones
+
+    def reconstruir(self, productos, marca=None):
+        """Reemplaza el índice completo con las filas dadas"""
+        nombre, descripcion, documentos = {}, {}, {}
+        for producto in productos:
+            id_producto = producto['Id_Producto']
+            tokens_nombre = frozenset(tokenizar(producto.get('Nombre')))
+            tokens_descripcion = frozenset(tokenizar(producto.get('Descripcion')))
+            for token in tokens_nombre:
+                nombre.setdefault(token, set()).add(id_producto)
+            for token in tokens_descripcion:
+                descripcion.setdefault(token, set()).add(id_producto)
+            documentos[id_producto] = (tokens_nombre, tokens_descripcion)
+        vocabulario = sorted(nombre.keys() | descripcion.keys())
+        with self._lock:
+            cambios, self._cambios = self._cambios or [], None
+            self._nombre = nombre
+            self._descripcion = descripcion
+            self._vocabulario = vocabulario
+            self._documentos = documentos
+            for id_producto, producto in cambios:
+                if producto is None:
+                    self.eliminar(id_producto)
+                else:
+                    self.agregar(producto)
+            # Si se invalidó mientras se leían las filas, la próxima búsqueda vuelve a recargar
+            vigente = marca is None or marca == self._invalidaciones
+            self.cargado_en = time.monotonic() if vigente else None
+            self.listo = True
+
+    def invalidar(self):
+        """Marca el índice como vencido para que se recargue en la próxima búsqueda"""
+        with self._lock:
+            self._invalidaciones += 1
+            self.cargado_en = None
+
+    def vencido(self, refresco):
+        return self.cargado_en is None or time.monotonic() - self.cargado_en >= refresco
+
+    def _postings(self, termino):
+        """(nombre exacto, [nombre por prefijo], descripción exacta, [descripción por prefijo]);
+        solo referencias, se llama con el lock tomado"""
+        prefijos = ()
+        if len(termino) >= BUSQUEDA_PREFIJO_MINIMO:
+            inicio = bisect.bisect_left(self._vocabulario, termino)
+            fin = bisect.bisect_left(self._vocabulario, termino + '\uffff', inicio)
+            # El término exacto, si existe, es el primero del rango
+            if inicio < fin and self._vocabulario[inicio] == termino:
+                inicio += 1
+            prefijos = self._vocabulario[inicio:fin]
+            if len(prefijos) > BUSQUEDA_MAX_EXPANSION:
+                # Las completaciones más cortas primero: 'ro' -> 'robot' antes que 'rompecabezas'
+                prefijos = heapq.nsmallest(BUSQUEDA_MAX_EXPANSION, prefijos, key=len)
+        return (
+            self._nombre.get(termino, set()),
+            [self._nombre[t] for t in prefijos if t in self._nombre],
+            self._descripcion.get(termino, set()),
+            [self._descripcion[t] for t in prefijos if t in self._descripcion]
+        )
+
+    @staticmethod
+    def _conjuntos(postings):
+        exacto_nombre, prefijo_nombre, exacto_descripcion, prefijo_descripcion = postings
+        return [exacto_nombre, *prefijo_nombre, exacto_descripcion, *prefijo_descripcion]
+
+    @staticmethod
+    def _niveles(postings, candidatos=None):
+        """Conjuntos disjuntos de ids por nivel de puntaje para un término, de mayor a menor;
+        es un generador: quien tiene suficientes resultados deja de pedir niveles"""
+        exacto_nombre, prefijo_nombre, exacto_descripcion, prefijo_descripcion = postings
+        if candidatos is not None:
+            # candidatos & s recorre el menor de los dos: el costo lo acota el término más selectivo
+            exacto_nombre = candidatos & exacto_nombre
+            prefijo_nombre = [candidatos & ids for ids in prefijo_nombre]
+            exacto_descripcion = candidatos & exacto_descripcion
+            prefijo_descripcion = [candidatos & ids for ids in prefijo_descripcion]
+        vistos = exacto_nombre
+        if exacto_nombre:
+            yield PUNTAJE_NOMBRE_EXACTO, exacto_nombre
+        for puntaje, conjuntos in (
+            (PUNTAJE_NOMBRE_PREFIJO, prefijo_nombre),
+            (PUNTAJE_DESCRIPCION_EXACTO, [exacto_descripcion]),
+            (PUNTAJE_DESCRIPCION_PREFIJO, prefijo_descripcion)
+        ):
+            ids = set().union(*conjuntos) - vistos
+            if ids:
+                yield puntaje, ids
+                vistos = vistos | ids
+
+    def buscar(self, consulta, limite=10):
+        """[(id, puntaje)] por relevancia; todos los términos deben coincidir (como prefijo)"""
+        terminos = sorted(set(tokenizar(consulta)), key=len, reverse=True)
+        if not terminos:
+            return []
+        with self._lock:
+            postings = [self._postings(termino) for termino in terminos]
+
+        if len(postings) == 1:
+            # Un solo término (autocompletado): se recorren los niveles hasta juntar `limite`
+            resultados = []
+            for puntaje, ids in self._niveles(postings[0]):
+                for id_producto in heapq.nsmallest(limite - len(resultados), ids):
+                    resultados.append((id_producto, puntaje))
+                if len(resultados) >= limite:
+                    break
+            return resultados
+
+        # Candidatos desde el término más selectivo; los demás solo los van recortando
+        orden = sorted(
+            range(len(terminos)),
+            key=lambda i: sum(len(ids) for ids in self._conjuntos(postings[i]))
+        )
+        candidatos = set().union(*self._conjuntos(postings[orden[0]]))
+        for i in orden[1:]:
+            if not candidatos:
+                return []
+            candidatos = set().union(*(candidatos & ids for ids in self._conjuntos(postings[i])))
+        if not candidatos:
+            return []
+
+        # Los candidatos ya cumplen todos los términos: los extra no cambian el puntaje
+        niveles = [list(self._niveles(p, candidatos)) for p in postings[:MAX_TERMINOS_PUNTUADOS]]
+
+        # Cada combinación de niveles da un puntaje total; se recorren de mayor a menor
+        # intersectando conjuntos (en C) hasta juntar `limite` resultados
+        combinaciones = sorted(
+            itertools.product(*niveles),
+            key=lambda combinacion: -sum(puntaje for puntaje, _ in combinacion)
+        )
+        resultados = []
+        for total, grupo in itertools.groupby(
+            combinaciones, key=lambda combinacion: sum(puntaje for puntaje, _ in combinacion)
+        ):
+            ids_grupo = set()
+            for combinacion in grupo:
+                conjuntos = sorted((ids for _, ids in combinacion), key=len)
+                ids_grupo |= conjuntos[0].intersection(*conjuntos[1:])
+            # Empates: primero el producto más antiguo (menor Id)
+            for id_producto in heapq.nsmallest(limite - len(resultados), ids_grupo):
+                resultados.append((id_producto, round(total, 3)))
+            if len(resultados) >= limite:
+                break
+        return resultados
+
+    def __len__(self):
+        return len(self._documentos)
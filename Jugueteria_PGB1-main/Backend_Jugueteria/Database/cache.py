@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+
+class CacheTTL:
+    """Cache en memoria con expiración por TTL y desalojo LRU, thread-safe"""
+
+    def __init__(self, max_entradas=128, ttl=300):
+        self._max_entradas = max_entradas
+        self._ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    def get(self, clave):
+        """Devuelve el valor vigente o None"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                valor, expira = entrada
+                if expira > time.monotonic():
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def set(self, clave, valor, ttl=None):
+        expira = time.monotonic() + (self._ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self._max_entradas:
+                self._datos.popitem(last=False)
+
+    def obtener(self, clave, cargar):
+        """Devuelve el valor en cache o lo calcula con cargar() y lo guarda"""
+        valor = self.get(clave)
+        if valor is None:
+            valor = cargar()
+            self.set(clave, valor)
+        return valor
+
+    def invalidar(self, clave=None):
+        """Elimina una clave, o todo el cache si no se indica ninguna"""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'max_entradas': self._max_entradas,
+                'ttl': self._ttl,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / total, 4) if total else 0.0
+            }
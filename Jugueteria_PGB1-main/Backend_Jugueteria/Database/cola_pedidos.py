@@ -0,0 +1,234 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Cola local y durable de pedidos (write-behind): POST /api/pedidos confirma en cuanto el
+# pedido quedó en disco y un worker lo pasa a MySQL en lotes (Venta.aplicar_pedidos).
+# Es un archivo SQLite en modo WAL con synchronous=FULL; las escrituras concurrentes se
+# agrupan en una sola transacción (group commit), así N pedidos cuestan un solo fsync.
+
+COLA_PEDIDOS_RUTA = os.getenv(
+    'COLA_PEDIDOS_RUTA',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cola_pedidos.db')
+)
+# Segundos que un worker retiene un lote antes de que otro pueda retomarlo (caída a mitad)
+COLA_PEDIDOS_LEASE = float(os.getenv('COLA_PEDIDOS_LEASE', 60))
+# Reintentos con espera exponencial hasta este máximo (segundos)
+COLA_PEDIDOS_ESPERA_MAXIMA = float(os.getenv('COLA_PEDIDOS_ESPERA_MAXIMA', 60))
+# Pedidos ya aplicados que se conservan para consultar su estado (segundos)
+COLA_PEDIDOS_RETENCION = float(os.getenv('COLA_PEDIDOS_RETENCION', 86400))
+
+# El id lo elige el cliente (clave de idempotencia): solo es único dentro de cada usuario
+ESQUEMA_COLA = '''
+    CREATE TABLE IF NOT EXISTS pedido (
+        usuario_id INTEGER NOT NULL,
+        id TEXT NOT NULL,
+        datos TEXT NOT NULL,
+        estado TEXT NOT NULL DEFAULT 'pendiente',
+        creado REAL NOT NULL,
+        disponible_en REAL NOT NULL,
+        intentos INTEGER NOT NULL DEFAULT 0,
+        id_venta INTEGER,
+        mensaje TEXT,
+        PRIMARY KEY (usuario_id, id)
+    )
+'''
+# PRAGMA user_version del archivo; la 1 agregó usuario_id a la clave
+VERSION_COLA = 1
+
+class _Escritura:
+    __slots__ = ('clave', 'datos', 'hecho', 'nuevo', 'error')
+
+    def __init__(self, clave, datos):
+        self.clave = clave
+        self.datos = datos
+        self.hecho = False
+        self.nuevo = False
+        self.error = None
+
+class ColaPedidos:
+    """Log durable de pedidos en un archivo SQLite local; cada pedido se identifica por
+    su clave (usuario_id, pedido_id)"""
+
+    def __init__(self, ruta=COLA_PEDIDOS_RUTA):
+        self.ruta = ruta
+        self.nuevos = threading.Event()
+        self._cond = threading.Condition()
+        self._pendientes = []
+        self._escribiendo = False
+        self._escritor = self._conectar()
+        self._migrar()
+        self._escritor.execute(ESQUEMA_COLA)
+        self._escritor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_pedido_estado_disponible ON pedido (estado, disponible_en)'
+        )
+        self._local = threading.local()
+
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+        conexion.execute('PRAGMA journal_mode = WAL')
+        # FULL: fsync en cada commit; el group commit reparte ese costo entre los pedidos
+        conexion.execute('PRAGMA synchronous = FULL')
+        conexion.row_factory = sqlite3.Row
+        return conexion
+
+    def _migrar(self):
+        """Archivos de la versión 0 (id como PK global): la clave pasa a (usuario_id, id)"""
+        conexion = self._escritor
+        if conexion.execute('PRAGMA user_version').fetchone()[0] >= VERSION_COLA:
+            return
+        # IMMEDIATE antes de mirar el esquema: otro worker puede estar migrando el mismo archivo
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            columnas = [fila['name'] for fila in conexion.execute('PRAGMA table_info(pedido)')]
+            if columnas and 'usuario_id' not in columnas:
+                conexion.execute('ALTER TABLE pedido RENAME TO pedido_v0')
+                conexion.execute('DROP INDEX IF EXISTS idx_pedido_estado_disponible')
+                conexion.execute(ESQUEMA_COLA)
+                conexion.execute('''
+                    INSERT OR IGNORE INTO pedido
+                    (usuario_id, id, datos, estado, creado, disponible_en, intentos, id_venta, mensaje)
+                    SELECT COALESCE(json_extract(datos, '$.usuario_id'), 0), id, datos, estado, creado,
+                        disponible_en, intentos, id_venta, mensaje
+                    FROM pedido_v0
+                ''')
+                conexion.execute('DROP TABLE pedido_v0')
+            conexion.execute(f'PRAGMA user_version = {VERSION_COLA}')
+            conexion.execute('COMMIT')
+        except Exception:
+            if conexion.in_transaction:
+                conexion.execute('ROLLBACK')
+            raise
+
+    def _lector(self):
+        """Conexión propia del hilo (worker o request) para leer y tomar lotes"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None:
+            conexion = self._local.conexion = self._conectar()
+        return conexion
+
+    def agregar(self, usuario_id, pedido_id, datos):
+        """Persiste el pedido antes de volver; False si el usuario ya había enviado ese id"""
+        escritura = _Escritura((usuario_id, pedido_id), json.dumps(datos, ensure_ascii=False, default=str))
+        with self._cond:
+            self._pendientes.append(escritura)
+            while not escritura.hecho:
+                if self._escribiendo:
+                    self._cond.wait()
+                    continue
+                # Este hilo escribe su pedido y todos los que llegaron mientras tanto
+                self._escribiendo = True
+                lote, self._pendientes = self._pendientes, []
+                self._cond.release()
+                try:
+                    self._escribir(lote)
+                finally:
+                    self._cond.acquire()
+                    self._escribiendo = False
+                    for otra in lote:
+                        otra.hecho = True
+                    self._cond.notify_all()
+        if escritura.error is not None:
+            raise escritura.error
+        self.nuevos.set()
+        return escritura.nuevo
+
+    def _escribir(self, lote):
+        ahora = time.time()
+        try:
+            self._escritor.execute('BEGIN IMMEDIATE')
+            for escritura in lote:
+                cursor = self._escritor.execute(
+                    'INSERT OR IGNORE INTO pedido (usuario_id, id, datos, creado, disponible_en) VALUES (?, ?, ?, ?, ?)',
+                    (*escritura.clave, escritura.datos, ahora, ahora)
+                )
+                escritura.nuevo = cursor.rowcount == 1
+            self._escritor.execute('COMMIT')
+        except Exception as e:
+            if self._escritor.in_transaction:
+                self._escritor.execute('ROLLBACK')
+            for escritura in lote:
+                escritura.error = e
+
+    def tomar(self, limite, lease=COLA_PEDIDOS_LEASE):
+        """[((usuario_id, pedido_id), datos)] pendientes en orden de llegada, retenidos `lease` segundos"""
+        conexion = self._lector()
+        ahora = time.time()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            filas = conexion.execute('''
+                SELECT usuario_id, id, datos FROM pedido
+                WHERE estado = 'pendiente' AND disponible_en <= ?
+                ORDER BY creado LIMIT ?
+            ''', (ahora, limite)).fetchall()
+            conexion.executemany(
+                'UPDATE pedido SET disponible_en = ? WHERE usuario_id = ? AND id = ?',
+                [(ahora + lease, fila['usuario_id'], fila['id']) for fila in filas]
+            )
+            conexion.execute('COMMIT')
+        except Exception:
+            if conexion.in_transaction:
+                conexion.execute('ROLLBACK')
+            raise
+        return [((fila['usuario_id'], fila['id']), json.loads(fila['datos'])) for fila in filas]
+
+    def completar(self, resultados):
+        """Marca el resultado final de cada pedido: {(usuario_id, pedido_id): {'Estado', 'Id_Venta', 'Mensaje'}}"""
+        conexion = self._lector()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            conexion.executemany(
+                "UPDATE pedido SET estado = ?, id_venta = ?, mensaje = ? WHERE usuario_id = ? AND id = ? AND estado = 'pendiente'",
+                [(r['Estado'], r['Id_Venta'], r['Mensaje'], *clave) for clave, r in resultados.items()]
+            )
+            conexion.execute('COMMIT')
+        except Exception:
+            # Sin ROLLBACK la conexión del hilo queda en transacción y todo BEGIN siguiente falla
+            if conexion.in_transaction:
+                conexion.execute('ROLLBACK')
+            raise
+
+    def reintentar(self, claves, mensaje):
+        """Devuelve el lote a la cola con espera exponencial según sus intentos"""
+        conexion = self._lector()
+        ahora = time.time()
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            for usuario_id, pedido_id in claves:
+                conexion.execute('''
+                    UPDATE pedido SET intentos = intentos + 1, mensaje = ?,
+                        disponible_en = ? + MIN(?, 0.5 * (1 << MIN(intentos, 16)))
+                    WHERE usuario_id = ? AND id = ? AND estado = 'pendiente'
+                ''', (mensaje, ahora, COLA_PEDIDOS_ESPERA_MAXIMA, usuario_id, pedido_id))
+            conexion.execute('COMMIT')
+        except Exception:
+            if conexion.in_transaction:
+                conexion.execute('ROLLBACK')
+            raise
+
+    def purgar(self, retencion=COLA_PEDIDOS_RETENCION):
+        """Borra los pedidos ya aplicados más viejos que `retencion` segundos"""
+        conexion = self._lector()
+        cursor = conexion.execute(
+            "DELETE FROM pedido WHERE estado != 'pendiente' AND creado < ?",
+            (time.time() - retencion,)
+        )
+        return cursor.rowcount
+
+    def estado(self, usuario_id, pedido_id):
+        conexion = self._lector()
+        fila = conexion.execute(
+            'SELECT usuario_id, id, datos, estado, creado, intentos, id_venta, mensaje FROM pedido WHERE usuario_id = ? AND id = ?',
+            (usuario_id, pedido_id)
+        ).fetchone()
+        if not fila:
+            return None
+        pedido = dict(fila)
+        pedido['datos'] = json.loads(pedido['datos'])
+        return pedido
+
+    def pendientes(self):
+        conexion = self._lector()
+        return conexion.execute("SELECT COUNT(*) FROM pedido WHERE estado = 'pendiente'").fetchone()[0]
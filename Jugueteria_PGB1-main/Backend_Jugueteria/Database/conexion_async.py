@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+from Database import metricas
+from Database.conexion import PoolAgotadoError, _parametros_mysql, get_pool, motor
+from Database.perfilador import perfilador
+
+# Pool del modo ASGI (asgi.py): independiente del pool síncrono de Flask y mucho más
+# grande, porque una conexión en espera no ocupa un hilo
+ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 50))
+
+class PoolAsyncMySQL:
+    """Pool aiomysql con filas dict; cada consulta toma y devuelve su conexión"""
+
+    def __init__(self, pool, espera):
+        self._pool = pool
+        self._espera = espera
+
+    @classmethod
+    async def crear(cls, tamano=ASYNC_DB_POOL_SIZE):
+        import aiomysql
+
+        params = _parametros_mysql()
+        pool = await aiomysql.create_pool(
+            host=params['host'],
+            user=params['user'],
+            password=params['password'],
+            db=params['database'],
+            port=params['port'],
+            charset='utf8mb4',
+            cursorclass=aiomysql.DictCursor,
+            autocommit=True,
+            minsize=1,
+            maxsize=tamano,
+            pool_recycle=int(float(os.getenv('DB_POOL_RECYCLE', 3600)))
+        )
+        print(f"✅ Pool async de MySQL listo ({tamano} conexiones)")
+        return cls(pool, float(os.getenv('DB_POOL_TIMEOUT', 5)))
+
+    async def consultar(self, sql, params=()):
+        """Ejecuta un SELECT y devuelve todas las filas"""
+        inicio = time.monotonic()
+        try:
+            conn = await asyncio.wait_for(self._pool.acquire(), self._espera)
+        except asyncio.TimeoutError:
+            raise PoolAgotadoError(f'Pool async agotado tras {self._espera}s')
+        finally:
+            metricas.db_espera_pool.observar(time.monotonic() - inicio)
+        try:
+            async with conn.cursor() as cursor:
+                inicio = time.perf_counter()
+                await cursor.execute(sql, params)
+                filas = await cursor.fetchall()
+                duracion = time.perf_counter() - inicio
+        finally:
+            self._pool.release(conn)
+        metricas.db_duracion.observar(duracion, 'execute')
+        perfilador.sumar_filas(perfilador.registrar(sql, duracion, len(filas)), len(filas))
+        return list(filas)
+
+    async def cerrar(self):
+        self._pool.close()
+        await self._pool.wait_closed()
+
+class PoolAsyncHilos:
+    """Motores sin driver async (SQLite): el pool síncrono en hilos del executor"""
+
+    async def consultar(self, sql, params=()):
+        return await asyncio.to_thread(self._consultar, sql, params)
+
+    @staticmethod
+    def _consultar(sql, params):
+        conn = get_pool().obtener()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+        finally:
+            conn.close()
+
+    async def cerrar(self):
+        pass
+
+async def crear_pool_async():
+    """Pool async según DB_URL: aiomysql para MySQL, hilos para SQLite"""
+    if motor() == 'mysql':
+        return await PoolAsyncMySQL.crear()
+    return PoolAsyncHilos()
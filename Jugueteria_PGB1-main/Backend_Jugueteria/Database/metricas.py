@@ -0,0 +1,156 @@
+import bisect
+import threading
+
+# Métricas en memoria del proceso con exportación en formato de texto de Prometheus.
+# Cada métrica tiene su propio lock y solo suma enteros/flotantes en el camino caliente;
+# el texto se arma al momento del scrape.
+
+# Segundos: de 1 ms a 10 s
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRO = []
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+        REGISTRO.append(self)
+
+    def _muestras(self):
+        raise NotImplementedError
+
+    def exportar(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+        lineas.extend(self._muestras())
+        return lineas
+
+class Contador(_Metrica):
+    """Contador monótono por combinación de etiquetas"""
+    tipo = 'counter'
+
+    def incrementar(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def _muestras(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}' for clave, valor in valores]
+
+class Medidor(_Metrica):
+    """Valor que sube y baja (requests en curso, conexiones abiertas)"""
+    tipo = 'gauge'
+
+    def sumar(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def restar(self, *valores, cantidad=1):
+        self.sumar(*valores, cantidad=-cantidad)
+
+    def fijar(self, *valores, valor):
+        with self._lock:
+            self._valores[valores] = valor
+
+    def _muestras(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}' for clave, valor in valores]
+
+class Histograma(_Metrica):
+    """Histograma de buckets fijos; se guardan conteos por bucket y se acumulan al exportar"""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, *valores):
+        posicion = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._valores.get(valores)
+            if serie is None:
+                # [conteo por bucket (+Inf al final), suma]
+                serie = self._valores[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][posicion] += 1
+            serie[1] += valor
+
+    def _muestras(self):
+        with self._lock:
+            series = sorted((clave, list(conteos), suma) for clave, (conteos, suma) in self._valores.items())
+        lineas = []
+        for clave, conteos, suma in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), conteos):
+                acumulado += conteo
+                etiquetas = _etiquetas(self.etiquetas, clave, f'le="{_numero(float(limite))}"')
+                lineas.append(f'{self.nombre}_bucket{etiquetas} {acumulado}')
+            etiquetas = _etiquetas(self.etiquetas, clave)
+            lineas.append(f'{self.nombre}_sum{etiquetas} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{etiquetas} {acumulado}')
+        return lineas
+
+def exportar():
+    """Texto de exposición de Prometheus (text/plain; version=0.0.4) de todas las métricas"""
+    lineas = []
+    for metrica in REGISTRO:
+        lineas.extend(metrica.exportar())
+    return '\n'.join(lineas) + '\n'
+
+# Métricas del proceso, compartidas por routes/ y Database/
+http_duracion = Histograma(
+    'jugueteria_http_request_duration_seconds', 'Latencia de las requests por endpoint',
+    ('endpoint', 'method')
+)
+http_requests = Contador(
+    'jugueteria_http_requests_total', 'Requests atendidas por endpoint y código de estado',
+    ('endpoint', 'method', 'status')
+)
+http_en_curso = Medidor(
+    'jugueteria_http_requests_in_flight', 'Requests en curso por endpoint', ('endpoint',)
+)
+http_rechazadas = Contador(
+    'jugueteria_http_requests_rejected_total', 'Requests rechazadas por límite de tasa o de requests en curso',
+    ('endpoint', 'motivo')
+)
+db_duracion = Histograma(
+    'jugueteria_db_query_duration_seconds', 'Tiempo de ejecución de sentencias SQL', ('operacion',)
+)
+db_espera_pool = Histograma(
+    'jugueteria_db_pool_wait_seconds', 'Espera por una conexión libre del pool'
+)
+db_pool_conexiones = Medidor(
+    'jugueteria_db_pool_connections', 'Conexiones del pool por estado', ('estado',)
+)
+bcrypt_duracion = Histograma(
+    'jugueteria_bcrypt_duration_seconds', 'Tiempo de CPU de bcrypt en el pool dedicado', ('operacion',),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+bcrypt_espera = Histograma(
+    'jugueteria_bcrypt_queue_wait_seconds', 'Espera en cola antes de llegar a un worker de bcrypt', ('operacion',)
+)
+pedidos_pendientes = Medidor(
+    'jugueteria_orders_queue_pending', 'Pedidos en la cola local aún sin aplicar en MySQL'
+)
+pedidos_aplicados = Contador(
+    'jugueteria_orders_applied_total', 'Pedidos de la cola aplicados en MySQL por resultado', ('estado',)
+)
@@ -0,0 +1,415 @@
+from Database import reportes
+
+# Cada migración es idempotente: puede reintentarse si falló a mitad de camino
+# (en MySQL los DDL hacen commit implícito y no se pueden deshacer)
+
+def _existe_indice(cursor, tabla, columnas):
+    """True si algún índice de la tabla empieza por `columnas` en ese orden"""
+    cursor.execute("""
+        SELECT INDEX_NAME, SEQ_IN_INDEX, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (tabla,))
+    indices = {}
+    for fila in cursor.fetchall():
+        indices.setdefault(fila['INDEX_NAME'], []).append(fila['COLUMN_NAME'].lower())
+    buscadas = [c.lower() for c in columnas]
+    return any(cols[:len(buscadas)] == buscadas for cols in indices.values())
+
+def _crear_indice(cursor, tabla, nombre, columnas):
+    if not _existe_indice(cursor, tabla, [c.split()[0] for c in columnas]):
+        cursor.execute(f"CREATE INDEX {nombre} ON {tabla} ({', '.join(columnas)})")
+        print(f"🔄 Índice {nombre} creado en {tabla}")
+
+# Tablas de "C3_E02 BaseDedatos_Jugueteria.sql" (sin el DROP DATABASE), con los nombres en
+# minúsculas que usan las consultas de routes/*.py
+ESQUEMA_BASE = [
+    '''
+    CREATE TABLE IF NOT EXISTS municipio (
+        Id_Municipio INT AUTO_INCREMENT PRIMARY KEY,
+        Nombre VARCHAR(100) NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS departamento (
+        Id_Departamento INT AUTO_INCREMENT PRIMARY KEY,
+        Nombre VARCHAR(100) NOT NULL,
+        Descripcion VARCHAR(255),
+        Id_Municipio INT UNIQUE,
+        FOREIGN KEY (Id_Municipio) REFERENCES municipio(Id_Municipio)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS linea_producto (
+        Id_Linea INT AUTO_INCREMENT PRIMARY KEY,
+        Nombre VARCHAR(100) NOT NULL,
+        Descripcion VARCHAR(255)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS producto (
+        Id_Producto INT AUTO_INCREMENT PRIMARY KEY,
+        Nombre VARCHAR(100) NOT NULL,
+        Descripcion VARCHAR(255),
+        Fecha_Vencimiento DATE,
+        Cantidad INT,
+        Valor_Unitario DECIMAL(10,2),
+        Id_Linea INT,
+        FOREIGN KEY (Id_Linea) REFERENCES linea_producto(Id_Linea)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS cliente (
+        Id_Cliente INT AUTO_INCREMENT PRIMARY KEY,
+        Nombre VARCHAR(100) NOT NULL,
+        Fecha_Nacimiento DATE,
+        Historial_Compras TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS venta (
+        Id_Venta INT AUTO_INCREMENT PRIMARY KEY,
+        Descripcion VARCHAR(255),
+        Valor_Total DECIMAL(10,2)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS detalle_venta (
+        Id_Venta INT,
+        Id_Producto INT,
+        Cantidad_Producto INT,
+        PRIMARY KEY (Id_Venta, Id_Producto),
+        FOREIGN KEY (Id_Venta) REFERENCES venta(Id_Venta),
+        FOREIGN KEY (Id_Producto) REFERENCES producto(Id_Producto)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS compra (
+        Id_Cliente INT,
+        Id_Producto INT,
+        PRIMARY KEY (Id_Cliente, Id_Producto),
+        FOREIGN KEY (Id_Cliente) REFERENCES cliente(Id_Cliente),
+        FOREIGN KEY (Id_Producto) REFERENCES producto(Id_Producto)
+    )
+    '''
+]
+
+def _crear_esquema_base(cursor):
+    for ddl in ESQUEMA_BASE:
+        cursor.execute(ddl)
+
+def _existe_tabla(cursor, tabla):
+    cursor.execute(f"SHOW TABLES LIKE '{tabla}'")
+    return cursor.fetchone() is not None
+
+def _m001_usuarios(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(80) UNIQUE NOT NULL,
+            email VARCHAR(120) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            nombre VARCHAR(100),
+            apellido VARCHAR(100),
+            telefono VARCHAR(15),
+            direccion TEXT,
+            rol ENUM('admin', 'cliente') DEFAULT 'cliente',
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Crear usuario admin por defecto (contraseña: admin123)
+    cursor.execute('''
+        INSERT IGNORE INTO usuarios
+        (username, email, password, nombre, apellido, rol) VALUES
+        ('admin', 'admin@jugueteria.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj89tiM7Q.Ly', 'Admin', 'Sistema', 'admin')
+    ''')
+
+def _m002_resumen_ventas(cursor):
+    # DDL de reportes.TABLAS_RESUMEN tal como estaba al publicarse la 002: los cambios posteriores
+    # a reportes.py van en migraciones nuevas (009) y no alteran lo que crea esta
+    cursor.execute("SHOW COLUMNS FROM venta LIKE 'Fecha'")
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE venta ADD COLUMN Fecha DATETIME DEFAULT CURRENT_TIMESTAMP")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_ventas_dia (
+            Fecha DATE PRIMARY KEY,
+            Num_Ventas INT NOT NULL DEFAULT 0,
+            Unidades INT NOT NULL DEFAULT 0,
+            Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_ventas_producto (
+            Id_Producto INT PRIMARY KEY,
+            Num_Ventas INT NOT NULL DEFAULT 0,
+            Unidades INT NOT NULL DEFAULT 0,
+            Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+            INDEX idx_resumen_producto_ingresos (Ingresos),
+            INDEX idx_resumen_producto_unidades (Unidades)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_ventas_linea (
+            Id_Linea INT PRIMARY KEY,
+            Num_Ventas INT NOT NULL DEFAULT 0,
+            Unidades INT NOT NULL DEFAULT 0,
+            Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0
+        )
+    ''')
+
+def _m003_indices_consultas(cursor):
+    # GET /api/productos: ORDER BY p.Nombre, p.Id_Producto con cursor keyset
+    _crear_indice(cursor, 'producto', 'idx_producto_nombre_id', ['Nombre', 'Id_Producto'])
+    # GET /api/productos?linea=: filtro por línea con el mismo orden
+    _crear_indice(cursor, 'producto', 'idx_producto_linea_nombre', ['Id_Linea', 'Nombre', 'Id_Producto'])
+    # GET /api/usuarios: ORDER BY fecha_creacion DESC
+    _crear_indice(cursor, 'usuarios', 'idx_usuarios_fecha_creacion', ['fecha_creacion'])
+    # FK Detalle_Venta.Id_Producto (la PK empieza por Id_Venta)
+    _crear_indice(cursor, 'detalle_venta', 'idx_detalle_venta_producto', ['Id_Producto'])
+    # Datos de referencia: ORDER BY Nombre
+    _crear_indice(cursor, 'linea_producto', 'idx_linea_producto_nombre', ['Nombre'])
+    _crear_indice(cursor, 'municipio', 'idx_municipio_nombre', ['Nombre'])
+    _crear_indice(cursor, 'departamento', 'idx_departamento_nombre', ['Nombre'])
+
+def _m004_reservas(cursor):
+    # Versión por producto para los UPDATE con compare-and-swap de PUT /productos/<id>
+    cursor.execute("SHOW COLUMNS FROM producto LIKE 'Version'")
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE producto ADD COLUMN Version INT NOT NULL DEFAULT 0")
+    # Unidades apartadas hasta el checkout; ya están descontadas de producto.Cantidad
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reserva (
+            Id_Reserva INT AUTO_INCREMENT PRIMARY KEY,
+            Id_Usuario INT NOT NULL,
+            Estado ENUM('activa', 'confirmada', 'cancelada', 'expirada') NOT NULL DEFAULT 'activa',
+            Expira_En DATETIME NOT NULL,
+            Fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+            Id_Venta INT,
+            INDEX idx_reserva_estado_expira (Estado, Expira_En),
+            FOREIGN KEY (Id_Usuario) REFERENCES usuarios(id),
+            FOREIGN KEY (Id_Venta) REFERENCES venta(Id_Venta)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS detalle_reserva (
+            Id_Reserva INT,
+            Id_Producto INT,
+            Cantidad INT NOT NULL,
+            PRIMARY KEY (Id_Reserva, Id_Producto),
+            FOREIGN KEY (Id_Reserva) REFERENCES reserva(Id_Reserva),
+            FOREIGN KEY (Id_Producto) REFERENCES producto(Id_Producto)
+        )
+    ''')
+
+def _m005_pedidos_procesados(cursor):
+    # Pedidos de la cola write-behind ya aplicados: la PK hace que cada uno entre una sola vez
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pedido_procesado (
+            Id_Pedido VARCHAR(64) PRIMARY KEY,
+            Id_Usuario INT,
+            Estado ENUM('procesado', 'rechazado') NOT NULL,
+            Id_Venta INT,
+            Mensaje VARCHAR(255),
+            Fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (Id_Venta) REFERENCES venta(Id_Venta)
+        )
+    ''')
+
+def _m006_precio_detalle_venta(cursor):
+    # Precio de cada línea al momento de la venta: los reportes no dependen del precio actual
+    cursor.execute("SHOW COLUMNS FROM detalle_venta LIKE 'Precio_Unitario'")
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE detalle_venta ADD COLUMN Precio_Unitario DECIMAL(10,2)")
+    # Ventas históricas: con una sola línea el precio sale exacto de Valor_Total; con
+    # varias no hay forma de repartirlo y se usa el Valor_Unitario actual
+    cursor.execute("""
+        UPDATE detalle_venta
+        SET Precio_Unitario = (
+            SELECT v.Valor_Total / detalle_venta.Cantidad_Producto FROM venta v
+            WHERE v.Id_Venta = detalle_venta.Id_Venta
+        )
+        WHERE Precio_Unitario IS NULL AND Cantidad_Producto > 0 AND Id_Venta IN (
+            -- Tabla derivada con GROUP BY: MySQL la materializa y deja leer la tabla que se actualiza
+            SELECT Id_Venta FROM (
+                SELECT Id_Venta FROM detalle_venta GROUP BY Id_Venta HAVING COUNT(*) = 1
+            ) unicas
+        )
+    """)
+    cursor.execute("""
+        UPDATE detalle_venta
+        SET Precio_Unitario = (
+            SELECT p.Valor_Unitario FROM producto p WHERE p.Id_Producto = detalle_venta.Id_Producto
+        )
+        WHERE Precio_Unitario IS NULL
+    """)
+
+def _m007_esquema_base(cursor):
+    # Tablas de C3_E02 que falten en bases creadas a mano (cliente, compra...); en una base
+    # vacía migrar() ya las creó antes de la 001
+    _crear_esquema_base(cursor)
+
+def _m008_pedido_por_usuario(cursor):
+    # El Id_Pedido lo elige el cliente: con PK global el pedido de otro usuario con el mismo id
+    # se descartaba. La clave pasa a (Id_Usuario, Id_Pedido); se reconstruye la tabla porque
+    # cambiar la PK en sitio no es portable. Cada paso se puede repetir si se corta a mitad
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pedido_procesado_usuario (
+            Id_Usuario INT NOT NULL,
+            Id_Pedido VARCHAR(64) NOT NULL,
+            Estado ENUM('procesado', 'rechazado') NOT NULL,
+            Id_Venta INT,
+            Mensaje VARCHAR(255),
+            Fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (Id_Usuario, Id_Pedido),
+            FOREIGN KEY (Id_Venta) REFERENCES venta(Id_Venta)
+        )
+    ''')
+    if _existe_tabla(cursor, 'pedido_procesado'):
+        cursor.execute('''
+            INSERT IGNORE INTO pedido_procesado_usuario (Id_Usuario, Id_Pedido, Estado, Id_Venta, Mensaje, Fecha)
+            SELECT Id_Usuario, Id_Pedido, Estado, Id_Venta, Mensaje, Fecha
+            FROM pedido_procesado WHERE Id_Usuario IS NOT NULL
+        ''')
+        cursor.execute("DROP TABLE pedido_procesado")
+    cursor.execute("ALTER TABLE pedido_procesado_usuario RENAME TO pedido_procesado")
+
+def _m009_resumen_ventas_por_dia(cursor):
+    # Resúmenes por (día, producto) y (día, línea): el reporte con ?desde=&hasta= filtra todo por
+    # el mismo rango. DDL copiado aquí (no reportes.TABLAS_RESUMEN) para que no cambie después
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_ventas_producto_dia (
+            Fecha DATE NOT NULL,
+            Id_Producto INT NOT NULL,
+            Num_Ventas INT NOT NULL DEFAULT 0,
+            Unidades INT NOT NULL DEFAULT 0,
+            Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (Fecha, Id_Producto)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumen_ventas_linea_dia (
+            Fecha DATE NOT NULL,
+            Id_Linea INT NOT NULL,
+            Num_Ventas INT NOT NULL DEFAULT 0,
+            Unidades INT NOT NULL DEFAULT 0,
+            Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (Fecha, Id_Linea)
+        )
+    ''')
+    # Backfill desde el historial (se vacían antes: la migración puede repetirse)
+    cursor.execute("DELETE FROM resumen_ventas_producto_dia")
+    cursor.execute("DELETE FROM resumen_ventas_linea_dia")
+    cursor.execute("""
+        INSERT INTO resumen_ventas_producto_dia (Fecha, Id_Producto, Num_Ventas, Unidades, Ingresos)
+        SELECT DATE(v.Fecha), dv.Id_Producto, COUNT(DISTINCT dv.Id_Venta), SUM(dv.Cantidad_Producto),
+            SUM(dv.Cantidad_Producto * COALESCE(dv.Precio_Unitario, 0))
+        FROM detalle_venta dv
+        JOIN venta v ON v.Id_Venta = dv.Id_Venta
+        GROUP BY DATE(v.Fecha), dv.Id_Producto
+    """)
+    cursor.execute("""
+        INSERT INTO resumen_ventas_linea_dia (Fecha, Id_Linea, Num_Ventas, Unidades, Ingresos)
+        SELECT DATE(v.Fecha), p.Id_Linea, COUNT(DISTINCT dv.Id_Venta), SUM(dv.Cantidad_Producto),
+            SUM(dv.Cantidad_Producto * COALESCE(dv.Precio_Unitario, 0))
+        FROM detalle_venta dv
+        JOIN venta v ON v.Id_Venta = dv.Id_Venta
+        JOIN producto p ON p.Id_Producto = dv.Id_Producto
+        WHERE p.Id_Linea IS NOT NULL
+        GROUP BY DATE(v.Fecha), p.Id_Linea
+    """)
+
+# (versión, descripción, función) en orden; nunca renumerar ni editar una ya publicada
+MIGRACIONES = [
+    (1, 'Tabla usuarios y administrador por defecto', _m001_usuarios),
+    (2, 'Fecha de venta y tablas de resumen de ventas', _m002_resumen_ventas),
+    (3, 'Índices para las consultas de routes/*.py', _m003_indices_consultas),
+    (4, 'Versión de producto y reservas de inventario', _m004_reservas),
+    (5, 'Pedidos aplicados desde la cola write-behind', _m005_pedidos_procesados),
+    (6, 'Precio unitario de cada línea de venta', _m006_precio_detalle_venta),
+    (7, 'Tablas faltantes del esquema base C3_E02', _m007_esquema_base),
+    (8, 'Pedidos aplicados por (usuario, pedido)', _m008_pedido_por_usuario),
+    (9, 'Resúmenes de ventas por día de producto y de línea', _m009_resumen_ventas_por_dia),
+]
+
+def versiones_aplicadas(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            descripcion VARCHAR(255) NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("SELECT version FROM schema_version")
+    return {fila['version'] for fila in cursor.fetchall()}
+
+def version_actual(cursor):
+    return max(versiones_aplicadas(cursor), default=-1)
+
+def migrar(db, hasta=None):
+    """Aplica en orden las migraciones pendientes y registra cada versión"""
+    with db.cursor() as cursor:
+        # Las migraciones asumen las tablas de "C3_E02 BaseDedatos_Jugueteria.sql": en una
+        # base vacía (pruebas, benchmarks) se crean primero, como si se hubiera cargado el script
+        if not _existe_tabla(cursor, 'producto'):
+            print("🔄 Base vacía: creando el esquema base de C3_E02")
+            _crear_esquema_base(cursor)
+            db.commit()
+        aplicadas_antes = versiones_aplicadas(cursor)
+        aplicadas = []
+        for version, descripcion, migracion in MIGRACIONES:
+            if version in aplicadas_antes or (hasta is not None and version > hasta):
+                continue
+            print(f"🔄 Migración {version:03d}: {descripcion}")
+            migracion(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+                (version, descripcion)
+            )
+            db.commit()
+            aplicadas.append(version)
+        return aplicadas
+
+def consultas_criticas():
+    """Consultas calientes verificadas con EXPLAIN: ninguna debe recorrer la tabla completa.
+    Salen de los mismos constructores que usan las rutas, así se verifica el SQL que se envía"""
+    # Import diferido: las rutas importan Database.* al cargarse
+    from Database.models import consulta_productos_venta, CONSULTA_RESERVAS_VENCIDAS
+    from routes.auth_routes import CONSULTA_LOGIN
+    from routes.producto_routes import codificar_cursor, consulta_pagina_productos, consulta_producto, consultas_lote
+    from routes.user_routes import consulta_usuario, consulta_usuarios
+
+    def pagina(sql, params, _limite):
+        return sql, params
+
+    return {
+        'productos_pagina': pagina(*consulta_pagina_productos({})),
+        'productos_pagina_cursor': pagina(*consulta_pagina_productos({'cursor': codificar_cursor('M', 0)})),
+        'productos_por_linea': pagina(*consulta_pagina_productos({'linea': '1'})),
+        'producto_por_id': consulta_producto({}, 1),
+        'productos_lote': consultas_lote({}, [1, 2, 3])[0],
+        'productos_venta': consulta_productos_venta([1, 2, 3]),
+        'usuario_login': (CONSULTA_LOGIN, ('admin',)),
+        'usuario_por_id': consulta_usuario({}, 1),
+        'usuarios_pagina': pagina(*consulta_usuarios({})),
+        'usuarios_pagina_cursor': pagina(*consulta_usuarios({'cursor': codificar_cursor('2030-01-01 00:00:00', 1)})),
+        'reservas_vencidas': (CONSULTA_RESERVAS_VENCIDAS, ('2030-01-01 00:00:00', 500)),
+        'top_productos': reportes.consulta_top_productos('Ingresos', 10),
+        'top_productos_unidades': reportes.consulta_top_productos('Unidades', 10),
+    }
+
+def verificar_consultas(db, consultas=None):
+    """Ejecuta EXPLAIN sobre cada consulta crítica; devuelve las que hacen full scan"""
+    fallas = []
+    with db.cursor() as cursor:
+        for nombre, (sql, params) in (consultas or consultas_criticas()).items():
+            cursor.execute(f"EXPLAIN {sql}", params)
+            for fila in cursor.fetchall():
+                if (fila.get('type') or '').upper() == 'ALL':
+                    fallas.append({
+                        'consulta': nombre,
+                        'tabla': fila.get('table'),
+                        'filas_estimadas': fila.get('rows'),
+                        'extra': fila.get('Extra')
+                    })
+    return fallas
@@ -1,5 +1,19 @@
 from Database.conexion import get_db_connection
-import bcrypt
+from Database import reportes
+from datetime import datetime, timedelta
+from routes import contrasenas
+import os
+
+# Reservas de inventario (segundos)
+RESERVA_TTL = int(os.getenv('RESERVA_TTL', 600))
+RESERVA_TTL_MAXIMO = int(os.getenv('RESERVA_TTL_MAXIMO', 3600))
+RESERVAS_BARRIDO_LOTE = int(os.getenv('RESERVAS_BARRIDO_LOTE', 500))
+
+# Lote del barrido de reservas: (ahora, límite)
+CONSULTA_RESERVAS_VENCIDAS = """
+    SELECT Id_Reserva FROM reserva WHERE Estado = 'activa' AND Expira_En <= %s
+    ORDER BY Expira_En LIMIT %s
+"""
 
 class Usuario:
     @staticmethod
@@ -17,8 +31,8 @@ class Usuario:
                     if cursor.fetchone():
                         return None, "El usuario o email ya existe"
                     
-                    # Encriptar contraseña
-                    hashed_pwd = bcrypt.hashpw(datos['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                    # Encriptar contraseña (mismo pool acotado y costo que /auth/register)
+                    hashed_pwd = contrasenas.hashear_password(datos['password'])
                     
                     # Insertar usuario
                     sql = """
@@ -116,7 +130,7 @@ class Usuario:
     @staticmethod
     def verificar_password(password, hashed):
         """Verifica si la contraseña coincide"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        return contrasenas.verificar_password(password, hashed)
 
 class Producto:
     @staticmethod
@@ -130,7 +144,7 @@ class Producto:
                     cursor.execute("""
                         SELECT p.*, lp.Nombre as linea_nombre 
                         FROM producto p 
-                        LEFT JOIN linea_producto lp ON p.Id_Linea_Producto = lp.Id_Linea_Producto
+                        LEFT JOIN linea_producto lp ON p.Id_Linea = lp.Id_Linea
                         ORDER BY p.Nombre
                     """)
                     return cursor.fetchall()
@@ -170,10 +184,10 @@ class Producto:
         if conexion:
             try:
                 with conexion.cursor() as cursor:
-                    # Ajustar según los campos de tu tabla producto
+                    # Columnas de C3_E02 (mismas que POST /productos)
                     sql = """
                         INSERT INTO producto 
-                        (Nombre, Descripcion, Precio, Stock, Id_Linea_Producto) 
+                        (Nombre, Descripcion, Valor_Unitario, Cantidad, Id_Linea) 
                         VALUES (%s, %s, %s, %s, %s)
                     """
                     cursor.execute(sql, (
@@ -181,7 +195,7 @@ class Producto:
                         producto_data.get('descripcion', ''),
                         producto_data['precio'],
                         producto_data.get('stock', 0),
-                        producto_data.get('id_linea_producto', 1)
+                        producto_data.get('id_linea', producto_data.get('id_linea_producto', 1))
                     ))
                     conexion.commit()
                     return cursor.lastrowid, "Producto creado exitosamente"
@@ -198,9 +212,11 @@ class Producto:
         if conexion:
             try:
                 with conexion.cursor() as cursor:
+                    # Todo escritor sube Version: el compare-and-swap de PUT /productos/<id> lo detecta
                     sql = """
                         UPDATE producto 
-                        SET Nombre=%s, Descripcion=%s, Precio=%s, Stock=%s, Id_Linea_Producto=%s
+                        SET Nombre=%s, Descripcion=%s, Valor_Unitario=%s, Cantidad=%s, Id_Linea=%s,
+                            Version = Version + 1
                         WHERE Id_Producto=%s
                     """
                     cursor.execute(sql, (
@@ -208,7 +224,7 @@ class Producto:
                         producto_data.get('descripcion', ''),
                         producto_data['precio'],
                         producto_data.get('stock', 0),
-                        producto_data.get('id_linea_producto', 1),
+                        producto_data.get('id_linea', producto_data.get('id_linea_producto', 1)),
                         producto_id
                     ))
                     conexion.commit()
@@ -236,44 +252,377 @@ class LineaProducto:
                 conexion.close()
         return []
 
+class ConflictoVentaError(Exception):
+    """La venta no puede completarse con el stock o catálogo actuales"""
+    def __init__(self, mensaje, detalles=None):
+        super().__init__(mensaje)
+        self.detalles = detalles or []
+
+def _marcadores(valores):
+    return ', '.join(['%s'] * len(valores))
+
+def consulta_productos_venta(ids):
+    """(sql, params) de los precios y líneas de una venta"""
+    return f"SELECT Id_Producto, Valor_Unitario, Id_Linea FROM producto WHERE Id_Producto IN ({_marcadores(ids)})", ids
+
+def _productos_venta(cursor, ids):
+    """{Id_Producto: fila con Valor_Unitario e Id_Linea}; ConflictoVentaError si falta alguno"""
+    cursor.execute(*consulta_productos_venta(ids))
+    productos = {fila['Id_Producto']: fila for fila in cursor.fetchall()}
+    faltantes = [producto_id for producto_id in ids if producto_id not in productos]
+    if faltantes:
+        raise ConflictoVentaError("Productos no encontrados", faltantes)
+    return productos
+
+def _descontar_stock(cursor, items):
+    """Descuento atómico: solo se actualizan las filas con stock suficiente (ConflictoVentaError si no;
+    quien llama deshace la transacción o el savepoint)"""
+    # Un solo UPDATE condicional: el bloqueo de la fila dura lo que dura la sentencia y la
+    # transacción, sin SELECT ... FOR UPDATE previo que serialice los checkouts de un SKU
+    ids = [producto_id for producto_id, _ in items]
+    casos = ' '.join(['WHEN %s THEN %s'] * len(items))
+    pares = [valor for item in items for valor in item]
+    cursor.execute(f"""
+        UPDATE producto
+        SET Cantidad = Cantidad - CASE Id_Producto {casos} END, Version = Version + 1
+        WHERE Id_Producto IN ({_marcadores(ids)})
+        AND Cantidad >= CASE Id_Producto {casos} END
+    """, pares + ids + pares)
+    
+    if cursor.rowcount != len(items):
+        cursor.execute(
+            f"SELECT Id_Producto, Cantidad FROM producto WHERE Id_Producto IN ({_marcadores(ids)})",
+            ids
+        )
+        stock = {fila['Id_Producto']: fila['Cantidad'] or 0 for fila in cursor.fetchall()}
+        raise ConflictoVentaError("Stock insuficiente", [
+            {'producto_id': producto_id, 'solicitado': cantidad, 'disponible': stock.get(producto_id, 0)}
+            for producto_id, cantidad in items
+            if stock.get(producto_id, 0) < cantidad
+        ])
+
+def _registrar_venta(cursor, descripcion, items, productos):
+    """Inserta Venta, Detalle_Venta y los resúmenes; devuelve el JSON de la venta"""
+    precios = {producto_id: fila['Valor_Unitario'] for producto_id, fila in productos.items()}
+    total = sum((precios[producto_id] or 0) * cantidad for producto_id, cantidad in items)
+    
+    cursor.execute("""
+        INSERT INTO venta 
+        (Descripcion, Valor_Total, Fecha) 
+        VALUES (%s, %s, NOW())
+    """, (descripcion, total))
+    venta_id = cursor.lastrowid
+    
+    # El precio queda en el detalle: reportes.reconstruir suma lo mismo que registrar_venta
+    cursor.executemany("""
+        INSERT INTO detalle_venta 
+        (Id_Venta, Id_Producto, Cantidad_Producto, Precio_Unitario) 
+        VALUES (%s, %s, %s, %s)
+    """, [(venta_id, producto_id, cantidad, precios[producto_id]) for producto_id, cantidad in items])
+    
+    # Resúmenes de reportes en la misma transacción
+    reportes.registrar_venta(cursor, items, precios, productos)
+    
+    return {'id': venta_id, 'total': total, 'detalles': [
+        {'producto_id': producto_id, 'cantidad': cantidad, 'precio_unitario': precios[producto_id]}
+        for producto_id, cantidad in items
+    ]}
+
 class Venta:
+    @staticmethod
+    def _normalizar_detalles(detalles):
+        """Agrupa cantidades por producto y las ordena por Id (orden de bloqueo estable)"""
+        if not detalles:
+            raise ValueError("La venta debe tener al menos un producto")
+        cantidades = {}
+        for detalle in detalles:
+            try:
+                producto_id = int(detalle['producto_id'])
+                cantidad = int(detalle['cantidad'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Cada detalle requiere producto_id y cantidad enteros")
+            if cantidad <= 0:
+                raise ValueError("La cantidad debe ser mayor que 0")
+            cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+        return sorted(cantidades.items())
+
     @staticmethod
     def crear(venta_data):
-        """Crea una nueva venta"""
+        """Crea una venta descontando stock en la misma transacción (lanza ConflictoVentaError)"""
+        items = Venta._normalizar_detalles(venta_data.get('detalles'))
+        
         conexion = get_db_connection()
         if conexion:
             try:
                 with conexion.cursor() as cursor:
-                    # Insertar venta
-                    sql = """
-                        INSERT INTO venta 
-                        (Fecha, Total, Id_Usuario) 
-                        VALUES (NOW(), %s, %s)
-                    """
-                    cursor.execute(sql, (
-                        venta_data['total'],
-                        venta_data['usuario_id']
-                    ))
-                    venta_id = cursor.lastrowid
-                    
-                    # Insertar detalles de venta
-                    for detalle in venta_data['detalles']:
-                        sql_detalle = """
-                            INSERT INTO detalle_venta 
-                            (Id_Venta, Id_Producto, Cantidad, Precio_Unitario) 
-                            VALUES (%s, %s, %s, %s)
-                        """
-                        cursor.execute(sql_detalle, (
-                            venta_id,
-                            detalle['producto_id'],
-                            detalle['cantidad'],
-                            detalle['precio_unitario']
-                        ))
-                    
+                    # Precios en una sola consulta; el total se calcula en el servidor
+                    productos = _productos_venta(cursor, [producto_id for producto_id, _ in items])
+                    _descontar_stock(cursor, items)
+                    venta = _registrar_venta(cursor, venta_data.get('descripcion', ''), items, productos)
                     conexion.commit()
-                    return venta_id, "Venta creada exitosamente"
+                    return venta, "Venta creada exitosamente"
+            except ConflictoVentaError:
+                conexion.rollback()
+                raise
             except Exception as e:
+                conexion.rollback()
                 return None, f"Error: {str(e)}"
             finally:
                 conexion.close()
-        return None, "Error de conexión"
\ No newline at end of file
+        return None, "Error de conexión"
+
+    @staticmethod
+    def aplicar_pedidos(pedidos):
+        """Aplica en una transacción los pedidos de la cola; devuelve {(usuario_id, pedido_id): resultado}"""
+        # pedidos: [((usuario_id, pedido_id), datos)]. Pedido_Procesado se escribe en la misma
+        # transacción que la venta: un pedido reintentado después de un commit ya aplicado se
+        # salta (exactly-once). El pedido_id lo elige el cliente: solo es único por usuario
+        claves = [clave for clave, _ in pedidos]
+        conexion = get_db_connection()
+        if not conexion:
+            raise ConnectionError("Error de conexión")
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT Id_Usuario, Id_Pedido, Estado, Id_Venta, Mensaje FROM pedido_procesado
+                    WHERE (Id_Usuario, Id_Pedido) IN ({', '.join(['(%s, %s)'] * len(claves))})
+                    """,
+                    [valor for clave in claves for valor in clave]
+                )
+                resultados = {(fila['Id_Usuario'], fila['Id_Pedido']): fila for fila in cursor.fetchall()}
+                for clave, datos in pedidos:
+                    if clave in resultados:
+                        continue
+                    # Un pedido rechazado (sin stock, producto inexistente) no tumba al resto del lote
+                    cursor.execute("SAVEPOINT pedido")
+                    try:
+                        items = Venta._normalizar_detalles(datos.get('detalles'))
+                        productos = _productos_venta(cursor, [producto_id for producto_id, _ in items])
+                        _descontar_stock(cursor, items)
+                        venta = _registrar_venta(cursor, datos.get('descripcion', ''), items, productos)
+                        resultado = {'Estado': 'procesado', 'Id_Venta': venta['id'], 'Mensaje': None}
+                    except (ValueError, ConflictoVentaError) as e:
+                        cursor.execute("ROLLBACK TO SAVEPOINT pedido")
+                        resultado = {'Estado': 'rechazado', 'Id_Venta': None, 'Mensaje': str(e)[:255]}
+                    cursor.execute("""
+                        INSERT INTO pedido_procesado (Id_Pedido, Id_Usuario, Estado, Id_Venta, Mensaje)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (clave[1], clave[0], resultado['Estado'], resultado['Id_Venta'], resultado['Mensaje']))
+                    resultados[clave] = resultado
+                conexion.commit()
+                return resultados
+        except Exception:
+            conexion.rollback()
+            raise
+        finally:
+            conexion.close()
+
+    @staticmethod
+    def pedido_procesado(usuario_id, pedido_id):
+        """Resultado de un pedido del usuario ya aplicado en MySQL o None"""
+        conexion = get_db_connection()
+        if conexion:
+            try:
+                with conexion.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT Id_Pedido, Id_Usuario, Estado, Id_Venta, Mensaje, Fecha FROM pedido_procesado WHERE Id_Usuario = %s AND Id_Pedido = %s",
+                        (usuario_id, pedido_id)
+                    )
+                    return cursor.fetchone()
+            except Exception as e:
+                print(f"Error al obtener pedido: {e}")
+                return None
+            finally:
+                conexion.close()
+        return None
+
+class Reserva:
+    """Stock apartado por RESERVA_TTL segundos entre el carrito y el checkout"""
+
+    @staticmethod
+    def _ahora():
+        # Sin microsegundos: DATETIME de MySQL los descarta y las comparaciones deben coincidir
+        return datetime.now().replace(microsecond=0)
+
+    @staticmethod
+    def crear(usuario_id, reserva_data):
+        """Descuenta el stock y registra la reserva activa (lanza ConflictoVentaError)"""
+        items = Venta._normalizar_detalles(reserva_data.get('detalles'))
+        try:
+            ttl = int(reserva_data.get('ttl', RESERVA_TTL))
+        except (TypeError, ValueError):
+            raise ValueError("ttl debe ser un entero de segundos")
+        if not 0 < ttl <= RESERVA_TTL_MAXIMO:
+            raise ValueError(f"ttl debe estar entre 1 y {RESERVA_TTL_MAXIMO} segundos")
+        expira_en = Reserva._ahora() + timedelta(seconds=ttl)
+        
+        conexion = get_db_connection()
+        if conexion:
+            try:
+                with conexion.cursor() as cursor:
+                    _productos_venta(cursor, [producto_id for producto_id, _ in items])
+                    _descontar_stock(cursor, items)
+                    cursor.execute(
+                        "INSERT INTO reserva (Id_Usuario, Estado, Expira_En) VALUES (%s, 'activa', %s)",
+                        (usuario_id, expira_en)
+                    )
+                    reserva_id = cursor.lastrowid
+                    cursor.executemany(
+                        "INSERT INTO detalle_reserva (Id_Reserva, Id_Producto, Cantidad) VALUES (%s, %s, %s)",
+                        [(reserva_id, producto_id, cantidad) for producto_id, cantidad in items]
+                    )
+                    conexion.commit()
+                    return {
+                        'id': reserva_id,
+                        'estado': 'activa',
+                        'expira_en': expira_en,
+                        'detalles': [
+                            {'producto_id': producto_id, 'cantidad': cantidad}
+                            for producto_id, cantidad in items
+                        ]
+                    }, "Reserva creada exitosamente"
+            except ConflictoVentaError:
+                conexion.rollback()
+                raise
+            except Exception as e:
+                conexion.rollback()
+                return None, f"Error: {str(e)}"
+            finally:
+                conexion.close()
+        return None, "Error de conexión"
+
+    @staticmethod
+    def obtener(reserva_id):
+        """Reserva con sus detalles o None"""
+        conexion = get_db_connection()
+        if conexion:
+            try:
+                with conexion.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT Id_Reserva, Id_Usuario, Estado, Expira_En, Fecha, Id_Venta FROM reserva WHERE Id_Reserva = %s",
+                        (reserva_id,)
+                    )
+                    reserva = cursor.fetchone()
+                    if reserva:
+                        cursor.execute(
+                            "SELECT Id_Producto, Cantidad FROM detalle_reserva WHERE Id_Reserva = %s ORDER BY Id_Producto",
+                            (reserva_id,)
+                        )
+                        reserva['detalles'] = cursor.fetchall()
+                    return reserva
+            except Exception as e:
+                print(f"Error al obtener reserva: {e}")
+                return None
+            finally:
+                conexion.close()
+        return None
+
+    @staticmethod
+    def _tomar(cursor, reserva_id, estado, vigente=False):
+        """Compare-and-swap activa -> estado; False si otro proceso (checkout, barrido) la tomó antes"""
+        sql = "UPDATE reserva SET Estado = %s WHERE Id_Reserva = %s AND Estado = 'activa'"
+        params = [estado, reserva_id]
+        if vigente:
+            sql += " AND Expira_En > %s"
+            params.append(Reserva._ahora())
+        cursor.execute(sql, params)
+        return cursor.rowcount == 1
+
+    @staticmethod
+    def _items(cursor, reservas_ids):
+        cursor.execute(
+            f"SELECT Id_Producto, SUM(Cantidad) AS Cantidad FROM detalle_reserva "
+            f"WHERE Id_Reserva IN ({_marcadores(reservas_ids)}) GROUP BY Id_Producto ORDER BY Id_Producto",
+            reservas_ids
+        )
+        return [(fila['Id_Producto'], int(fila['Cantidad'])) for fila in cursor.fetchall()]
+
+    @staticmethod
+    def _devolver_stock(cursor, items):
+        if not items:
+            return
+        ids = [producto_id for producto_id, _ in items]
+        casos = ' '.join(['WHEN %s THEN %s'] * len(items))
+        cursor.execute(f"""
+            UPDATE producto
+            SET Cantidad = Cantidad + CASE Id_Producto {casos} END, Version = Version + 1
+            WHERE Id_Producto IN ({_marcadores(ids)})
+        """, [valor for item in items for valor in item] + ids)
+
+    @staticmethod
+    def confirmar(reserva_id, venta_data):
+        """Checkout: convierte la reserva vigente en Venta/Detalle_Venta sin volver a tocar el stock"""
+        conexion = get_db_connection()
+        if conexion:
+            try:
+                with conexion.cursor() as cursor:
+                    if not Reserva._tomar(cursor, reserva_id, 'confirmada', vigente=True):
+                        raise ConflictoVentaError("La reserva expiró o ya no está activa")
+                    items = Reserva._items(cursor, [reserva_id])
+                    productos = _productos_venta(cursor, [producto_id for producto_id, _ in items])
+                    venta = _registrar_venta(cursor, venta_data.get('descripcion', ''), items, productos)
+                    cursor.execute(
+                        "UPDATE reserva SET Id_Venta = %s WHERE Id_Reserva = %s",
+                        (venta['id'], reserva_id)
+                    )
+                    conexion.commit()
+                    return venta, "Venta creada exitosamente"
+            except ConflictoVentaError:
+                conexion.rollback()
+                raise
+            except Exception as e:
+                conexion.rollback()
+                return None, f"Error: {str(e)}"
+            finally:
+                conexion.close()
+        return None, "Error de conexión"
+
+    @staticmethod
+    def cancelar(reserva_id):
+        """Libera las unidades de una reserva activa (lanza ConflictoVentaError si ya no lo está)"""
+        conexion = get_db_connection()
+        if conexion:
+            try:
+                with conexion.cursor() as cursor:
+                    if not Reserva._tomar(cursor, reserva_id, 'cancelada'):
+                        raise ConflictoVentaError("La reserva ya no está activa")
+                    Reserva._devolver_stock(cursor, Reserva._items(cursor, [reserva_id]))
+                    conexion.commit()
+                    return True, "Reserva cancelada"
+            except ConflictoVentaError:
+                conexion.rollback()
+                raise
+            except Exception as e:
+                conexion.rollback()
+                return False, f"Error: {str(e)}"
+            finally:
+                conexion.close()
+        return False, "Error de conexión"
+
+    @staticmethod
+    def expirar_vencidas(limite=None):
+        """Barrido: marca como expiradas las reservas vencidas y devuelve su stock; cuántas expiró"""
+        conexion = get_db_connection()
+        if not conexion:
+            return 0
+        try:
+            with conexion.cursor() as cursor:
+                cursor.execute(CONSULTA_RESERVAS_VENCIDAS, (Reserva._ahora(), limite or RESERVAS_BARRIDO_LOTE))
+                vencidas = [fila['Id_Reserva'] for fila in cursor.fetchall()]
+                # Cada reserva se toma con compare-and-swap: un checkout concurrente o el
+                # barrendero de otro worker ganan o pierden la fila, nunca las dos cosas
+                tomadas = [
+                    reserva_id for reserva_id in vencidas
+                    if Reserva._tomar(cursor, reserva_id, 'expirada')
+                ]
+                if tomadas:
+                    Reserva._devolver_stock(cursor, Reserva._items(cursor, tomadas))
+                conexion.commit()
+                return len(tomadas)
+        except Exception as e:
+            conexion.rollback()
+            print(f"❌ Error al expirar reservas: {e}")
+            return 0
+        finally:
+            conexion.close()
@@ -0,0 +1,122 @@
+import functools
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+# Estadísticas por "huella" de sentencia: el mismo SQL con distintos literales o
+# distinto largo de IN (...) cuenta como una sola consulta
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+# Máximo de huellas distintas y de entradas en el log de consultas lentas
+PERFILADOR_MAX_HUELLAS = int(os.getenv('PERFILADOR_MAX_HUELLAS', 500))
+PERFILADOR_LOG_MAX = int(os.getenv('PERFILADOR_LOG_MAX', 100))
+
+_COMENTARIOS = re.compile(r'/\*.*?\*/|--[^\n]*', re.DOTALL)
+_CADENAS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMEROS = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_MARCADORES = re.compile(r'%s|\?')
+_LISTAS = re.compile(r'\b(IN|VALUES)\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_ESPACIOS = re.compile(r'\s+')
+
+@functools.lru_cache(maxsize=2048)
+def huella(sql):
+    """SQL normalizado: sin comentarios, literales como ?, IN (?, ?, ?) como (?+)"""
+    normalizado = _COMENTARIOS.sub(' ', sql)
+    normalizado = _CADENAS.sub('?', normalizado)
+    normalizado = _NUMEROS.sub('?', normalizado)
+    normalizado = _MARCADORES.sub('?', normalizado)
+    normalizado = _LISTAS.sub(r'\1 (?+)', normalizado)
+    return _ESPACIOS.sub(' ', normalizado).strip()
+
+def _sitio_llamada():
+    """'routes/producto_routes.py:123 get_productos' del primer frame fuera de Database/conexion*.py"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if not archivo.endswith(('conexion.py', 'conexion_async.py', 'perfilador.py')):
+            partes = archivo.replace('\\', '/').split('/')
+            return f"{'/'.join(partes[-2:])}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+class PerfiladorConsultas:
+    """Agrega llamadas, tiempo total/máximo y filas devueltas por huella; guarda las lentas"""
+
+    def __init__(self, umbral_ms=SLOW_QUERY_MS, max_huellas=PERFILADOR_MAX_HUELLAS, log_max=PERFILADOR_LOG_MAX):
+        self.umbral_ms = umbral_ms
+        self._max_huellas = max_huellas
+        self._stats = {}
+        self._lentas = deque(maxlen=log_max)
+        self._descartadas = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, sql, duracion, filas_afectadas=None):
+        """Suma una ejecución; devuelve la huella para asociarle luego las filas leídas"""
+        clave = huella(sql)
+        duracion_ms = duracion * 1000
+        with self._lock:
+            stats = self._stats.get(clave)
+            if stats is None:
+                if len(self._stats) >= self._max_huellas:
+                    self._descartadas += 1
+                    clave = None
+                else:
+                    stats = self._stats[clave] = {'llamadas': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'filas': 0}
+            if stats is not None:
+                stats['llamadas'] += 1
+                stats['total_ms'] += duracion_ms
+                if duracion_ms > stats['max_ms']:
+                    stats['max_ms'] = duracion_ms
+
+        if duracion_ms >= self.umbral_ms:
+            sitio = _sitio_llamada()
+            self._lentas.append({
+                'huella': huella(sql),
+                'sql': ' '.join(sql.split())[:1000],
+                'duracion_ms': round(duracion_ms, 3),
+                'filas_afectadas': filas_afectadas,
+                'sitio': sitio,
+                'fecha': time.strftime('%Y-%m-%dT%H:%M:%S')
+            })
+            print(f"🐢 Consulta lenta ({duracion_ms:.1f} ms) en {sitio}: {huella(sql)[:200]}")
+        return clave
+
+    def sumar_filas(self, clave, filas):
+        if clave is None or not filas:
+            return
+        with self._lock:
+            stats = self._stats.get(clave)
+            if stats is not None:
+                stats['filas'] += filas
+
+    def resumen(self, orden='total_ms', limite=50):
+        """Huellas ordenadas de mayor a menor por `orden` (total_ms, max_ms, llamadas, filas)"""
+        with self._lock:
+            filas = [dict(stats, huella=clave) for clave, stats in self._stats.items()]
+            lentas = list(self._lentas)
+            descartadas = self._descartadas
+        for fila in filas:
+            fila['promedio_ms'] = round(fila['total_ms'] / fila['llamadas'], 3)
+            fila['total_ms'] = round(fila['total_ms'], 3)
+            fila['max_ms'] = round(fila['max_ms'], 3)
+        filas.sort(key=lambda fila: fila[orden], reverse=True)
+        return {
+            'umbral_ms': self.umbral_ms,
+            'huellas': len(filas),
+            'huellas_descartadas': descartadas,
+            'consultas': filas[:limite],
+            'lentas': lentas[::-1]
+        }
+
+    def reiniciar(self):
+        with self._lock:
+            self._stats.clear()
+            self._lentas.clear()
+            self._descartadas = 0
+
+ORDENES = ('total_ms', 'max_ms', 'promedio_ms', 'llamadas', 'filas')
+
+perfilador = PerfiladorConsultas()
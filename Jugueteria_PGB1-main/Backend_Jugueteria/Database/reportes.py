@@ -0,0 +1,262 @@
+from collections import defaultdict
+
+# Tablas de resumen mantenidas incrementalmente por Venta.crear
+TABLAS_RESUMEN = [
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_dia (
+        Fecha DATE PRIMARY KEY,
+        Num_Ventas INT NOT NULL DEFAULT 0,
+        Unidades INT NOT NULL DEFAULT 0,
+        Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_producto (
+        Id_Producto INT PRIMARY KEY,
+        Num_Ventas INT NOT NULL DEFAULT 0,
+        Unidades INT NOT NULL DEFAULT 0,
+        Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+        INDEX idx_resumen_producto_ingresos (Ingresos),
+        INDEX idx_resumen_producto_unidades (Unidades)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_linea (
+        Id_Linea INT PRIMARY KEY,
+        Num_Ventas INT NOT NULL DEFAULT 0,
+        Unidades INT NOT NULL DEFAULT 0,
+        Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0
+    )
+    ''',
+    # Por día: el reporte con ?desde=&hasta= filtra productos y líneas por el mismo rango
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_producto_dia (
+        Fecha DATE NOT NULL,
+        Id_Producto INT NOT NULL,
+        Num_Ventas INT NOT NULL DEFAULT 0,
+        Unidades INT NOT NULL DEFAULT 0,
+        Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (Fecha, Id_Producto)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS resumen_ventas_linea_dia (
+        Fecha DATE NOT NULL,
+        Id_Linea INT NOT NULL,
+        Num_Ventas INT NOT NULL DEFAULT 0,
+        Unidades INT NOT NULL DEFAULT 0,
+        Ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (Fecha, Id_Linea)
+    )
+    '''
+]
+
+def crear_tablas(cursor):
+    """Crea las tablas de resumen y la columna Fecha de venta si faltan"""
+    cursor.execute("SHOW COLUMNS FROM venta LIKE 'Fecha'")
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE venta ADD COLUMN Fecha DATETIME DEFAULT CURRENT_TIMESTAMP")
+    for ddl in TABLAS_RESUMEN:
+        cursor.execute(ddl)
+
+def registrar_venta(cursor, items, precios, productos):
+    """Suma una venta a los resúmenes dentro de la transacción de la venta"""
+    # items: [(producto_id, cantidad)]; precios: {producto_id: precio guardado en Detalle_Venta};
+    # productos: {producto_id: fila con Id_Linea}
+    unidades = sum(cantidad for _, cantidad in items)
+    total = sum((precios[pid] or 0) * cantidad for pid, cantidad in items)
+
+    cursor.execute("""
+        INSERT INTO resumen_ventas_dia (Fecha, Num_Ventas, Unidades, Ingresos)
+        VALUES (CURDATE(), 1, %s, %s)
+        ON DUPLICATE KEY UPDATE Num_Ventas = Num_Ventas + 1,
+            Unidades = Unidades + VALUES(Unidades), Ingresos = Ingresos + VALUES(Ingresos)
+    """, (unidades, total))
+
+    por_producto = [(pid, cantidad, (precios[pid] or 0) * cantidad) for pid, cantidad in items]
+    cursor.executemany("""
+        INSERT INTO resumen_ventas_producto (Id_Producto, Num_Ventas, Unidades, Ingresos)
+        VALUES (%s, 1, %s, %s)
+        ON DUPLICATE KEY UPDATE Num_Ventas = Num_Ventas + 1,
+            Unidades = Unidades + VALUES(Unidades), Ingresos = Ingresos + VALUES(Ingresos)
+    """, por_producto)
+    cursor.executemany("""
+        INSERT INTO resumen_ventas_producto_dia (Fecha, Id_Producto, Num_Ventas, Unidades, Ingresos)
+        VALUES (CURDATE(), %s, 1, %s, %s)
+        ON DUPLICATE KEY UPDATE Num_Ventas = Num_Ventas + 1,
+            Unidades = Unidades + VALUES(Unidades), Ingresos = Ingresos + VALUES(Ingresos)
+    """, por_producto)
+
+    por_linea = defaultdict(lambda: [0, 0])
+    for pid, cantidad in items:
+        linea = productos[pid].get('Id_Linea')
+        if linea is not None:
+            por_linea[linea][0] += cantidad
+            por_linea[linea][1] += (precios[pid] or 0) * cantidad
+    if por_linea:
+        filas_linea = [(linea, unidades_linea, ingresos) for linea, (unidades_linea, ingresos) in sorted(por_linea.items())]
+        cursor.executemany("""
+            INSERT INTO resumen_ventas_linea (Id_Linea, Num_Ventas, Unidades, Ingresos)
+            VALUES (%s, 1, %s, %s)
+            ON DUPLICATE KEY UPDATE Num_Ventas = Num_Ventas + 1,
+                Unidades = Unidades + VALUES(Unidades), Ingresos = Ingresos + VALUES(Ingresos)
+        """, filas_linea)
+        cursor.executemany("""
+            INSERT INTO resumen_ventas_linea_dia (Fecha, Id_Linea, Num_Ventas, Unidades, Ingresos)
+            VALUES (CURDATE(), %s, 1, %s, %s)
+            ON DUPLICATE KEY UPDATE Num_Ventas = Num_Ventas + 1,
+                Unidades = Unidades + VALUES(Unidades), Ingresos = Ingresos + VALUES(Ingresos)
+        """, filas_linea)
+
+def reconstruir(db):
+    """Recalcula todos los resúmenes desde el historial (backfill)"""
+    # Ingresos con Detalle_Venta.Precio_Unitario (el precio al vender), igual que registrar_venta
+    with db.cursor() as cursor:
+        crear_tablas(cursor)
+        cursor.execute("DELETE FROM resumen_ventas_dia")
+        cursor.execute("DELETE FROM resumen_ventas_producto")
+        cursor.execute("DELETE FROM resumen_ventas_linea")
+        cursor.execute("DELETE FROM resumen_ventas_producto_dia")
+        cursor.execute("DELETE FROM resumen_ventas_linea_dia")
+        cursor.execute("""
+            INSERT INTO resumen_ventas_dia (Fecha, Num_Ventas, Unidades, Ingresos)
+            SELECT DATE(v.Fecha), COUNT(*), COALESCE(SUM(u.Unidades), 0), COALESCE(SUM(u.Ingresos), 0)
+            FROM venta v
+            LEFT JOIN (
+                SELECT Id_Venta, SUM(Cantidad_Producto) AS Unidades,
+                    SUM(Cantidad_Producto * COALESCE(Precio_Unitario, 0)) AS Ingresos
+                FROM detalle_venta GROUP BY Id_Venta
+            ) u ON u.Id_Venta = v.Id_Venta
+            GROUP BY DATE(v.Fecha)
+        """)
+        cursor.execute("""
+            INSERT INTO resumen_ventas_producto (Id_Producto, Num_Ventas, Unidades, Ingresos)
+            SELECT Id_Producto, COUNT(DISTINCT Id_Venta), SUM(Cantidad_Producto),
+                SUM(Cantidad_Producto * COALESCE(Precio_Unitario, 0))
+            FROM detalle_venta
+            GROUP BY Id_Producto
+        """)
+        cursor.execute("""
+            INSERT INTO resumen_ventas_linea (Id_Linea, Num_Ventas, Unidades, Ingresos)
+            SELECT p.Id_Linea, COUNT(DISTINCT dv.Id_Venta), SUM(dv.Cantidad_Producto),
+                SUM(dv.Cantidad_Producto * COALESCE(dv.Precio_Unitario, 0))
+            FROM detalle_venta dv
+            JOIN producto p ON p.Id_Producto = dv.Id_Producto
+            WHERE p.Id_Linea IS NOT NULL
+            GROUP BY p.Id_Linea
+        """)
+        reconstruir_por_dia(cursor)
+    db.commit()
+
+def reconstruir_por_dia(cursor):
+    """Recalcula resumen_ventas_producto_dia y resumen_ventas_linea_dia desde el historial"""
+    cursor.execute("""
+        INSERT INTO resumen_ventas_producto_dia (Fecha, Id_Producto, Num_Ventas, Unidades, Ingresos)
+        SELECT DATE(v.Fecha), dv.Id_Producto, COUNT(DISTINCT dv.Id_Venta), SUM(dv.Cantidad_Producto),
+            SUM(dv.Cantidad_Producto * COALESCE(dv.Precio_Unitario, 0))
+        FROM detalle_venta dv
+        JOIN venta v ON v.Id_Venta = dv.Id_Venta
+        GROUP BY DATE(v.Fecha), dv.Id_Producto
+    """)
+    cursor.execute("""
+        INSERT INTO resumen_ventas_linea_dia (Fecha, Id_Linea, Num_Ventas, Unidades, Ingresos)
+        SELECT DATE(v.Fecha), p.Id_Linea, COUNT(DISTINCT dv.Id_Venta), SUM(dv.Cantidad_Producto),
+            SUM(dv.Cantidad_Producto * COALESCE(dv.Precio_Unitario, 0))
+        FROM detalle_venta dv
+        JOIN venta v ON v.Id_Venta = dv.Id_Venta
+        JOIN producto p ON p.Id_Producto = dv.Id_Producto
+        WHERE p.Id_Linea IS NOT NULL
+        GROUP BY DATE(v.Fecha), p.Id_Linea
+    """)
+
+def _rango(desde, hasta, columna='Fecha'):
+    """(where, params) del filtro de fechas; where vacío si no hay rango"""
+    condiciones = []
+    params = []
+    if desde:
+        condiciones.append(f"{columna} >= %s")
+        params.append(desde)
+    if hasta:
+        condiciones.append(f"{columna} <= %s")
+        params.append(hasta)
+    return (f"WHERE {' AND '.join(condiciones)}" if condiciones else ''), params
+
+def consulta_top_productos(orden, top, desde=None, hasta=None):
+    """(sql, params) del top de productos por 'Ingresos' o 'Unidades'; sin rango usa los índices de
+    resumen_ventas_producto, con rango suma resumen_ventas_producto_dia en esas fechas"""
+    if orden not in ('Ingresos', 'Unidades'):
+        raise ValueError(f'Orden inválido: {orden}')
+    if not desde and not hasta:
+        return f"""
+            SELECT r.Id_Producto, p.Nombre, r.Num_Ventas, r.Unidades, r.Ingresos
+            FROM resumen_ventas_producto r
+            LEFT JOIN producto p ON p.Id_Producto = r.Id_Producto
+            ORDER BY r.{orden} DESC LIMIT %s
+        """, (top,)
+    where, params = _rango(desde, hasta)
+    return f"""
+        SELECT r.Id_Producto, p.Nombre, r.Num_Ventas, r.Unidades, r.Ingresos
+        FROM (
+            SELECT Id_Producto, SUM(Num_Ventas) AS Num_Ventas, SUM(Unidades) AS Unidades,
+                SUM(Ingresos) AS Ingresos
+            FROM resumen_ventas_producto_dia {where}
+            GROUP BY Id_Producto
+        ) r
+        LEFT JOIN producto p ON p.Id_Producto = r.Id_Producto
+        ORDER BY r.{orden} DESC, r.Id_Producto LIMIT %s
+    """, (*params, top)
+
+def consulta_lineas(desde=None, hasta=None):
+    """(sql, params) de las ventas por línea, del mismo periodo que el resto del reporte"""
+    if not desde and not hasta:
+        return """
+            SELECT r.Id_Linea, lp.Nombre, r.Num_Ventas, r.Unidades, r.Ingresos
+            FROM resumen_ventas_linea r
+            LEFT JOIN linea_producto lp ON lp.Id_Linea = r.Id_Linea
+            ORDER BY r.Ingresos DESC
+        """, ()
+    where, params = _rango(desde, hasta)
+    return f"""
+        SELECT r.Id_Linea, lp.Nombre, r.Num_Ventas, r.Unidades, r.Ingresos
+        FROM (
+            SELECT Id_Linea, SUM(Num_Ventas) AS Num_Ventas, SUM(Unidades) AS Unidades,
+                SUM(Ingresos) AS Ingresos
+            FROM resumen_ventas_linea_dia {where}
+            GROUP BY Id_Linea
+        ) r
+        LEFT JOIN linea_producto lp ON lp.Id_Linea = r.Id_Linea
+        ORDER BY r.Ingresos DESC
+    """, tuple(params)
+
+def resumen_ventas(db, desde=None, hasta=None, top=10):
+    """Lee solo las tablas de resumen: totales por día, top productos (ingresos y unidades) y líneas,
+    todo del mismo periodo (?desde=&hasta=, o todo el historial)"""
+    where, params = _rango(desde, hasta)
+
+    with db.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT Fecha, Num_Ventas, Unidades, Ingresos
+            FROM resumen_ventas_dia {where} ORDER BY Fecha
+        """, params)
+        por_dia = cursor.fetchall()
+
+        cursor.execute(*consulta_top_productos('Ingresos', top, desde, hasta))
+        top_productos = cursor.fetchall()
+
+        # Mismo top por unidades vendidas (sin rango, idx_resumen_producto_unidades)
+        cursor.execute(*consulta_top_productos('Unidades', top, desde, hasta))
+        top_productos_unidades = cursor.fetchall()
+
+        cursor.execute(*consulta_lineas(desde, hasta))
+        por_linea = cursor.fetchall()
+
+    return {
+        'desde': desde,
+        'hasta': hasta,
+        'por_dia': por_dia,
+        'ingresos_totales': sum((fila['Ingresos'] for fila in por_dia), 0),
+        'ventas_totales': sum(fila['Num_Ventas'] for fila in por_dia),
+        'top_productos': top_productos,
+        'top_productos_unidades': top_productos_unidades,
+        'por_linea': por_linea
+    }
@@ -0,0 +1,250 @@
+import functools
+import itertools
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+
+# Motor SQLite con el mismo contrato que pymysql + DictCursor que usan routes/ y Database/:
+# placeholders %s, filas como dict, cursor como context manager, lastrowid/rowcount,
+# commit/rollback/ping. Las consultas se traducen del dialecto MySQL que usa el proyecto.
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(' '))
+
+def _texto(valor):
+    return valor.decode('utf-8') if isinstance(valor, bytes) else str(valor)
+
+def _fecha(valor):
+    return date.fromisoformat(_texto(valor)[:10])
+
+def _fecha_hora(valor):
+    texto = _texto(valor)
+    return datetime.fromisoformat(texto) if len(texto) > 10 else datetime.fromisoformat(texto + ' 00:00:00')
+
+# Con PARSE_DECLTYPES se convierte según la primera palabra del tipo declarado
+sqlite3.register_converter('DECIMAL', lambda valor: Decimal(_texto(valor)))
+sqlite3.register_converter('DATE', _fecha)
+sqlite3.register_converter('DATETIME', _fecha_hora)
+sqlite3.register_converter('TIMESTAMP', _fecha_hora)
+
+_INDICE_EN_LINEA = re.compile(r',\s*(?:UNIQUE\s+)?(?:INDEX|KEY)\s+(\w+)\s*\(([^)]*)\)', re.IGNORECASE)
+_CREATE_TABLE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.IGNORECASE)
+_SHOW_COLUMNS = re.compile(r"^\s*SHOW\s+COLUMNS\s+FROM\s+(\w+)(?:\s+LIKE\s+'([^']*)')?\s*$", re.IGNORECASE)
+_SHOW_TABLES = re.compile(r"^\s*SHOW\s+TABLES(?:\s+LIKE\s+'([^']*)')?\s*$", re.IGNORECASE)
+
+_REEMPLAZOS = [
+    (re.compile(r'\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b', re.IGNORECASE), 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r"\bENUM\s*\([^)]*\)", re.IGNORECASE), 'TEXT'),
+    (re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE), 'INSERT OR IGNORE'),
+    (re.compile(r'\bNOW\(\)', re.IGNORECASE), 'CURRENT_TIMESTAMP'),
+    (re.compile(r'\bCURDATE\(\)', re.IGNORECASE), "DATE('now')"),
+    (re.compile(r'\bCHARACTER\s+SET\s+\w+', re.IGNORECASE), ''),
+]
+
+def _traducir_ddl(sql):
+    """CREATE TABLE con índices en línea -> CREATE TABLE + CREATE INDEX aparte"""
+    tabla = _CREATE_TABLE.search(sql)
+    indices = []
+    if tabla:
+        def extraer(coincidencia):
+            indices.append(
+                f"CREATE INDEX IF NOT EXISTS {coincidencia.group(1)} "
+                f"ON {tabla.group(1)} ({coincidencia.group(2)})"
+            )
+            return ''
+        sql = _INDICE_EN_LINEA.sub(extraer, sql)
+    return [sql] + indices
+
+@functools.lru_cache(maxsize=1024)
+def traducir(sql):
+    """Traduce una sentencia del dialecto MySQL del proyecto; devuelve (sentencias, tipo)"""
+    coincidencia = _SHOW_COLUMNS.match(sql)
+    if coincidencia:
+        tabla, patron = coincidencia.groups()
+        filtro = f" WHERE name LIKE '{patron}'" if patron else ''
+        return (f"SELECT name AS Field, type AS Type FROM pragma_table_info('{tabla}'){filtro}",), 'consulta'
+    coincidencia = _SHOW_TABLES.match(sql)
+    if coincidencia:
+        filtro = f" AND name LIKE '{coincidencia.group(1)}'" if coincidencia.group(1) else ''
+        return (f"SELECT name AS Tables_in_db FROM sqlite_master WHERE type = 'table'{filtro}",), 'consulta'
+    if 'information_schema.STATISTICS' in sql:
+        return (), 'estadisticas'
+
+    explain = re.match(r'^\s*EXPLAIN\s+', sql, re.IGNORECASE)
+    if explain:
+        sql = sql[explain.end():]
+
+    for patron, reemplazo in _REEMPLAZOS:
+        sql = patron.sub(reemplazo, sql)
+
+    if re.search(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', sql, re.IGNORECASE):
+        cabeza, asignaciones = re.split(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', sql, flags=re.IGNORECASE)
+        asignaciones = re.sub(r'\bVALUES\((\w+)\)', r'excluded.\1', asignaciones, flags=re.IGNORECASE)
+        sql = f"{cabeza} ON CONFLICT DO UPDATE SET {asignaciones}"
+
+    # SQLite no admite defaults no constantes en ADD COLUMN
+    if re.match(r'^\s*ALTER\s+TABLE\s+\w+\s+ADD\s+COLUMN', sql, re.IGNORECASE):
+        sql = re.sub(r'\s+DEFAULT\s+CURRENT_TIMESTAMP', '', sql, flags=re.IGNORECASE)
+
+    sql = sql.replace('%s', '?').replace('%%', '%')
+
+    if explain:
+        return (f"EXPLAIN QUERY PLAN {sql}",), 'explain'
+    if re.match(r'^\s*CREATE\s+TABLE', sql, re.IGNORECASE):
+        return tuple(_traducir_ddl(sql)), 'ddl'
+    return (sql,), 'sentencia'
+
+class CursorSQLite:
+    """Cursor con filas dict, compatible con el uso de pymysql.cursors.DictCursor"""
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+        self._cursor = conexion.cursor()
+        self._filas = None
+        self.rowcount = -1
+        self.lastrowid = None
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _como_dicts(self, cursor):
+        nombres = [columna[0] for columna in cursor.description or ()]
+        return (dict(zip(nombres, fila)) for fila in cursor)
+
+    def execute(self, sql, params=None):
+        sentencias, tipo = traducir(sql)
+        params = tuple(params) if params is not None else ()
+        self._filas = None
+
+        if tipo == 'estadisticas':
+            return self._estadisticas(params)
+        if tipo == 'explain':
+            filas = self._cursor.execute(sentencias[0], params).fetchall()
+            self._filas = iter([self._fila_explain(detalle) for *_, detalle in filas])
+            self.description = (('table',), ('type',), ('rows',), ('Extra',))
+            return len(filas)
+
+        for sentencia in sentencias:
+            self._cursor.execute(sentencia, params if sentencia is sentencias[0] else ())
+        self.description = self._cursor.description
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        if self._cursor.description:
+            self._filas = self._como_dicts(self._cursor)
+        return self.rowcount
+
+    def executemany(self, sql, seq_params):
+        sentencias, _ = traducir(sql)
+        self._cursor.executemany(sentencias[0], [tuple(p) for p in seq_params])
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        self._filas = None
+        return self.rowcount
+
+    @staticmethod
+    def _fila_explain(detalle):
+        # SCAN sin índice = recorrido completo (type ALL en MySQL)
+        partes = detalle.split()
+        tabla = partes[1] if len(partes) > 1 else None
+        if detalle.startswith('SCAN') and 'USING' not in detalle:
+            tipo = 'ALL'
+        elif detalle.startswith('SCAN'):
+            tipo = 'index'
+        else:
+            tipo = 'ref'
+        return {'table': tabla, 'type': tipo, 'rows': None, 'Extra': detalle}
+
+    def _estadisticas(self, params):
+        """Equivalente de information_schema.STATISTICS para una tabla"""
+        tabla = params[0]
+        filas = []
+        for indice in self._cursor.execute(f"PRAGMA index_list('{tabla}')").fetchall():
+            nombre = indice[1]
+            for columna in self._cursor.execute(f"PRAGMA index_info('{nombre}')").fetchall():
+                filas.append({'INDEX_NAME': nombre, 'SEQ_IN_INDEX': columna[0] + 1, 'COLUMN_NAME': columna[2]})
+        for columna in self._cursor.execute(f"PRAGMA table_info('{tabla}')").fetchall():
+            if columna[5]:
+                filas.append({'INDEX_NAME': 'PRIMARY', 'SEQ_IN_INDEX': columna[5], 'COLUMN_NAME': columna[1]})
+        filas.sort(key=lambda fila: (fila['INDEX_NAME'], fila['SEQ_IN_INDEX']))
+        self._filas = iter(filas)
+        self.description = (('INDEX_NAME',), ('SEQ_IN_INDEX',), ('COLUMN_NAME',))
+        self.rowcount = len(filas)
+        return self.rowcount
+
+    def fetchone(self):
+        if self._filas is None:
+            return None
+        return next(self._filas, None)
+
+    def fetchall(self):
+        if self._filas is None:
+            return []
+        filas = list(self._filas)
+        self._filas = None
+        return filas
+
+    def fetchmany(self, tamano=1):
+        if self._filas is None:
+            return []
+        return list(itertools.islice(self._filas, tamano))
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._filas = None
+        self._cursor.close()
+
+class ConexionSQLite:
+    """Conexión SQLite con la interfaz de pymysql.Connection que usa el proyecto"""
+
+    def __init__(self, conexion):
+        self._conexion = conexion
+
+    def cursor(self, cursorclass=None):
+        # cursorclass (p. ej. SSDictCursor) se ignora: el cursor ya itera sin cargar todo
+        return CursorSQLite(self._conexion)
+
+    def commit(self):
+        self._conexion.commit()
+
+    def rollback(self):
+        self._conexion.rollback()
+
+    def ping(self, reconnect=False):
+        self._conexion.execute('SELECT 1')
+
+    def close(self):
+        self._conexion.close()
+
+# Las bases :memory: compartidas desaparecen al cerrarse su última conexión
+_anclas = {}
+_anclas_lock = threading.Lock()
+
+def conectar(url):
+    """Abre una conexión para DB_URL sqlite:///ruta.db o sqlite:///:memory:"""
+    ruta = url.split('sqlite:///', 1)[1] if url.startswith('sqlite:///') else ':memory:'
+    if ruta in (':memory:', ''):
+        ruta = 'file:jugueteria_memoria?mode=memory&cache=shared'
+        with _anclas_lock:
+            if ruta not in _anclas:
+                _anclas[ruta] = sqlite3.connect(ruta, uri=True, check_same_thread=False)
+    conexion = sqlite3.connect(
+        ruta,
+        uri=ruta.startswith('file:'),
+        timeout=30,
+        check_same_thread=False,
+        detect_types=sqlite3.PARSE_DECLTYPES
+    )
+    conexion.execute('PRAGMA foreign_keys = ON')
+    if not ruta.startswith('file:'):
+        conexion.execute('PRAGMA journal_mode = WAL')
+        conexion.execute('PRAGMA synchronous = NORMAL')
+    return ConexionSQLite(conexion)
@@ -2,92 +2,195 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 import os
 import sys
+import time
 from dotenv import load_dotenv
 
-# SOLUCIÓN DEFINITIVA - Configurar paths correctamente
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)  # Raíz del proyecto (JUGUETERA_PGB1)
 
-# Agregar todas las rutas necesarias al path
-sys.path.append(project_root)  # Raíz del proyecto
-sys.path.append(current_dir)   # Directorio Backend_Jugueteria
-sys.path.append(os.path.join(project_root, 'Database'))  # Carpeta Database
-sys.path.append(os.path.join(project_root, 'routes'))    # Carpeta routes
+# Backend_Jugueteria debe estar en el path para importar Database/ y routes/
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
 
 load_dotenv()
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'clave_secreta')
+def create_app(config=None):
+    """Fábrica de la aplicación: no abre conexiones ni toca el esquema"""
+    inicio = time.perf_counter()
 
-CORS(app)
+    app = Flask(__name__)
+    # jsonify con encoders explícitos para Decimal, date y datetime (orjson si está instalado)
+    from routes.serializacion import ProveedorJSON
+    app.json = ProveedorJSON(app)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'clave_secreta')
+    app.config['STARTUP_BUDGET_MS'] = float(os.getenv('STARTUP_BUDGET_MS', 200))
+    if config:
+        app.config.update(config)
+
+    # Detrás de nginx u otro proxy: request.remote_addr (límites por IP) toma X-Forwarded-For
+    proxies = int(os.getenv('PROXIES_CONFIABLES', 0))
+    if proxies:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    CORS(app)
+    # 429/503 con Retry-After antes de gastar bcrypt o conexiones (límites por IP/usuario y en curso)
+    from routes.limites import init_app as init_limites
+    init_limites(app)
+    # gzip/brotli según Accept-Encoding para las respuestas de todos los blueprints
+    from routes.compresion import init_app as init_compresion
+    init_compresion(app)
+
+    # Pool de conexiones: se crea en la primera request y cada request devuelve su conexión
+    from Database.conexion import init_app as init_db_app
+    init_db_app(app)
 
-# IMPORTACIONES CORREGIDAS con manejo de errores
-try:
-    print("🔍 Intentando importar blueprints...")
-    
-    # Importar desde routes/
     from routes.auth_routes import auth_bp
-    print("✅ auth_bp importado correctamente")
-    
     from routes.producto_routes import productos_bp
-    print("✅ productos_bp importado correctamente")
-    
     from routes.user_routes import usuarios_bp
-    print("✅ usuarios_bp importado correctamente")
-    
-except ImportError as e:
-    print(f"❌ Error crítico importando blueprints: {e}")
-    print("📁 Directorio actual:", os.path.dirname(__file__))
-    print("📁 Rutas en sys.path:")
-    for path in sys.path:
-        print(f"   - {path}")
-    raise
-
-# Registrar blueprints con prefijos correctos
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(productos_bp, url_prefix='/api')
-app.register_blueprint(usuarios_bp, url_prefix='/api')
-
-@app.route('/')
-def home():
-    return jsonify({
-        'success': True,
-        'message': '🚀 Backend Jugueteria funcionando!',
-        'database': 'Jugueteria',
-        'endpoints': {
-            'auth': '/api/auth/*',
-            'productos': '/api/productos/*',
-            'usuarios': '/api/usuarios/*'
+    from routes.venta_routes import ventas_bp
+    from routes.reserva_routes import reservas_bp
+    from routes.pedido_routes import pedidos_bp
+    from routes.reporte_routes import reportes_bp
+    from routes.metricas_routes import metricas_bp
+
+    # Registrar blueprints con prefijos correctos
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(productos_bp, url_prefix='/api')
+    app.register_blueprint(usuarios_bp, url_prefix='/api')
+    app.register_blueprint(ventas_bp, url_prefix='/api')
+    app.register_blueprint(reservas_bp, url_prefix='/api')
+    app.register_blueprint(pedidos_bp, url_prefix='/api')
+    app.register_blueprint(reportes_bp, url_prefix='/api')
+    # Latencia, códigos de estado y requests en curso de todos los endpoints; GET /api/metrics
+    app.register_blueprint(metricas_bp, url_prefix='/api')
+
+    @app.route('/')
+    def home():
+        return jsonify({
+            'success': True,
+            'message': '🚀 Backend Jugueteria funcionando!',
+            'database': 'Jugueteria',
+            'endpoints': {
+                'auth': '/api/auth/*',
+                'productos': '/api/productos/*',
+                'usuarios': '/api/usuarios/*',
+                'ventas': '/api/ventas',
+                'reservas': '/api/reservas/*',
+                'pedidos': '/api/pedidos/*',
+                'reportes': '/api/reportes/*',
+                'metricas': '/api/metrics'
+            }
+        })
+
+    @app.route('/api/health')
+    def health():
+        return jsonify({
+            'success': True,
+            'message': '✅ Servidor y base de datos activos',
+            'status': 'running'
+        })
+
+    @app.route('/api/debug/paths')
+    def debug_paths():
+        """Endpoint para debuguear las rutas"""
+        paths_info = {
+            'current_directory': current_dir,
+            'project_root': project_root,
+            'python_paths': sys.path,
+            'files_in_routes': os.listdir(os.path.join(current_dir, 'routes')),
+            'files_in_database': os.listdir(os.path.join(current_dir, 'Database')),
+            'startup_ms': app.config['STARTUP_MS']
         }
-    })
-
-@app.route('/api/health')
-def health():
-    return jsonify({
-        'success': True,
-        'message': '✅ Servidor y base de datos activos',
-        'status': 'running'
-    })
-
-@app.route('/api/debug/paths')
-def debug_paths():
-    """Endpoint para debuguear las rutas"""
-    paths_info = {
-        'current_directory': os.path.dirname(__file__),
-        'project_root': project_root,
-        'python_paths': sys.path,
-        'files_in_routes': os.listdir(os.path.join(project_root, 'routes')) if os.path.exists(os.path.join(project_root, 'routes')) else 'NO EXISTE',
-        'files_in_database': os.listdir(os.path.join(project_root, 'Database')) if os.path.exists(os.path.join(project_root, 'Database')) else 'NO EXISTE'
-    }
-    return jsonify(paths_info)
+        return jsonify(paths_info)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Aplica las migraciones pendientes (ejecutar una vez por despliegue)"""
+        from Database.conexion import init_db
+        if not init_db():
+            raise SystemExit(1)
+
+    @app.cli.command('check-queries')
+    def check_queries_command():
+        """Falla si alguna consulta crítica hace un full scan (EXPLAIN)"""
+        from Database.conexion import get_db_connection
+        from Database.migraciones import verificar_consultas
+        db = get_db_connection()
+        if not db:
+            raise SystemExit(1)
+        try:
+            fallas = verificar_consultas(db)
+        finally:
+            db.close()
+        for falla in fallas:
+            print(f"❌ {falla['consulta']}: full scan en {falla['tabla']} (~{falla['filas_estimadas']} filas)")
+        if fallas:
+            raise SystemExit(1)
+        print("✅ Ninguna consulta crítica recorre tablas completas")
+
+    @app.cli.command('rebuild-reportes')
+    def rebuild_reportes_command():
+        """Recalcula las tablas de resumen de ventas desde el historial"""
+        from Database.conexion import get_db_connection
+        from Database.reportes import reconstruir
+        db = get_db_connection()
+        if not db:
+            raise SystemExit(1)
+        try:
+            reconstruir(db)
+            print("✅ Resúmenes de ventas reconstruidos")
+        finally:
+            db.close()
+
+    @app.cli.command('sweep-reservas')
+    def sweep_reservas_command():
+        """Expira las reservas vencidas y devuelve sus unidades al stock"""
+        from routes.reserva_routes import barrer_reservas
+        print(f"✅ {barrer_reservas()} reservas expiradas")
+
+    @app.cli.command('drain-pedidos')
+    def drain_pedidos_command():
+        """Aplica en MySQL todos los pedidos pendientes de la cola local"""
+        from routes.pedido_routes import drenar_pedidos
+        total = 0
+        while True:
+            tomados = drenar_pedidos()
+            total += tomados
+            if not tomados:
+                break
+        print(f"✅ {total} pedidos aplicados")
+
+    app.config['STARTUP_MS'] = (time.perf_counter() - inicio) * 1000
+    if app.config['STARTUP_MS'] > app.config['STARTUP_BUDGET_MS']:
+        print(f"⚠️ create_app tardó {app.config['STARTUP_MS']:.1f} ms "
+              f"(presupuesto {app.config['STARTUP_BUDGET_MS']:.0f} ms)")
+
+    return app
+
+app = create_app()
+
+def servir():
+    """Producción: gunicorn pre-fork con gunicorn.conf.py (workers, hilos, max-requests, keep-alive)"""
+    try:
+        from gunicorn.app.wsgiapp import WSGIApplication
+    except ImportError:
+        # gunicorn no corre en Windows: servidor de Werkzeug con hilos, sin debug
+        print("⚠️ gunicorn no disponible: usando el servidor de Werkzeug (un solo proceso)")
+        app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5000)), debug=False, threaded=True)
+        return
+    sys.argv = [sys.argv[0], '--config', os.path.join(current_dir, 'gunicorn.conf.py'), '--chdir', current_dir, 'app:app']
+    WSGIApplication('%(prog)s [OPTIONS] [APP_MODULE]').run()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('DEBUG', 'True').lower() == 'true'
-    
-    print(f"🚀 Servidor Flask iniciando en http://localhost:{port}")
-    print(f"📁 Directorio actual: {current_dir}")
-    print(f"📁 Raíz del proyecto: {project_root}")
-    print("🔧 Debug mode:", debug)
-    
-    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+    debug = os.getenv('DEBUG', 'False').lower() == 'true'
+
+    print(f"⏱️ Arranque de la aplicación: {app.config['STARTUP_MS']:.1f} ms")
+    if not debug:
+        servir()
+    else:
+        print(f"🚀 Servidor Flask (desarrollo) iniciando en http://localhost:{port}")
+        print(f"📁 Directorio actual: {current_dir}")
+        print("🔧 Debug mode:", debug)
+        app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,246 @@
+import asyncio
+import os
+import re
+import sys
+import time
+from urllib.parse import parse_qsl
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from asgiref.wsgi import WsgiToAsgi
+from app import app as flask_app
+from Database import metricas
+from Database.conexion_async import crear_pool_async
+from routes.auth_routes import verificar_token
+from routes.compresion import CuerpoComprimido
+from routes.limites import admision, admitir, controlado
+from routes.producto_routes import (
+    CONSULTAS_REFERENCIA, cache_referencia, cache_respuestas, clave_pagina,
+    consulta_pagina_productos, consulta_producto, consultas_lote, cuerpo_lote, ids_lote,
+    pagina_productos
+)
+
+# Modo ASGI: los GET de lectura del catálogo se atienden con handlers async sobre un
+# pool aiomysql propio; todo lo demás (escrituras, auth, búsqueda, exportaciones,
+# /api/metrics) pasa a la misma app Flask a través de WsgiToAsgi.
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000
+# Las URLs, los códigos y el JSON son los mismos que los de routes/producto_routes.py.
+
+_pool = None
+_pool_lock = asyncio.Lock()
+_cargas_referencia = {}
+
+async def _get_pool():
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                try:
+                    _pool = await crear_pool_async()
+                except Exception as e:
+                    print(f"❌ Error de conexión a MySQL: {e}")
+                    raise ConnectionError('Error de conexión a BD')
+    return _pool
+
+def _cuerpo(cuerpo):
+    # El mismo proveedor JSON que jsonify (routes/serializacion.py): mismas claves, orden y formatos
+    return CuerpoComprimido(flask_app.json.response(cuerpo).get_data())
+
+def _respuesta(cuerpo, status=200):
+    return _cuerpo(cuerpo), status
+
+def _error(mensaje, status=500):
+    return _respuesta({'success': False, 'message': mensaje}, status)
+
+async def _referencia(nombre):
+    """Tabla de referencia desde el cache compartido con Flask; una sola carga concurrente"""
+    valor = cache_referencia.get(nombre)
+    if valor is None:
+        lock = _cargas_referencia.setdefault(nombre, asyncio.Lock())
+        async with lock:
+            valor = cache_referencia.get(nombre)
+            if valor is None:
+                pool = await _get_pool()
+                valor = await pool.consultar(CONSULTAS_REFERENCIA[nombre])
+                cache_referencia.set(nombre, valor)
+    return valor
+
+async def get_productos(args, pares):
+    """Async de GET /api/productos (las exportaciones ?format= siguen en Flask)"""
+    if 'ids' in args:
+        return await get_productos_lote(args)
+    try:
+        try:
+            sql, params, limite = consulta_pagina_productos(args)
+        except ValueError as e:
+            return _error(f'Parámetros inválidos: {str(e)}', 400)
+        # Mismo cache de respuestas (y variantes comprimidas) que la ruta de Flask
+        clave = clave_pagina(pares)
+        cuerpo = cache_respuestas.get(clave)
+        if cuerpo is None:
+            pool = await _get_pool()
+            cuerpo = _cuerpo(pagina_productos(await pool.consultar(sql, params), limite))
+            cache_respuestas.set(clave, cuerpo)
+        return cuerpo, 200
+    except ConnectionError as e:
+        return _error(str(e))
+    except Exception as e:
+        return _error(f'Error al obtener productos: {str(e)}')
+
+async def get_producto(args, pares, id):
+    """Async de GET /api/productos/<id>"""
+    try:
+        try:
+            sql, params = consulta_producto(args, id)
+        except ValueError as e:
+            return _error(f'Parámetros inválidos: {str(e)}', 400)
+        pool = await _get_pool()
+        filas = await pool.consultar(sql, params)
+        if filas:
+            return _respuesta({'success': True, 'producto': filas[0]})
+        return _error('Producto no encontrado', 404)
+    except ConnectionError as e:
+        return _error(str(e))
+    except Exception as e:
+        return _error(f'Error: {str(e)}')
+
+async def get_productos_lote(args):
+    """Async de GET /api/productos?ids=1,2,3"""
+    try:
+        try:
+            ids = ids_lote(args['ids'].split(','))
+            consultas = consultas_lote(args, ids)
+        except ValueError as e:
+            return _error(f'Parámetros inválidos: {str(e)}', 400)
+        pool = await _get_pool()
+        filas = []
+        for sql, params in consultas:
+            filas.extend(await pool.consultar(sql, params))
+        return _respuesta(cuerpo_lote(ids, filas))
+    except ConnectionError as e:
+        return _error(str(e))
+    except Exception as e:
+        return _error(f'Error al obtener productos: {str(e)}')
+
+def _listado_referencia(nombre, clave, descripcion):
+    async def handler(args, pares):
+        try:
+            if nombre == 'lineas':
+                # /api/lineas-producto comparte con Flask la respuesta ya comprimida
+                cuerpo = cache_respuestas.get(('lineas',))
+                if cuerpo is None:
+                    filas = await _referencia(nombre)
+                    cuerpo = _cuerpo({'success': True, clave: filas, 'total': len(filas)})
+                    cache_respuestas.set(('lineas',), cuerpo, ttl=cache_referencia.ttl)
+                return cuerpo, 200
+            filas = await _referencia(nombre)
+            return _respuesta({'success': True, clave: filas, 'total': len(filas)})
+        except ConnectionError as e:
+            return _error(str(e))
+        except Exception as e:
+            return _error(f'Error al obtener {descripcion}: {str(e)}')
+    return handler
+
+# (regex de la ruta, endpoint de Flask para las métricas, handler)
+RUTAS_ASYNC = [
+    (re.compile(r'^/api/productos$'), 'productos.get_productos', get_productos),
+    (re.compile(r'^/api/productos/(\d+)$'), 'productos.get_producto', get_producto),
+    (re.compile(r'^/api/lineas-producto$'), 'productos.get_lineas', _listado_referencia('lineas', 'lineas', 'líneas')),
+    (re.compile(r'^/api/municipios$'), 'productos.get_municipios',
+     _listado_referencia('municipios', 'municipios', 'municipios')),
+    (re.compile(r'^/api/departamentos$'), 'productos.get_departamentos',
+     _listado_referencia('departamentos', 'departamentos', 'departamentos')),
+]
+
+def _ruta_async(scope):
+    if scope['method'] != 'GET':
+        return None
+    pares = parse_qsl(scope.get('query_string', b'').decode('utf-8', 'replace'), keep_blank_values=True)
+    # Primer valor de cada clave, como request.args.get en Flask (comparten la clave de cache)
+    args = {}
+    for clave, valor in pares:
+        args.setdefault(clave, valor)
+    if scope['path'] == '/api/productos' and args.get('format'):
+        return None
+    for patron, endpoint, handler in RUTAS_ASYNC:
+        coincidencia = patron.match(scope['path'])
+        if coincidencia:
+            return endpoint, handler, [args, pares] + [int(g) for g in coincidencia.groups()]
+    return None
+
+def _usuario_id(encabezados_request):
+    def usuario_id():
+        token = encabezados_request.get(b'authorization', b'').decode('latin-1').replace('Bearer ', '')
+        usuario = verificar_token(token)
+        return usuario.get('id') if usuario else None
+    return usuario_id
+
+async def _atender(scope, receive, send, ruta):
+    endpoint, handler, parametros = ruta
+    inicio = time.perf_counter()
+    metricas.http_en_curso.sumar(endpoint)
+    status = 500
+    encabezados_request = dict(scope.get('headers', ()))
+    # Mismos límites por IP/usuario y tope de requests en curso que en Flask (routes/limites.py)
+    rechazo = admitir(endpoint, (scope.get('client') or ('',))[0], _usuario_id(encabezados_request))
+    try:
+        if rechazo:
+            status, cuerpo, retry_after = rechazo
+            await send({'type': 'http.response.start', 'status': status, 'headers': [
+                (b'content-type', b'application/json'),
+                (b'retry-after', retry_after.encode('latin-1'))
+            ]})
+            await send({'type': 'http.response.body', 'body': _cuerpo(cuerpo).identidad})
+            return
+        respuesta, status = await handler(*parametros)
+        cuerpo, codificacion = respuesta.para(encabezados_request.get(b'accept-encoding', b'').decode('latin-1'))
+        encabezados = [
+            (b'content-type', respuesta.mimetype.encode('latin-1')),
+            (b'content-length', str(len(cuerpo)).encode('latin-1')),
+            (b'vary', b'Accept-Encoding')
+        ]
+        if codificacion:
+            encabezados.append((b'content-encoding', codificacion.encode('latin-1')))
+        # Igual que Flask-CORS con CORS(app): origen * cuando el navegador envía Origin
+        if b'origin' in encabezados_request:
+            encabezados.append((b'access-control-allow-origin', b'*'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': encabezados})
+        await send({'type': 'http.response.body', 'body': cuerpo})
+    finally:
+        if not rechazo and controlado(endpoint):
+            admision.liberar()
+        metricas.http_duracion.observar(time.perf_counter() - inicio, endpoint, 'GET')
+        metricas.http_requests.incrementar(endpoint, 'GET', str(status))
+        metricas.http_en_curso.restar(endpoint)
+
+_flask_asgi = WsgiToAsgi(flask_app)
+
+async def app(scope, receive, send):
+    """Aplicación ASGI: catálogo async y el resto de la API vía Flask"""
+    global _pool
+    if scope['type'] == 'lifespan':
+        while True:
+            mensaje = await receive()
+            if mensaje['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensaje['type'] == 'lifespan.shutdown':
+                if _pool is not None:
+                    await _pool.cerrar()
+                    _pool = None
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] == 'http':
+        ruta = _ruta_async(scope)
+        if ruta:
+            return await _atender(scope, receive, send, ruta)
+    return await _flask_asgi(scope, receive, send)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('PORT', 5000))
+    print(f"🚀 Servidor ASGI iniciando en http://localhost:{port}")
+    uvicorn.run('asgi:app', host='0.0.0.0', port=port, workers=int(os.getenv('ASGI_WORKERS', 1)))
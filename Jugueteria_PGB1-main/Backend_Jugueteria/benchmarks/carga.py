@@ -0,0 +1,360 @@
+"""Benchmark de carga de los endpoints del backend.
+
+Siembra una base de datos de pruebas, levanta la app en un servidor local (o usa --url),
+ejecuta cada endpoint a niveles fijos de concurrencia y guarda req/s y p50/p95/p99 en JSON.
+Con --baseline compara contra una corrida anterior y termina con código 1 si hay regresiones.
+
+    python benchmarks/carga.py --baseline benchmarks/baseline.json
+    python benchmarks/carga.py --guardar-baseline benchmarks/baseline.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+PASSWORD_BENCH = 'bench_password'
+
+LINEAS = ['Juguetes Educativos', 'Juguetes Electrónicos', 'Muñecos y Figuras', 'Juegos de Mesa', 'Vehículos']
+PALABRAS = ['Lego', 'Robot', 'Muñeca', 'Ajedrez', 'Carro', 'Tren', 'Avión', 'Pelota', 'Peluche',
+            'Dinosaurio', 'Cocina', 'Pista', 'Bloques', 'Rompecabezas', 'Barbie', 'Bomberos']
+
+def sembrar(db, productos, usuarios):
+    """Crea el esquema y datos sintéticos si la base de pruebas aún no los tiene"""
+    import bcrypt
+    from Database.migraciones import migrar
+
+    migrar(db)
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n FROM linea_producto")
+        if cursor.fetchone()['n'] == 0:
+            cursor.executemany(
+                "INSERT INTO linea_producto (Nombre, Descripcion) VALUES (%s, %s)",
+                [(nombre, f'Línea {nombre}') for nombre in LINEAS]
+            )
+            cursor.executemany("INSERT INTO municipio (Nombre) VALUES (%s)",
+                               [(m,) for m in ['Bogota', 'Medellín', 'Cali', 'Barranquilla', 'Cartagena']])
+            cursor.executemany(
+                "INSERT INTO departamento (Nombre, Descripcion, Id_Municipio) VALUES (%s, %s, %s)",
+                [(d, 'Departamento', i) for i, d in enumerate(
+                    ['Cundinamarca', 'Antioquia', 'Valle del Cauca', 'Atlántico', 'Bolívar'], start=1)]
+            )
+
+        cursor.execute("SELECT COUNT(*) AS n FROM producto")
+        existentes = cursor.fetchone()['n']
+        filas = []
+        for i in range(existentes, productos):
+            nombre = f'{PALABRAS[i % len(PALABRAS)]} {PALABRAS[(i * 7) % len(PALABRAS)]} {i}'
+            filas.append((nombre, f'Juguete de prueba {nombre}', '2030-01-01', 1_000_000,
+                          10000 + (i % 500) * 100, i % len(LINEAS) + 1))
+            if len(filas) >= 1000:
+                cursor.executemany("""
+                    INSERT INTO producto (Nombre, Descripcion, Fecha_Vencimiento, Cantidad, Valor_Unitario, Id_Linea)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, filas)
+                filas = []
+        if filas:
+            cursor.executemany("""
+                INSERT INTO producto (Nombre, Descripcion, Fecha_Vencimiento, Cantidad, Valor_Unitario, Id_Linea)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, filas)
+
+        hash_bench = bcrypt.hashpw(
+            PASSWORD_BENCH.encode('utf-8'),
+            bcrypt.gensalt(rounds=int(os.getenv('BCRYPT_ROUNDS', 12)))
+        ).decode('utf-8')
+        cursor.execute("SELECT COUNT(*) AS n FROM usuarios WHERE username LIKE %s", ('bench\\_%',))
+        existentes = cursor.fetchone()['n']
+        cursor.executemany("""
+            INSERT IGNORE INTO usuarios (username, email, password, nombre, apellido, rol)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [
+            (f'bench_{i}', f'bench_{i}@jugueteria.test', hash_bench, 'Bench', str(i),
+             'admin' if i == 0 else 'cliente')
+            for i in range(existentes, max(usuarios, 2))
+        ])
+    db.commit()
+
+class Cliente:
+    """Conexión HTTP keep-alive por hilo"""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self._host = partes.hostname
+        self._puerto = partes.port or 80
+        self._local = threading.local()
+
+    def _conexion(self):
+        if getattr(self._local, 'conn', None) is None:
+            self._local.conn = http.client.HTTPConnection(self._host, self._puerto, timeout=30)
+        return self._local.conn
+
+    def pedir(self, metodo, ruta, cuerpo=None, token=None):
+        headers = {'Connection': 'keep-alive'}
+        datos = None
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        for intento in range(2):
+            conn = self._conexion()
+            try:
+                conn.request(metodo, ruta, body=datos, headers=headers)
+                respuesta = conn.getresponse()
+                contenido = respuesta.read()
+                return respuesta.status, contenido
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if intento:
+                    raise
+
+def escenarios(cliente, productos):
+    """(nombre, función(i) -> (método, ruta, cuerpo, token)) para cada endpoint"""
+    _, cuerpo = cliente.pedir('POST', '/api/auth/login', {'username': 'bench_0', 'password': PASSWORD_BENCH})
+    admin = json.loads(cuerpo)['token']
+    _, cuerpo = cliente.pedir('POST', '/api/auth/login', {'username': 'bench_1', 'password': PASSWORD_BENCH})
+    usuario = json.loads(cuerpo)['token']
+    _, cuerpo = cliente.pedir('GET', '/api/productos?limit=50')
+    cursor = json.loads(cuerpo).get('next_cursor') or ''
+    sufijo = f'{int(time.time())}_{os.getpid()}'
+
+    def producto(i):
+        return i % productos + 1
+
+    return [
+        ('POST /api/auth/login', lambda i: ('POST', '/api/auth/login',
+                                            {'username': 'bench_1', 'password': PASSWORD_BENCH}, None)),
+        ('POST /api/auth/register', lambda i: ('POST', '/api/auth/register', {
+            'username': f'reg_{sufijo}_{i}', 'email': f'reg_{sufijo}_{i}@jugueteria.test',
+            'password': PASSWORD_BENCH}, None)),
+        ('POST /api/auth/verify', lambda i: ('POST', '/api/auth/verify', {'token': usuario}, None)),
+        ('GET /api/productos', lambda i: ('GET', '/api/productos?limit=50', None, None)),
+        ('GET /api/productos?cursor', lambda i: ('GET', f'/api/productos?limit=50&cursor={cursor}', None, None)),
+        ('GET /api/productos?linea', lambda i: ('GET', f'/api/productos?limit=50&linea={i % 5 + 1}', None, None)),
+        ('GET /api/productos/<id>', lambda i: ('GET', f'/api/productos/{producto(i)}', None, None)),
+        ('GET /api/productos/search', lambda i: ('GET', f'/api/productos/search?q={quote(PALABRAS[i % len(PALABRAS)][:3])}', None, None)),
+        ('POST /api/productos', lambda i: ('POST', '/api/productos', {
+            'nombre': f'Bench {sufijo} {i}', 'precio': 1000, 'stock': 1}, admin)),
+        ('PUT /api/productos/<id>', lambda i: ('PUT', f'/api/productos/{producto(i)}', {
+            'nombre': f'Bench {i}', 'precio': 1000, 'stock': 1_000_000}, admin)),
+        ('GET /api/lineas-producto', lambda i: ('GET', '/api/lineas-producto', None, None)),
+        ('GET /api/municipios', lambda i: ('GET', '/api/municipios', None, None)),
+        ('GET /api/departamentos', lambda i: ('GET', '/api/departamentos', None, None)),
+        ('GET /api/referencia', lambda i: ('GET', '/api/referencia', None, None)),
+        ('GET /api/usuarios/perfil', lambda i: ('GET', '/api/usuarios/perfil', None, usuario)),
+        ('PUT /api/usuarios/perfil', lambda i: ('PUT', '/api/usuarios/perfil', {
+            'email': 'bench_1@jugueteria.test', 'nombre': 'Bench', 'apellido': str(i)}, usuario)),
+        ('GET /api/usuarios', lambda i: ('GET', '/api/usuarios', None, admin)),
+        ('GET /api/usuarios/<id>', lambda i: ('GET', '/api/usuarios/1', None, admin)),
+        ('POST /api/ventas', lambda i: ('POST', '/api/ventas', {'detalles': [
+            {'producto_id': producto(i), 'cantidad': 1}, {'producto_id': producto(i + 1), 'cantidad': 2}]}, usuario)),
+        # Todas las reservas contra el mismo producto: contención sobre una sola fila
+        ('POST /api/reservas (SKU caliente)', lambda i: ('POST', '/api/reservas', {'detalles': [
+            {'producto_id': 1, 'cantidad': 1}]}, usuario)),
+        ('GET /api/reportes/ventas', lambda i: ('GET', '/api/reportes/ventas', None, admin)),
+    ]
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+def medir(cliente, generar, concurrencia, peticiones, calentamiento=10):
+    for i in range(calentamiento):
+        cliente.pedir(*generar(-1 - i))
+
+    latencias = []
+    errores = 0
+    contador = iter(range(peticiones))
+    lock = threading.Lock()
+
+    def trabajador():
+        nonlocal errores
+        propias = []
+        fallidas = 0
+        while True:
+            with lock:
+                i = next(contador, None)
+            if i is None:
+                break
+            inicio = time.perf_counter()
+            try:
+                estado, _ = cliente.pedir(*generar(i))
+                if estado >= 500:
+                    fallidas += 1
+            except Exception:
+                fallidas += 1
+            propias.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(propias)
+            errores += fallidas
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        for _ in range(concurrencia):
+            executor.submit(trabajador)
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'peticiones': len(latencias),
+        'errores': errores,
+        'req_s': round(len(latencias) / duracion, 1) if duracion else 0.0,
+        'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 2)
+    }
+
+def comparar(actual, baseline, tolerancia):
+    """Lista de regresiones: p95 peor o req/s menor que la baseline más la tolerancia"""
+    regresiones = []
+    for endpoint, niveles in actual['resultados'].items():
+        for nivel, medida in niveles.items():
+            base = baseline.get('resultados', {}).get(endpoint, {}).get(nivel)
+            if not base:
+                continue
+            if base['p95_ms'] and medida['p95_ms'] > base['p95_ms'] * (1 + tolerancia):
+                regresiones.append(f"{endpoint} c={nivel}: p95 {base['p95_ms']} -> {medida['p95_ms']} ms")
+            if base['req_s'] and medida['req_s'] < base['req_s'] * (1 - tolerancia):
+                regresiones.append(f"{endpoint} c={nivel}: req/s {base['req_s']} -> {medida['req_s']}")
+            if medida['errores'] > base.get('errores', 0):
+                regresiones.append(f"{endpoint} c={nivel}: errores {base.get('errores', 0)} -> {medida['errores']}")
+    return regresiones
+
+def iniciar_servidor():
+    """Levanta la app en un servidor WSGI con hilos en un puerto libre"""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    # Todas las requests salen de 127.0.0.1: sin esto los límites por IP medirían los 429
+    os.environ.setdefault('LIMITES_ACTIVOS', 'false')
+    from app import create_app
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    servidor = make_server('127.0.0.1', 0, create_app(), threaded=True, request_handler=Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_port}'
+
+def preparar_base(nombre_bd, productos, usuarios, db_url=None):
+    """Crea la base de pruebas y la siembra; la app la usará vía DB_NAME o DB_URL"""
+    from dotenv import load_dotenv
+
+    load_dotenv(os.path.join(backend_dir, '.env'))
+    if db_url:
+        os.environ['DB_URL'] = db_url
+    else:
+        os.environ['DB_NAME'] = nombre_bd
+    from Database.conexion import get_db_connection, motor
+    if motor() == 'mysql' and not db_url:
+        crear_base_mysql(nombre_bd)
+
+    db = get_db_connection()
+    if not db:
+        raise SystemExit(f'No se pudo conectar a {db_url or nombre_bd}')
+    try:
+        sembrar(db, productos, usuarios)
+    finally:
+        db.close()
+
+def crear_base_mysql(nombre_bd):
+    """CREATE DATABASE de pruebas en el servidor MySQL de .env"""
+    import pymysql
+
+    conn = pymysql.connect(
+        host=os.getenv('DB_HOST', '127.0.0.1'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', ''),
+        port=int(os.getenv('DB_PORT', 3306)),
+        charset='utf8mb4'
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{nombre_bd}` CHARACTER SET utf8mb4")
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga del backend Jugueteria')
+    parser.add_argument('--url', help='Servidor ya levantado (omite la siembra y el servidor local)')
+    parser.add_argument('--db-name', default='Jugueteria_bench', help='Base de datos de pruebas a sembrar')
+    parser.add_argument('--db-url', help='Motor alterno, p. ej. sqlite:///bench.db o sqlite:///:memory:')
+    parser.add_argument('--productos', type=int, default=10000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--concurrencia', default='1,8,32', help='Niveles separados por coma')
+    parser.add_argument('--peticiones', type=int, default=300, help='Peticiones por endpoint y nivel')
+    parser.add_argument('--solo', help='Solo endpoints que contengan este texto')
+    parser.add_argument('--salida', default='bench_resultados.json')
+    parser.add_argument('--baseline', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--guardar-baseline', help='Guardar también esta corrida como baseline')
+    parser.add_argument('--tolerancia', type=float, default=0.15, help='Margen antes de marcar regresión')
+    args = parser.parse_args()
+
+    servidor = None
+    if args.url:
+        url = args.url
+    else:
+        preparar_base(args.db_name, args.productos, args.usuarios, args.db_url)
+        servidor, url = iniciar_servidor()
+
+    cliente = Cliente(url)
+    niveles = [int(n) for n in args.concurrencia.split(',')]
+    resultado = {
+        'meta': {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'productos': args.productos,
+            'peticiones': args.peticiones,
+            'concurrencia': niveles
+        },
+        'resultados': {}
+    }
+
+    try:
+        for nombre, generar in escenarios(cliente, args.productos):
+            if args.solo and args.solo not in nombre:
+                continue
+            resultado['resultados'][nombre] = {}
+            for nivel in niveles:
+                medida = medir(cliente, generar, nivel, args.peticiones)
+                resultado['resultados'][nombre][str(nivel)] = medida
+                print(f"{nombre:32s} c={nivel:<3d} {medida['req_s']:>8.1f} req/s  "
+                      f"p50 {medida['p50_ms']:>7.2f}  p95 {medida['p95_ms']:>7.2f}  "
+                      f"p99 {medida['p99_ms']:>7.2f} ms  errores {medida['errores']}")
+    finally:
+        if servidor:
+            servidor.shutdown()
+
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+    print(f"📄 Resultados guardados en {args.salida}")
+    if args.guardar_baseline:
+        with open(args.guardar_baseline, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"📄 Baseline guardada en {args.guardar_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as archivo:
+            regresiones = comparar(resultado, json.load(archivo), args.tolerancia)
+        if regresiones:
+            print("❌ Regresiones frente a la baseline:")
+            for regresion in regresiones:
+                print(f"   - {regresion}")
+            sys.exit(1)
+        print("✅ Sin regresiones frente a la baseline")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark de serialización JSON de las respuestas más pesadas.
+
+Arma en memoria el cuerpo de GET /api/productos (catálogo completo) y de GET /api/usuarios
+con los mismos tipos que devuelve PyMySQL (Decimal, date, datetime) y mide cuánto tarda cada
+proveedor en producir la respuesta: el de Flask por defecto y routes/serializacion.py con
+orjson y con json de la biblioteca estándar. No necesita base de datos.
+
+    python benchmarks/serializacion.py --productos 10000 --usuarios 1000
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from benchmarks.carga import LINEAS, PALABRAS
+
+def filas_productos(cantidad):
+    filas = []
+    for i in range(cantidad):
+        nombre = f'{PALABRAS[i % len(PALABRAS)]} {PALABRAS[(i * 7) % len(PALABRAS)]} {i}'
+        filas.append({
+            'Id_Producto': i + 1,
+            'Nombre': nombre,
+            'Descripcion': f'Juguete de prueba {nombre}',
+            'Fecha_Vencimiento': date(2030, 1, 1) + timedelta(days=i % 365),
+            'Cantidad': 1000 + i % 50,
+            'Valor_Unitario': Decimal(10000 + (i % 500) * 100) / 100,
+            'Id_Linea': i % len(LINEAS) + 1,
+            'linea_nombre': LINEAS[i % len(LINEAS)]
+        })
+    return filas
+
+def filas_usuarios(cantidad):
+    inicio = datetime(2024, 1, 1, 8, 0, 0)
+    return [{
+        'id': i + 1,
+        'username': f'bench_{i}',
+        'email': f'bench_{i}@jugueteria.test',
+        'nombre': 'Bench',
+        'apellido': str(i),
+        'telefono': None,
+        'direccion': 'Calle 1 # 2-3',
+        'rol': 'admin' if i == 0 else 'cliente',
+        'fecha_creacion': inicio + timedelta(minutes=i)
+    } for i in range(cantidad)]
+
+def proveedores():
+    """(nombre, app) por cada proveedor disponible"""
+    from flask import Flask
+    from routes.serializacion import ProveedorJSON, a_json_bytes_stdlib
+
+    class ProveedorStdlib(ProveedorJSON):
+        serializar = staticmethod(a_json_bytes_stdlib)
+
+    apps = [('flask_default', Flask('bench_default'))]
+    if ProveedorJSON.motor != 'json':
+        app = Flask('bench_rapido')
+        app.json = ProveedorJSON(app)
+        apps.append((f'proveedor_{ProveedorJSON.motor}', app))
+    app = Flask('bench_stdlib')
+    app.json = ProveedorStdlib(app)
+    apps.append(('proveedor_json', app))
+    return apps
+
+def medir(app, cuerpo, repeticiones):
+    tiempos = []
+    tamano = 0
+    with app.app_context():
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            respuesta = app.json.response(cuerpo)
+            tamano = len(respuesta.get_data())
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'mediana_ms': round(statistics.median(tiempos), 3),
+        'min_ms': round(min(tiempos), 3),
+        'bytes': tamano
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de serialización JSON')
+    parser.add_argument('--productos', type=int, default=10000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--salida', help='Guardar resultados en JSON')
+    args = parser.parse_args()
+
+    productos = filas_productos(args.productos)
+    cuerpos = {
+        'productos': {'success': True, 'productos': productos, 'total': len(productos),
+                      'limit': len(productos), 'next_cursor': None},
+        'usuarios': {'success': True, 'usuarios': filas_usuarios(args.usuarios), 'total': args.usuarios}
+    }
+
+    resultado = {
+        'meta': {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'productos': args.productos,
+            'usuarios': args.usuarios,
+            'repeticiones': args.repeticiones
+        },
+        'resultados': {}
+    }
+    for nombre_cuerpo, cuerpo in cuerpos.items():
+        resultado['resultados'][nombre_cuerpo] = {}
+        base = None
+        for nombre, app in proveedores():
+            medida = medir(app, cuerpo, args.repeticiones)
+            base = base or medida['mediana_ms']
+            resultado['resultados'][nombre_cuerpo][nombre] = medida
+            print(f"{nombre_cuerpo:10s} {nombre:18s} mediana {medida['mediana_ms']:>9.2f} ms  "
+                  f"min {medida['min_ms']:>9.2f} ms  {medida['bytes']:>10d} bytes  "
+                  f"x{base / medida['mediana_ms']:.1f}")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, indent=2, ensure_ascii=False)
+        print(f"📄 Resultados guardados en {args.salida}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Configuración de producción (gunicorn la lee sola desde este directorio):
+#   gunicorn app:app        o        python app.py  (con DEBUG=False)
+# Master pre-fork con N workers de hilos (gthread). La app se carga una vez en el master
+# (preload_app) y cada worker la hereda; create_app no abre conexiones, así que el pool de
+# MySQL, el executor de bcrypt y los hilos de fondo se crean en cada worker tras el fork.
+#
+# Señales al master:
+#   HUP   relee esta configuración y reemplaza los workers sin cortar requests en curso
+#         (con preload_app el código es el ya cargado en el master; para desplegar código
+#         nuevo: USR2 + WINCH + QUIT al master viejo, o GUNICORN_PRELOAD=false)
+#   TTIN / TTOU  suma o quita un worker
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+# Solo un BCRYPT_WORKERS del entorno real tiene prioridad sobre el reparto de abajo
+_bcrypt_workers = os.environ.get('BCRYPT_WORKERS')
+load_dotenv()
+
+_cpus = multiprocessing.cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', 5000)}")
+# (2 x núcleos) + 1: los workers pasan buena parte del tiempo esperando a MySQL
+workers = int(os.getenv('GUNICORN_WORKERS', _cpus * 2 + 1))
+worker_class = 'gthread'
+# Cada hilo usa a lo sumo una conexión por request: mantener threads <= DB_POOL_SIZE
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recicla cada worker tras N requests (con jitter para que no reinicien todos juntos)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# IPs de proxies cuyo X-Forwarded-Proto se acepta (la IP del cliente: PROXIES_CONFIABLES en app.py)
+forwarded_allow_ips = os.getenv('GUNICORN_FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+# Heartbeat de los workers en memoria y no en el disco
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# bcrypt usa un núcleo por hash: repartir los núcleos entre los workers en vez de que cada
+# uno abra un hilo por núcleo. Se asigna (no setdefault) para que un valor del .env no lo
+# pise; routes/contrasenas.py lo lee al crear su executor en cada worker, después del fork,
+# así vale también con `python app.py`, que importa la app antes de leer este archivo
+os.environ['BCRYPT_WORKERS'] = _bcrypt_workers or str(max(1, _cpus // workers))
+
+def when_ready(server):
+    server.log.info(f"🚀 Jugueteria en {bind}: {workers} workers x {threads} hilos")
+
+def post_fork(server, worker):
+    server.log.info(f"👷 Worker {worker.pid} listo (pool de MySQL propio en la primera request)")
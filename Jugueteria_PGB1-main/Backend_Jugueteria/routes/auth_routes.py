@@ -1,12 +1,50 @@
 from flask import Blueprint, request, jsonify
-import bcrypt
 import jwt
 import os
+import hashlib
+import time
 from datetime import datetime, timedelta
+from flask import g
 from Database.conexion import get_db
+from Database.cache import CacheTTL
+from routes.contrasenas import hashear_password, verificar_password, necesita_rehash, HasherOcupadoError
 
 auth_bp = Blueprint('auth', __name__)
 
+JWT_SECRET = os.getenv('JWT_SECRET', 'jwt_secret_key')
+
+# Payloads ya verificados, indexados por el digest del token; cada entrada vence con el `exp` del token
+_tokens_verificados = CacheTTL(max_entradas=int(os.getenv('JWT_CACHE_MAX', 4096)), ttl=300)
+
+def decodificar_token(token):
+    """Decodifica y verifica un token JWT (lanza jwt.InvalidTokenError si no es válido)"""
+    clave = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = _tokens_verificados.get(clave)
+    if payload is not None:
+        return payload
+    
+    payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+    restante = payload['exp'] - time.time() if 'exp' in payload else None
+    if restante is None or restante > 0:
+        _tokens_verificados.set(clave, payload, ttl=restante)
+    return payload
+
+def verificar_token(token):
+    """Payload del token o None si es inválido o expiró"""
+    if not token:
+        return None
+    try:
+        return decodificar_token(token)
+    except Exception:
+        return None
+
+def obtener_usuario_actual():
+    """Usuario del header Authorization; se decodifica una sola vez por request"""
+    if 'usuario' not in g:
+        token = request.headers.get('Authorization', '').replace('Bearer ', '')
+        g.usuario = verificar_token(token)
+    return g.usuario
+
 def generar_token(user_id, username, rol='cliente'):
     """Generar token JWT"""
     try:
@@ -17,12 +55,26 @@ def generar_token(user_id, username, rol='cliente'):
             'exp': datetime.utcnow() + timedelta(hours=24),
             'iat': datetime.utcnow()
         }
-        secret_key = os.getenv('JWT_SECRET', 'jwt_secret_key')
-        return jwt.encode(payload, secret_key, algorithm='HS256')
+        return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
     except Exception as e:
         print(f"Error generando token: {e}")
         return None
 
+def servidor_ocupado():
+    """503 inmediato cuando la cola de bcrypt está llena"""
+    respuesta = jsonify({
+        'success': False,
+        'message': 'Servidor ocupado, intente de nuevo en unos segundos'
+    })
+    respuesta.headers['Retry-After'] = '1'
+    return respuesta, 503
+
+# Búsqueda del login (también la verifica Database.migraciones.consultas_criticas)
+CONSULTA_LOGIN = """
+    SELECT id, username, email, password, nombre, apellido, telefono, direccion, rol 
+    FROM usuarios WHERE username = %s
+"""
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Registrar nuevo usuario"""
@@ -53,7 +105,7 @@ def register():
                 }), 400
             
             # Hashear password
-            hashed_pwd = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            hashed_pwd = hashear_password(data['password'])
             
             # Insertar usuario
             cursor.execute("""
@@ -83,6 +135,8 @@ def register():
                 'user_id': user_id
             }), 201
             
+    except HasherOcupadoError:
+        return servidor_ocupado()
     except Exception as e:
         return jsonify({
             'success': False, 
@@ -106,14 +160,22 @@ def login():
             return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
         
         with db.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, username, email, password, nombre, apellido, telefono, direccion, rol 
-                FROM usuarios WHERE username = %s
-            """, (data['username'],))
+            cursor.execute(CONSULTA_LOGIN, (data['username'],))
             
             user = cursor.fetchone()
             
-            if user and bcrypt.checkpw(data['password'].encode('utf-8'), user['password'].encode('utf-8')):
+            if user and verificar_password(data['password'], user['password']):
+                # Actualizar el hash si cambió el costo configurado (BCRYPT_ROUNDS)
+                if necesita_rehash(user['password']):
+                    try:
+                        cursor.execute(
+                            "UPDATE usuarios SET password = %s WHERE id = %s",
+                            (hashear_password(data['password']), user['id'])
+                        )
+                        db.commit()
+                    except HasherOcupadoError:
+                        pass  # Se reintentará en el próximo login
+                
                 # Generar token
                 token = generar_token(user['id'], user['username'], user.get('rol', 'cliente'))
                 
@@ -132,6 +194,8 @@ def login():
                     'message': 'Usuario o contraseña incorrectos'
                 }), 401
                 
+    except HasherOcupadoError:
+        return servidor_ocupado()
     except Exception as e:
         return jsonify({
             'success': False, 
@@ -152,8 +216,7 @@ def verify_token():
             }), 400
         
         try:
-            secret_key = os.getenv('JWT_SECRET', 'jwt_secret_key')
-            payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+            payload = decodificar_token(token)
             
             return jsonify({
                 'success': True,
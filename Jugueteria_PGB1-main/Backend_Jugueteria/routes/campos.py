@@ -0,0 +1,30 @@
+# Sparse fieldsets: ?fields=Nombre,Valor_Unitario se traduce a una lista SELECT explícita.
+# Solo se aceptan campos de la whitelist de cada recurso, así nunca llega texto del
+# cliente al SQL.
+
+def proyeccion(fields, columnas, obligatorias=()):
+    """Campos pedidos en ?fields= (None si no vino); ValueError si alguno no está en `columnas`"""
+    if fields is None:
+        return None
+    por_nombre = {nombre.lower(): nombre for nombre in columnas}
+    pedidos = []
+    invalidos = []
+    for campo in fields.split(','):
+        campo = campo.strip()
+        if not campo:
+            continue
+        nombre = por_nombre.get(campo.lower())
+        if nombre is None:
+            invalidos.append(campo)
+        elif nombre not in pedidos:
+            pedidos.append(nombre)
+    if invalidos:
+        raise ValueError(f"Campos no permitidos: {', '.join(invalidos)}. Use: {', '.join(columnas)}")
+    if not pedidos:
+        raise ValueError('fields no puede estar vacío')
+    # Claves que la ruta necesita (id, orden del cursor) van siempre
+    return [c for c in obligatorias if c not in pedidos] + pedidos
+
+def lista_select(campos, columnas):
+    """'p.Nombre, p.Valor_Unitario' a partir de los campos validados"""
+    return ', '.join(columnas[campo] for campo in campos)
@@ -0,0 +1,104 @@
+import gzip
+import os
+import threading
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se negocia gzip
+    brotli = None
+
+# Cuerpos más chicos que esto se envían sin comprimir (el encabezado gzip no compensa)
+COMPRESION_MINIMO = int(os.getenv('COMPRESION_MINIMO', 1024))
+COMPRESION_NIVEL_GZIP = int(os.getenv('COMPRESION_NIVEL_GZIP', 6))
+COMPRESION_CALIDAD_BR = int(os.getenv('COMPRESION_CALIDAD_BR', 5))
+
+TIPOS_COMPRIMIBLES = ('application/json', 'application/x-ndjson', 'text/')
+
+def negociar(accept_encoding):
+    """'br', 'gzip' o None según Accept-Encoding (respeta q=0); br gana si el cliente lo acepta igual"""
+    aceptadas = {}
+    for parte in (accept_encoding or '').split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        if nombre:
+            aceptadas[nombre.lower()] = calidad
+    comodin = aceptadas.get('*', 0.0)
+    opciones = []
+    if brotli is not None:
+        opciones.append((aceptadas.get('br', comodin), 1, 'br'))
+    opciones.append((aceptadas.get('gzip', aceptadas.get('x-gzip', comodin)), 0, 'gzip'))
+    calidad, _, codificacion = max(opciones)
+    return codificacion if calidad > 0 else None
+
+def comprimir(cuerpo, codificacion):
+    if codificacion == 'br':
+        return brotli.compress(cuerpo, quality=COMPRESION_CALIDAD_BR)
+    return gzip.compress(cuerpo, compresslevel=COMPRESION_NIVEL_GZIP, mtime=0)
+
+class CuerpoComprimido:
+    """Cuerpo ya serializado con sus variantes comprimidas; cada variante se calcula una sola vez"""
+
+    def __init__(self, cuerpo, mimetype='application/json'):
+        self.identidad = cuerpo
+        self.mimetype = mimetype
+        self._variantes = {}
+        self._lock = threading.Lock()
+
+    def para(self, accept_encoding):
+        """(bytes, codificación o None) a enviar según Accept-Encoding"""
+        if len(self.identidad) < COMPRESION_MINIMO:
+            return self.identidad, None
+        codificacion = negociar(accept_encoding)
+        if codificacion is None:
+            return self.identidad, None
+        variante = self._variantes.get(codificacion)
+        if variante is None:
+            with self._lock:
+                variante = self._variantes.get(codificacion)
+                if variante is None:
+                    variante = self._variantes[codificacion] = comprimir(self.identidad, codificacion)
+        return variante, codificacion
+
+def respuesta_precomprimida(cuerpo, status=200):
+    """Response de Flask desde un CuerpoComprimido (p. ej. guardado en un cache)"""
+    datos, codificacion = cuerpo.para(request.headers.get('Accept-Encoding'))
+    respuesta = current_app.response_class(datos, status=status, mimetype=cuerpo.mimetype)
+    respuesta.vary.add('Accept-Encoding')
+    if codificacion:
+        respuesta.headers['Content-Encoding'] = codificacion
+    return respuesta
+
+def _comprimible(respuesta):
+    return (
+        respuesta.status_code >= 200
+        and respuesta.status_code not in (204, 304)
+        and not respuesta.is_streamed
+        and not respuesta.direct_passthrough
+        and 'Content-Encoding' not in respuesta.headers
+        and (respuesta.mimetype or '').startswith(TIPOS_COMPRIMIBLES)
+    )
+
+def comprimir_respuesta(respuesta):
+    """after_request: comprime en el momento las respuestas que no vienen precomprimidas"""
+    if not _comprimible(respuesta):
+        return respuesta
+    respuesta.vary.add('Accept-Encoding')
+    datos = respuesta.get_data()
+    if len(datos) < COMPRESION_MINIMO:
+        return respuesta
+    codificacion = negociar(request.headers.get('Accept-Encoding'))
+    if codificacion:
+        respuesta.set_data(comprimir(datos, codificacion))
+        respuesta.headers['Content-Encoding'] = codificacion
+    return respuesta
+
+def init_app(app):
+    """Negociación gzip/brotli para las respuestas de todos los blueprints"""
+    app.after_request(comprimir_respuesta)
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from Database import metricas
+
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+# Trabajos que pueden esperar detrás de los workers antes de rechazar con 503
+BCRYPT_MAX_COLA = int(os.getenv('BCRYPT_MAX_COLA', 16))
+
+class HasherOcupadoError(Exception):
+    """La cola de bcrypt está llena; el request debe responder 503"""
+
+_executor = None
+_executor_pid = None
+_workers = None
+_pendientes = 0
+_lock = threading.Lock()
+
+def _workers_configurados():
+    # Se lee al crear el executor y no al importar: con `python app.py` el módulo se importa
+    # antes de que gunicorn.conf.py reparta BCRYPT_WORKERS entre los workers
+    return int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 2))
+
+def _get_executor():
+    global _executor, _executor_pid, _workers, _pendientes
+    # Los hilos no sobreviven a un fork: cada worker crea su propio executor
+    if _executor_pid != os.getpid():
+        with _lock:
+            if _executor_pid != os.getpid():
+                _workers = _workers_configurados()
+                _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix='bcrypt')
+                _executor_pid = os.getpid()
+                _pendientes = 0
+    return _executor
+
+def _terminado(_futuro):
+    global _pendientes
+    with _lock:
+        _pendientes -= 1
+
+def _medido(operacion, funcion, encolado, *args):
+    """Corre en el worker: separa la espera en cola del tiempo de CPU de bcrypt"""
+    inicio = time.perf_counter()
+    metricas.bcrypt_espera.observar(inicio - encolado, operacion)
+    try:
+        return funcion(*args)
+    finally:
+        metricas.bcrypt_duracion.observar(time.perf_counter() - inicio, operacion)
+
+def _ejecutar(operacion, funcion, *args):
+    """Ejecuta trabajo bcrypt en el pool dedicado, rechazando si la cola está llena"""
+    global _pendientes
+    executor = _get_executor()
+    with _lock:
+        if _pendientes >= _workers + BCRYPT_MAX_COLA:
+            raise HasherOcupadoError('Demasiadas operaciones de contraseña en curso')
+        _pendientes += 1
+    try:
+        futuro = executor.submit(_medido, operacion, funcion, time.perf_counter(), *args)
+    except Exception:
+        _terminado(None)
+        raise
+    futuro.add_done_callback(_terminado)
+    return futuro.result()
+
+def _hashear(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
+
+def _verificar(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+def hashear_password(password):
+    """Hash bcrypt con el costo configurado en BCRYPT_ROUNDS"""
+    return _ejecutar('hash', _hashear, password)
+
+def verificar_password(password, hashed):
+    """Verifica la contraseña contra su hash bcrypt"""
+    return _ejecutar('verificar', _verificar, password, hashed)
+
+def necesita_rehash(hashed):
+    """True si el hash se generó con un costo distinto al configurado"""
+    try:
+        return int(hashed.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def estadisticas():
+    with _lock:
+        return {
+            'workers': _workers if _executor_pid == os.getpid() else _workers_configurados(),
+            'max_cola': BCRYPT_MAX_COLA,
+            'pendientes': _pendientes,
+            'rounds': BCRYPT_ROUNDS
+        }
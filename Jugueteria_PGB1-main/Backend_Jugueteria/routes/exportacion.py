@@ -0,0 +1,80 @@
+import csv
+import io
+from datetime import date, datetime
+import pymysql
+from flask import Response, jsonify
+from Database.conexion import get_pool
+from routes.serializacion import a_json
+
+FORMATOS_EXPORTACION = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Filas acumuladas por chunk; la primera fila se envía sola para no retrasar el primer byte
+FILAS_POR_CHUNK = 256
+
+def _linea_ndjson(fila, columnas):
+    return a_json(fila) + '\n'
+
+def _linea_csv(fila, columnas):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(
+        [fila[c].isoformat() if isinstance(fila[c], (date, datetime)) else fila[c] for c in columnas]
+    )
+    return buffer.getvalue()
+
+def _encabezado_csv(columnas):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columnas)
+    return buffer.getvalue()
+
+def respuesta_exportacion(sql, params, formato, nombre_archivo):
+    """Respuesta en streaming (NDJSON o CSV) leída con un cursor sin buffer"""
+    conn = get_pool().obtener()
+    linea = _linea_ndjson if formato == 'ndjson' else _linea_csv
+
+    def generar():
+        completo = False
+        try:
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(sql, params)
+            columnas = [c[0] for c in cursor.description]
+            if formato == 'csv':
+                yield _encabezado_csv(columnas)
+
+            chunk = []
+            primera = True
+            for fila in cursor:
+                chunk.append(linea(fila, columnas))
+                if primera or len(chunk) >= FILAS_POR_CHUNK:
+                    yield ''.join(chunk)
+                    chunk = []
+                    primera = False
+            if chunk:
+                yield ''.join(chunk)
+
+            cursor.close()
+            completo = True
+        finally:
+            # Si el cliente cortó la descarga, drenar el resultado sería más caro que reconectar
+            if completo:
+                conn.close()
+            else:
+                conn.descartar()
+
+    extension = 'ndjson' if formato == 'ndjson' else 'csv'
+    respuesta = Response(generar(), mimetype=FORMATOS_EXPORTACION[formato], headers={
+        'Content-Disposition': f'attachment; filename={nombre_archivo}.{extension}',
+        'X-Accel-Buffering': 'no'
+    })
+    # Si la respuesta se cierra antes del primer chunk, el finally de generar() nunca corre;
+    # descartar() no hace nada si la conexión ya se devolvió
+    respuesta.call_on_close(conn.descartar)
+    return respuesta
+
+def formato_invalido(formato):
+    return jsonify({
+        'success': False,
+        'message': f'Formato inválido: {formato}. Use ndjson o csv'
+    }), 400
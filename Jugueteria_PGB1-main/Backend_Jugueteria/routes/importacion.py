@@ -0,0 +1,200 @@
+import csv
+import io
+import os
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from Database.busqueda import normalizar
+
+IMPORT_CHUNK = int(os.getenv('IMPORT_CHUNK', 1000))
+# Máximo de errores por fila incluidos en la respuesta
+MAX_ERRORES_REPORTADOS = 1000
+
+# Claves aceptadas en el JSON/CSV -> columna de la tabla producto
+ALIAS_COLUMNAS = {
+    'nombre': 'Nombre',
+    'descripcion': 'Descripcion',
+    'fecha_vencimiento': 'Fecha_Vencimiento',
+    'cantidad': 'Cantidad',
+    'stock': 'Cantidad',
+    'valor_unitario': 'Valor_Unitario',
+    'precio': 'Valor_Unitario',
+    'id_linea': 'Id_Linea',
+    'id_linea_producto': 'Id_Linea',
+    'id_producto': 'Id_Producto',
+    'id': 'Id_Producto'
+}
+
+COLUMNAS = ['Nombre', 'Descripcion', 'Fecha_Vencimiento', 'Cantidad', 'Valor_Unitario', 'Id_Linea']
+# Solo al insertar: una actualización toca únicamente las columnas que trae la fila
+DEFECTOS_INSERCION = {'Descripcion': None, 'Fecha_Vencimiento': None, 'Cantidad': 0, 'Id_Linea': None}
+MODOS_UPSERT = {'nombre': 'Nombre', 'id': 'Id_Producto'}
+
+def leer_csv(flujo_binario):
+    """Itera las filas de un CSV sin cargar el archivo completo en memoria"""
+    texto = io.TextIOWrapper(flujo_binario, encoding='utf-8-sig', newline='')
+    yield from csv.DictReader(texto)
+
+def _vacio(valor):
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+def validar_fila(fila):
+    """Normaliza una fila de entrada; devuelve (producto, errores)"""
+    if not isinstance(fila, dict):
+        return None, ['La fila debe ser un objeto']
+
+    datos = {}
+    for clave, valor in fila.items():
+        columna = ALIAS_COLUMNAS.get(str(clave).strip().lower())
+        if columna and not _vacio(valor):
+            datos[columna] = valor.strip() if isinstance(valor, str) else valor
+
+    errores = []
+    producto = {}
+
+    nombre = datos.get('Nombre')
+    if not nombre:
+        errores.append('nombre es requerido')
+    elif len(str(nombre)) > 100:
+        errores.append('nombre supera 100 caracteres')
+    else:
+        producto['Nombre'] = str(nombre)
+
+    if 'Descripcion' in datos:
+        if len(str(datos['Descripcion'])) > 255:
+            errores.append('descripcion supera 255 caracteres')
+        else:
+            producto['Descripcion'] = str(datos['Descripcion'])
+
+    try:
+        precio = Decimal(str(datos['Valor_Unitario']))
+        if precio < 0 or not precio.is_finite():
+            raise InvalidOperation
+        producto['Valor_Unitario'] = precio
+    except KeyError:
+        errores.append('precio es requerido')
+    except InvalidOperation:
+        errores.append('precio inválido')
+
+    for columna, etiqueta in (('Cantidad', 'cantidad'), ('Id_Linea', 'id_linea'), ('Id_Producto', 'id')):
+        if columna in datos:
+            try:
+                valor = int(datos[columna])
+                if valor < 0:
+                    raise ValueError
+                producto[columna] = valor
+            except (TypeError, ValueError):
+                errores.append(f'{etiqueta} debe ser un entero no negativo')
+
+    if 'Fecha_Vencimiento' in datos:
+        try:
+            producto['Fecha_Vencimiento'] = date.fromisoformat(str(datos['Fecha_Vencimiento']))
+        except ValueError:
+            errores.append('fecha_vencimiento debe tener formato AAAA-MM-DD')
+
+    return (None, errores) if errores else (producto, [])
+
+def _clave_upsert(upsert, valor):
+    """Clave de comparación en Python: la collation de MySQL no distingue mayúsculas ni tildes"""
+    if valor is None or upsert != 'nombre':
+        return valor
+    return normalizar(valor).rstrip()
+
+def _escribir_lote(db, lote, upsert):
+    """Inserta/actualiza un lote en una transacción; devuelve (insertados, actualizados, rechazados)"""
+    # rechazados: [(número de fila, errores)] de las filas que no se escribieron
+    with db.cursor() as cursor:
+        existentes = {}
+        if upsert:
+            clave = MODOS_UPSERT[upsert]
+            valores = list({p[clave] for _, p in lote if p.get(clave) is not None})
+            if valores:
+                # La base resuelve la coincidencia con su collation ('pelota' encuentra 'Pelota')
+                marcadores = ', '.join(['%s'] * len(valores))
+                cursor.execute(
+                    f"SELECT Id_Producto, {clave} FROM producto WHERE {clave} IN ({marcadores}) ORDER BY Id_Producto",
+                    valores
+                )
+                for fila in cursor.fetchall():
+                    existentes.setdefault(_clave_upsert(upsert, fila[clave]), fila['Id_Producto'])
+
+        nuevos = []
+        cambios = {}
+        rechazados = []
+        indice_nuevos = {}
+        for numero, producto in lote:
+            clave_fila = _clave_upsert(upsert, producto.get(MODOS_UPSERT[upsert])) if upsert else None
+            id_existente = existentes.get(clave_fila)
+            if id_existente is not None:
+                # Repetido dentro del lote: se combinan y gana la última fila en cada columna
+                cambios.setdefault(id_existente, {}).update(
+                    (c, producto[c]) for c in COLUMNAS if c in producto
+                )
+                continue
+            if upsert == 'id' and clave_fila is not None:
+                rechazados.append((numero, [f'id {clave_fila} no existe']))
+                continue
+            valores = [producto.get(c, DEFECTOS_INSERCION.get(c)) for c in COLUMNAS]
+            if clave_fila is not None and clave_fila in indice_nuevos:
+                # Repetido dentro del mismo lote: gana la última fila
+                nuevos[indice_nuevos[clave_fila]] = valores
+            else:
+                if clave_fila is not None:
+                    indice_nuevos[clave_fila] = len(nuevos)
+                nuevos.append(valores)
+
+        # pymysql agrupa executemany de INSERT ... VALUES en INSERTs multi-fila
+        if nuevos:
+            cursor.executemany(f"""
+                INSERT INTO producto ({', '.join(COLUMNAS)})
+                VALUES ({', '.join(['%s'] * len(COLUMNAS))})
+            """, nuevos)
+        # Un UPDATE multi-fila por combinación de columnas presentes: lo que no vino no se pisa
+        por_columnas = {}
+        for id_existente, valores in cambios.items():
+            columnas = tuple(c for c in COLUMNAS if c in valores)
+            por_columnas.setdefault(columnas, []).append([id_existente] + [valores[c] for c in columnas])
+        for columnas, filas in por_columnas.items():
+            cursor.executemany(f"""
+                INSERT INTO producto (Id_Producto, {', '.join(columnas)})
+                VALUES ({', '.join(['%s'] * (len(columnas) + 1))})
+                ON DUPLICATE KEY UPDATE {', '.join(f'{c}=VALUES({c})' for c in columnas)}, Version=Version + 1
+            """, filas)
+    db.commit()
+    return len(nuevos), len(cambios), rechazados
+
+def importar_productos(db, filas, upsert=None, tamano_lote=IMPORT_CHUNK):
+    """Valida las filas en una sola pasada y las escribe en lotes transaccionales"""
+    resumen = {'filas': 0, 'insertados': 0, 'actualizados': 0, 'total_errores': 0, 'errores': []}
+
+    def registrar_error(numero, errores):
+        resumen['total_errores'] += 1
+        if len(resumen['errores']) < MAX_ERRORES_REPORTADOS:
+            resumen['errores'].append({'fila': numero, 'errores': errores})
+
+    def vaciar(lote):
+        try:
+            insertados, actualizados, rechazados = _escribir_lote(db, lote, upsert)
+            resumen['insertados'] += insertados
+            resumen['actualizados'] += actualizados
+            for numero, errores in rechazados:
+                registrar_error(numero, errores)
+        except Exception as e:
+            db.rollback()
+            for numero, _ in lote:
+                registrar_error(numero, [f'Error al guardar el lote: {str(e)}'])
+
+    lote = []
+    for numero, fila in enumerate(filas, start=1):
+        resumen['filas'] += 1
+        producto, errores = validar_fila(fila)
+        if errores:
+            registrar_error(numero, errores)
+            continue
+        lote.append((numero, producto))
+        if len(lote) >= tamano_lote:
+            vaciar(lote)
+            lote = []
+    if lote:
+        vaciar(lote)
+
+    return resumen
@@ -0,0 +1,207 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import g, jsonify, request
+from Database import metricas
+from routes.auth_routes import obtener_usuario_actual
+
+# Control de admisión antes de tocar bcrypt o MySQL:
+#   - token bucket por IP y por usuario, configurable por endpoint (429 + Retry-After)
+#   - tope global de requests en curso por proceso (503 + Retry-After)
+# Un límite 'N/periodo' deja ráfagas de hasta N requests y repone N fichas por periodo
+# (s, m o h). Cada endpoint puede sobrescribirse en .env:
+#   LIMITE_AUTH_LOGIN_IP=10/m    LIMITE_VENTAS_CREATE_VENTA_USUARIO=5/s    (vacío o 0 = sin límite)
+
+LIMITES_ACTIVOS = os.getenv('LIMITES_ACTIVOS', 'true').lower() == 'true'
+# Requests simultáneas por proceso antes de responder 503 (0 = sin tope)
+LIMITE_EN_CURSO = int(os.getenv('LIMITE_EN_CURSO', 200))
+# Claves (IPs o usuarios) recordadas por cada límite; se desalojan las menos recientes
+LIMITES_MAX_CLAVES = int(os.getenv('LIMITES_MAX_CLAVES', 10000))
+
+# endpoint -> {'ip': 'N/periodo', 'usuario': 'N/periodo'}; '*' aplica a los no listados
+LIMITES = {
+    '*': {'ip': '100/s'},
+    # Cada intento cuesta un hash bcrypt
+    'auth.login': {'ip': '10/m'},
+    'auth.register': {'ip': '5/m'},
+    'productos.get_productos': {'ip': '20/s'},
+    'productos.search_productos': {'ip': '10/s'},
+    'productos.get_productos_lote': {'ip': '10/s'},
+    'ventas.create_venta': {'usuario': '5/s'},
+    'reservas.create_reserva': {'usuario': '10/s'},
+    'pedidos.create_pedido': {'usuario': '10/s'},
+}
+# Siempre admitidos: el monitoreo tiene que responder justo cuando hay sobrecarga
+EXENTOS = {'metricas.get_metrics', 'health', 'static'}
+
+PERIODOS = {'s': 1, 'm': 60, 'h': 3600}
+
+def parsear_limite(texto):
+    """'10/m' -> (capacidad, fichas por segundo); None si está vacío o en 0"""
+    texto = (texto or '').strip().lower()
+    if not texto or texto == '0':
+        return None
+    cantidad, _, periodo = texto.partition('/')
+    try:
+        capacidad = int(cantidad)
+        segundos = PERIODOS[periodo.strip() or 's']
+    except (KeyError, ValueError):
+        raise ValueError(f'Límite inválido: {texto!r} (use N/s, N/m o N/h)')
+    if capacidad <= 0:
+        return None
+    return capacidad, capacidad / segundos
+
+class LimitadorTasa:
+    """Token buckets por clave con recarga perezosa: O(1) y sin hilos de fondo"""
+
+    def __init__(self, capacidad, tasa, max_claves=LIMITES_MAX_CLAVES):
+        self.capacidad = capacidad
+        self.tasa = tasa
+        self._max_claves = max_claves
+        self._cubos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, clave, costo=1):
+        """0 si se admite; si no, segundos hasta que haya fichas suficientes"""
+        ahora = time.monotonic()
+        with self._lock:
+            cubo = self._cubos.get(clave)
+            if cubo is None:
+                fichas = self.capacidad
+                cubo = self._cubos[clave] = [fichas, ahora]
+                if len(self._cubos) > self._max_claves:
+                    self._cubos.popitem(last=False)
+            else:
+                fichas = min(self.capacidad, cubo[0] + (ahora - cubo[1]) * self.tasa)
+                self._cubos.move_to_end(clave)
+            cubo[1] = ahora
+            if fichas >= costo:
+                cubo[0] = fichas - costo
+                return 0
+            cubo[0] = fichas
+            return (costo - fichas) / self.tasa
+
+class _Admision:
+    """Límites por endpoint (resueltos una vez) y tope global de requests en curso"""
+
+    def __init__(self):
+        self._por_endpoint = {}
+        self._lock = threading.Lock()
+        self._en_curso = threading.BoundedSemaphore(LIMITE_EN_CURSO) if LIMITE_EN_CURSO > 0 else None
+
+    def _limites(self, endpoint):
+        limites = self._por_endpoint.get(endpoint)
+        if limites is None:
+            with self._lock:
+                limites = self._por_endpoint.get(endpoint)
+                if limites is None:
+                    limites = self._por_endpoint[endpoint] = self._resolver(endpoint)
+        return limites
+
+    @staticmethod
+    def _resolver(endpoint):
+        """[(tipo, LimitadorTasa)] del endpoint con las sobrescrituras de .env"""
+        configurados = LIMITES.get(endpoint, LIMITES['*'])
+        prefijo = 'LIMITE_' + endpoint.replace('.', '_').upper()
+        limites = []
+        for tipo in ('ip', 'usuario'):
+            limite = parsear_limite(os.getenv(f'{prefijo}_{tipo.upper()}', configurados.get(tipo)))
+            if limite:
+                limites.append((tipo, LimitadorTasa(*limite)))
+        return limites
+
+    def tomar(self):
+        """Ocupa un lugar de requests en curso; False si el proceso ya está al tope"""
+        return self._en_curso is None or self._en_curso.acquire(blocking=False)
+
+    def liberar(self):
+        if self._en_curso is not None:
+            self._en_curso.release()
+
+    def revisar_tasa(self, endpoint, ip, usuario_id):
+        """Segundos de espera del primer límite excedido o 0; usuario_id() solo se evalúa si hace falta"""
+        for tipo, limitador in self._limites(endpoint):
+            if tipo == 'ip':
+                clave = ip
+            else:
+                clave = usuario_id()
+                if clave is None:
+                    continue
+            espera = limitador.consumir(clave)
+            if espera:
+                return espera
+        return 0
+
+admision = _Admision()
+
+def rechazo(endpoint, motivo, espera):
+    """(status, cuerpo, Retry-After) de una request rechazada"""
+    metricas.http_rechazadas.incrementar(endpoint, motivo)
+    if motivo == 'tasa':
+        return 429, {
+            'success': False,
+            'message': 'Demasiadas solicitudes, intente de nuevo más tarde'
+        }, str(max(1, math.ceil(espera)))
+    return 503, {
+        'success': False,
+        'message': 'Servidor ocupado, intente de nuevo en unos segundos'
+    }, '1'
+
+def controlado(endpoint):
+    """True si la request del endpoint pasa por los límites (y ocupa un lugar en curso)"""
+    return LIMITES_ACTIVOS and endpoint not in EXENTOS
+
+def admitir(endpoint, ip, usuario_id):
+    """None si la request pasa (y ocupa un lugar en curso); si no, el rechazo a responder"""
+    if not controlado(endpoint):
+        return None
+    # Primero el tope en curso: un 503 no gasta fichas del cliente
+    if not admision.tomar():
+        return rechazo(endpoint, 'en_curso', 1)
+    espera = admision.revisar_tasa(endpoint, ip, usuario_id)
+    if espera:
+        admision.liberar()
+        return rechazo(endpoint, 'tasa', espera)
+    return None
+
+def _usuario_id():
+    usuario = obtener_usuario_actual()
+    return usuario.get('id') if usuario else None
+
+def controlar_admision():
+    """before_request: corta con 429/503 antes de que la ruta gaste CPU o conexiones"""
+    endpoint = request.endpoint or 'sin_ruta'
+    resultado = admitir(endpoint, request.remote_addr, _usuario_id)
+    if resultado is None:
+        g.admision_en_curso = controlado(endpoint)
+        return None
+    status, cuerpo, retry_after = resultado
+    respuesta = jsonify(cuerpo)
+    respuesta.headers['Retry-After'] = retry_after
+    return respuesta, status
+
+def liberar_en_streaming(respuesta):
+    """after_request: una respuesta en streaming (exportaciones) ocupa su lugar hasta que se
+    termina de enviar, no hasta el teardown"""
+    if respuesta.is_streamed and g.pop('admision_en_curso', False):
+        liberada = threading.Lock()
+
+        def liberar():
+            # close() puede llamarse más de una vez
+            if liberada.acquire(blocking=False):
+                admision.liberar()
+        respuesta.call_on_close(liberar)
+    return respuesta
+
+def liberar_admision(error=None):
+    if g.pop('admision_en_curso', False):
+        admision.liberar()
+
+def init_app(app):
+    """Límites por IP/usuario y tope de requests en curso para todos los blueprints"""
+    app.before_request(controlar_admision)
+    # Registrado antes que la compresión: corre último y ve la respuesta final
+    app.after_request(liberar_en_streaming)
+    app.teardown_request(liberar_admision)
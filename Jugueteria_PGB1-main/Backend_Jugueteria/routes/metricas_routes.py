@@ -0,0 +1,88 @@
+import time
+from flask import Blueprint, Response, g, jsonify, request
+from Database import metricas
+from Database.conexion import estadisticas_pool
+from Database.perfilador import ORDENES, perfilador
+from routes.auth_routes import obtener_usuario_actual
+
+metricas_bp = Blueprint('metricas', __name__)
+
+def _endpoint():
+    # request.endpoint acota la cardinalidad: 'productos.get_producto' y no /api/productos/123
+    return request.endpoint or 'sin_ruta'
+
+@metricas_bp.before_app_request
+def iniciar_medicion():
+    g.metricas_inicio = time.perf_counter()
+    metricas.http_en_curso.sumar(_endpoint())
+
+def _cerrar_medicion(status):
+    inicio = g.pop('metricas_inicio', None)
+    if inicio is None:
+        return
+    endpoint = _endpoint()
+    metricas.http_duracion.observar(time.perf_counter() - inicio, endpoint, request.method)
+    metricas.http_requests.incrementar(endpoint, request.method, str(status))
+    metricas.http_en_curso.restar(endpoint)
+
+@metricas_bp.after_app_request
+def registrar_respuesta(response):
+    _cerrar_medicion(response.status_code)
+    return response
+
+@metricas_bp.teardown_app_request
+def registrar_excepcion(error=None):
+    # Solo queda medición pendiente si una excepción no manejada se saltó after_request
+    _cerrar_medicion(500)
+
+@metricas_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    pool = estadisticas_pool()
+    if pool:
+        metricas.db_pool_conexiones.fijar('abiertas', valor=pool['abiertas'])
+        metricas.db_pool_conexiones.fijar('libres', valor=pool['libres'])
+        metricas.db_pool_conexiones.fijar('en_uso', valor=pool['en_uso'])
+    return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4')
+
+def _no_autorizado():
+    return jsonify({
+        'success': False,
+        'message': 'No autorizado. Se requiere rol de administrador'
+    }), 403
+
+@metricas_bp.route('/metrics/consultas', methods=['GET'])
+def get_consultas():
+    """Perfil de SQL por huella y log de consultas lentas (solo admin, ?orden=&limit=)"""
+    usuario_actual = obtener_usuario_actual()
+    if not usuario_actual or usuario_actual.get('rol') != 'admin':
+        return _no_autorizado()
+    
+    orden = request.args.get('orden', 'total_ms')
+    if orden not in ORDENES:
+        return jsonify({
+            'success': False,
+            'message': f"Orden inválido: use {', '.join(ORDENES)}"
+        }), 400
+    try:
+        limite = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit debe ser entero'}), 400
+    
+    return jsonify({
+        'success': True,
+        'perfil': perfilador.resumen(orden, limite)
+    }), 200
+
+@metricas_bp.route('/metrics/consultas', methods=['DELETE'])
+def delete_consultas():
+    """Reiniciar el perfil de SQL (solo admin)"""
+    usuario_actual = obtener_usuario_actual()
+    if not usuario_actual or usuario_actual.get('rol') != 'admin':
+        return _no_autorizado()
+    
+    perfilador.reiniciar()
+    return jsonify({
+        'success': True,
+        'message': 'Perfil de consultas reiniciado'
+    }), 200
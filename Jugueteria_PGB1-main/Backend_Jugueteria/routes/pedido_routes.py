@@ -0,0 +1,195 @@
+from flask import Blueprint, request, jsonify
+import os
+import re
+import threading
+import time
+import uuid
+from Database import metricas
+from Database.cola_pedidos import ColaPedidos
+from Database.models import Venta
+from routes.auth_routes import obtener_usuario_actual
+from routes.producto_routes import invalidar_catalogo
+
+pedidos_bp = Blueprint('pedidos', __name__)
+
+# Pedidos por transacción de MySQL y espera del worker cuando la cola está vacía
+PEDIDOS_LOTE = int(os.getenv('PEDIDOS_LOTE', 100))
+PEDIDOS_INTERVALO = float(os.getenv('PEDIDOS_INTERVALO', 1))
+# Con true, POST /api/ventas también encola y responde 202 (modo write-behind)
+VENTAS_WRITE_BEHIND = os.getenv('VENTAS_WRITE_BEHIND', 'false').lower() == 'true'
+
+ID_PEDIDO = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+_cola = None
+_cola_pid = None
+_worker_pid = None
+_lock = threading.Lock()
+
+def get_cola():
+    """Cola local del proceso; se abre de nuevo tras un fork"""
+    global _cola, _cola_pid
+    if _cola_pid != os.getpid():
+        with _lock:
+            if _cola_pid != os.getpid():
+                _cola = ColaPedidos()
+                _cola_pid = os.getpid()
+    return _cola
+
+def drenar_pedidos(limite=None):
+    """Aplica un lote de la cola en MySQL; devuelve cuántos pedidos tomó"""
+    cola = get_cola()
+    lote = cola.tomar(limite or PEDIDOS_LOTE)
+    if not lote:
+        return 0
+    try:
+        resultados = Venta.aplicar_pedidos(lote)
+    except Exception as e:
+        # MySQL caído, deadlock, timeout: el lote entero vuelve a la cola con backoff
+        cola.reintentar([clave for clave, _ in lote], str(e)[:255])
+        raise
+    cola.completar(resultados)
+    for clave, _ in lote:
+        metricas.pedidos_aplicados.incrementar(resultados[clave]['Estado'])
+    if any(resultados[clave]['Estado'] == 'procesado' for clave, _ in lote):
+        # El stock cambió: las páginas del catálogo en cache ya no valen
+        invalidar_catalogo()
+    return len(lote)
+
+def _worker():
+    cola = get_cola()
+    ultima_purga = time.monotonic()
+    while True:
+        # Se limpia antes de tomar el lote: un pedido que entre mientras tanto vuelve a despertarlo
+        cola.nuevos.clear()
+        try:
+            tomados = drenar_pedidos()
+        except Exception as e:
+            print(f"❌ Error al aplicar pedidos en MySQL: {e}")
+            tomados = 0
+        try:
+            metricas.pedidos_pendientes.fijar(valor=cola.pendientes())
+            if time.monotonic() - ultima_purga > 3600:
+                cola.purgar()
+                ultima_purga = time.monotonic()
+        except Exception as e:
+            print(f"❌ Error en la cola de pedidos: {e}")
+        if tomados < PEDIDOS_LOTE:
+            # Despierta antes si entra un pedido nuevo
+            cola.nuevos.wait(PEDIDOS_INTERVALO)
+
+@pedidos_bp.before_app_request
+def iniciar_worker():
+    """Arranca el worker de la cola en la primera request de cada proceso (también tras un fork)"""
+    global _worker_pid
+    if _worker_pid == os.getpid():
+        return
+    with _lock:
+        if _worker_pid != os.getpid():
+            threading.Thread(target=_worker, name='worker-pedidos', daemon=True).start()
+            _worker_pid = os.getpid()
+
+def encolar_pedido(usuario_actual, data):
+    """Valida y persiste el pedido en la cola local; responde 202 sin tocar MySQL"""
+    try:
+        items = Venta._normalizar_detalles(data.get('detalles'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    pedido_id = str(data.get('pedido_id') or uuid.uuid4().hex)
+    if not ID_PEDIDO.match(pedido_id):
+        return jsonify({
+            'success': False,
+            'message': 'pedido_id debe tener hasta 64 letras, números, - o _'
+        }), 400
+    
+    # pedido_id es la clave de idempotencia del cliente: solo deduplica dentro del mismo usuario
+    nuevo = get_cola().agregar(usuario_actual['id'], pedido_id, {
+        'usuario_id': usuario_actual['id'],
+        'descripcion': data.get('descripcion', ''),
+        'detalles': [{'producto_id': producto_id, 'cantidad': cantidad} for producto_id, cantidad in items]
+    })
+    return jsonify({
+        'success': True,
+        'message': 'Pedido recibido' if nuevo else 'Pedido ya recibido',
+        'pedido': {'id': pedido_id, 'estado': 'pendiente'}
+    }), 202
+
+@pedidos_bp.route('/pedidos', methods=['POST'])
+def create_pedido():
+    """Recibir un pedido en la cola durable (se aplica en MySQL en segundo plano)"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        
+        if not usuario_actual:
+            return jsonify({
+                'success': False,
+                'message': 'Token inválido o expirado'
+            }), 401
+        
+        return encolar_pedido(usuario_actual, request.get_json(silent=True) or {})
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al recibir pedido: {str(e)}'
+        }), 500
+
+@pedidos_bp.route('/pedidos/<pedido_id>', methods=['GET'])
+def get_pedido(pedido_id):
+    """Estado de un pedido del usuario: pendiente, procesado (con id de venta) o rechazado;
+    un admin consulta el de otro usuario con ?usuario_id="""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        
+        if not usuario_actual:
+            return jsonify({
+                'success': False,
+                'message': 'Token inválido o expirado'
+            }), 401
+        
+        usuario_id = usuario_actual.get('id')
+        if usuario_actual.get('rol') == 'admin' and request.args.get('usuario_id'):
+            usuario_id = request.args.get('usuario_id', type=int)
+        
+        pedido = None
+        local = get_cola().estado(usuario_id, pedido_id)
+        if local:
+            pedido = {
+                'id': local['id'],
+                'usuario_id': local['usuario_id'],
+                'estado': local['estado'],
+                'venta_id': local['id_venta'],
+                'mensaje': local['mensaje'],
+                'intentos': local['intentos']
+            }
+        else:
+            # Ya purgado de la cola local (o recibido en otro servidor)
+            procesado = Venta.pedido_procesado(usuario_id, pedido_id)
+            if procesado:
+                pedido = {
+                    'id': procesado['Id_Pedido'],
+                    'usuario_id': procesado['Id_Usuario'],
+                    'estado': procesado['Estado'],
+                    'venta_id': procesado['Id_Venta'],
+                    'mensaje': procesado['Mensaje']
+                }
+        
+        if not pedido:
+            return jsonify({
+                'success': False,
+                'message': 'Pedido no encontrado'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'pedido': pedido
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
@@ -1,31 +1,376 @@
-from flask import Blueprint, request, jsonify
-from Database.conexion import get_db
+from flask import Blueprint, current_app, request, jsonify
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+import os
+import threading
+from Database.conexion import get_db, get_db_connection
+from Database.cache import CacheTTL
+from Database.busqueda import IndiceProductos
+from routes.auth_routes import obtener_usuario_actual
+from routes.importacion import importar_productos, leer_csv, MODOS_UPSERT
+from routes.exportacion import FORMATOS_EXPORTACION, respuesta_exportacion, formato_invalido
+from routes.compresion import CuerpoComprimido, respuesta_precomprimida
+from routes.campos import lista_select, proyeccion
 
 productos_bp = Blueprint('productos', __name__)
 
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+
+def codificar_cursor(clave, id_fila):
+    """Cursor opaco con la última clave de orden (p. ej. Nombre) e id entregados"""
+    crudo = json.dumps([clave, id_fila], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor):
+    """Devuelve (clave, id) o lanza ValueError si el cursor no es válido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        clave, id_fila = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return str(clave), int(id_fila)
+    except Exception:
+        raise ValueError('Cursor inválido')
+
+def _decimal(args, nombre):
+    try:
+        return Decimal(args[nombre])
+    except InvalidOperation:
+        raise ValueError(f'{nombre} debe ser numérico')
+
+# Whitelist de ?fields= para los endpoints de lectura de productos
+COLUMNAS_PRODUCTO = {
+    'Id_Producto': 'p.Id_Producto',
+    'Nombre': 'p.Nombre',
+    'Descripcion': 'p.Descripcion',
+    'Fecha_Vencimiento': 'p.Fecha_Vencimiento',
+    'Cantidad': 'p.Cantidad',
+    'Valor_Unitario': 'p.Valor_Unitario',
+    'Id_Linea': 'p.Id_Linea',
+    'linea_nombre': 'lp.Nombre as linea_nombre'
+}
+
+JOIN_LINEA = 'LEFT JOIN linea_producto lp ON p.Id_Linea = lp.Id_Linea'
+
+def _proyeccion_productos(args, obligatorias=('Id_Producto',), con_linea=True):
+    """(lista SELECT, JOIN) según ?fields=; el JOIN con línea solo si se pidió linea_nombre"""
+    campos = proyeccion(args.get('fields'), COLUMNAS_PRODUCTO, obligatorias)
+    if campos is None:
+        return ('p.*, lp.Nombre as linea_nombre', JOIN_LINEA) if con_linea else ('p.*', '')
+    return lista_select(campos, COLUMNAS_PRODUCTO), JOIN_LINEA if 'linea_nombre' in campos else ''
+
+def _filtros_productos(args):
+    """Traduce los filtros de la query string a condiciones SQL y parámetros"""
+    condiciones = []
+    params = []
+
+    if args.get('linea'):
+        condiciones.append("p.Id_Linea = %s")
+        params.append(int(args['linea']))
+    if args.get('precio_min'):
+        condiciones.append("p.Valor_Unitario >= %s")
+        params.append(_decimal(args, 'precio_min'))
+    if args.get('precio_max'):
+        condiciones.append("p.Valor_Unitario <= %s")
+        params.append(_decimal(args, 'precio_max'))
+    if args.get('en_stock', '').lower() in ('1', 'true', 'si', 'sí'):
+        condiciones.append("p.Cantidad > 0")
+
+    return condiciones, params
+
+def consulta_pagina_productos(args):
+    """(sql, params, limite) de una página del catálogo; ValueError si los parámetros no son válidos"""
+    limite = min(int(args.get('limit', LIMITE_POR_DEFECTO)), LIMITE_MAXIMO)
+    if limite < 1:
+        raise ValueError('limit debe ser mayor que 0')
+    # Nombre e Id_Producto arman el next_cursor: van aunque ?fields= no los pida
+    columnas, join = _proyeccion_productos(args, ('Id_Producto', 'Nombre'))
+    condiciones, params = _filtros_productos(args)
+    if args.get('cursor'):
+        nombre, id_producto = decodificar_cursor(args['cursor'])
+        condiciones.append("(p.Nombre > %s OR (p.Nombre = %s AND p.Id_Producto > %s))")
+        params.extend([nombre, nombre, id_producto])
+    
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    # Se pide una fila extra para saber si existe una página siguiente
+    sql = f"""
+        SELECT {columnas} 
+        FROM producto p 
+        {join}
+        {where}
+        ORDER BY p.Nombre, p.Id_Producto
+        LIMIT %s
+    """
+    return sql, (*params, limite + 1), limite
+
+def pagina_productos(productos, limite):
+    """Cuerpo de la respuesta de GET /productos a partir de las limite + 1 filas leídas"""
+    siguiente = None
+    if len(productos) > limite:
+        productos = productos[:limite]
+        ultimo = productos[-1]
+        siguiente = codificar_cursor(ultimo['Nombre'], ultimo['Id_Producto'])
+    return {
+        'success': True,
+        'productos': productos,
+        'total': len(productos),
+        'limit': limite,
+        'next_cursor': siguiente
+    }
+
+# Respuestas GET cacheables ya serializadas: sus variantes gzip/br se calculan una vez por
+# cambio y no una vez por request. Las escrituras de este proceso invalidan; el TTL cubre
+# las de otros procesos.
+cache_respuestas = CacheTTL(
+    max_entradas=int(os.getenv('RESPUESTAS_CACHE_MAX', 256)),
+    ttl=float(os.getenv('RESPUESTAS_CACHE_TTL', 30))
+)
+
+def cuerpo_json(cuerpo):
+    """CuerpoComprimido con el JSON que produciría jsonify(cuerpo)"""
+    return CuerpoComprimido(current_app.json.response(cuerpo).get_data())
+
+def clave_pagina(args):
+    """Clave de cache de una página del catálogo a partir de los pares (nombre, valor) de la query"""
+    return ('productos', tuple(sorted(args)))
+
+def invalidar_catalogo():
+    """Hook de invalidación: llamar tras cambiar productos, precios o stock"""
+    cache_respuestas.invalidar()
+
 @productos_bp.route('/productos', methods=['GET'])
 def get_productos():
-    """Obtener todos los productos"""
+    """Obtener productos paginados por cursor (?limit=&cursor=&linea=&precio_min=&precio_max=&en_stock=&fields=)
+    o un lote por id con ?ids=1,2,3"""
     try:
+        formato = request.args.get('format')
+        if formato:
+            return exportar_productos(formato)
+        if request.args.get('ids') is not None:
+            return responder_lote(request.args['ids'].split(','))
+        
+        try:
+            sql, params, limite = consulta_pagina_productos(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Parámetros inválidos: {str(e)}'
+            }), 400
+        
+        clave = clave_pagina(request.args.items(multi=True))
+        cuerpo = cache_respuestas.get(clave)
+        if cuerpo is None:
+            db = get_db()
+            if not db:
+                return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
+            
+            with db.cursor() as cursor:
+                cursor.execute(sql, params)
+                cuerpo = cuerpo_json(pagina_productos(cursor.fetchall(), limite))
+            cache_respuestas.set(clave, cuerpo)
+        return respuesta_precomprimida(cuerpo)
+            
+    except Exception as e:
+        return jsonify({
+            'success': False, 
+            'message': f'Error al obtener productos: {str(e)}'
+        }), 500
+
+def exportar_productos(formato):
+    """Exporta el catálogo filtrado completo en streaming (?format=ndjson|csv)"""
+    if formato not in FORMATOS_EXPORTACION:
+        return formato_invalido(formato)
+    try:
+        columnas, join = _proyeccion_productos(request.args)
+        condiciones, params = _filtros_productos(request.args)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
+    
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    return respuesta_exportacion(f"""
+        SELECT {columnas} 
+        FROM producto p 
+        {join}
+        {where}
+        ORDER BY p.Nombre, p.Id_Producto
+    """, params, formato, 'productos')
+
+# Índice de búsqueda: se actualiza al crear/editar y se recarga completo cada BUSQUEDA_REFRESCO
+# segundos para incorporar cambios hechos por otros procesos
+indice_productos = IndiceProductos()
+BUSQUEDA_REFRESCO = float(os.getenv('BUSQUEDA_REFRESCO', 300))
+_carga_indice = threading.Lock()
+
+def _cargar_indice(db):
+    """Lee el catálogo y reemplaza el índice; el llamador tiene _carga_indice"""
+    marca = indice_productos.comenzar_reconstruccion()
+    with db.cursor() as cursor:
+        cursor.execute("SELECT Id_Producto, Nombre, Descripcion FROM producto")
+        indice_productos.reconstruir(cursor.fetchall(), marca)
+
+def _recargar_en_fondo():
+    try:
+        db = get_db_connection()
+        if not db:
+            return
+        try:
+            _cargar_indice(db)
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"❌ Error al recargar el índice de búsqueda: {e}")
+    finally:
+        _carga_indice.release()
+
+def _indice_vigente(db):
+    """Índice listo para buscar: solo la primera carga bloquea la request; las recargas
+    corren en un hilo y mientras tanto se sigue usando el índice anterior"""
+    if not indice_productos.listo:
+        with _carga_indice:
+            if not indice_productos.listo:
+                _cargar_indice(db)
+    elif indice_productos.vencido(BUSQUEDA_REFRESCO) and _carga_indice.acquire(blocking=False):
+        try:
+            threading.Thread(target=_recargar_en_fondo, name='recarga-busqueda', daemon=True).start()
+        except Exception:
+            _carga_indice.release()
+            raise
+    return indice_productos
+
+@productos_bp.route('/productos/search', methods=['GET'])
+def search_productos():
+    """Buscar productos por nombre/descripción con autocompletado (?q=&limit=&fields=)"""
+    try:
+        consulta = request.args.get('q', '').strip()
+        if not consulta:
+            return jsonify({
+                'success': False,
+                'message': 'El parámetro q es requerido'
+            }), 400
+        try:
+            limite = min(max(int(request.args.get('limit', 10)), 1), 50)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'limit debe ser un entero'
+            }), 400
+        try:
+            columnas, join = _proyeccion_productos(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Parámetros inválidos: {str(e)}'
+            }), 400
+        
         db = get_db()
         if not db:
             return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
         
-        with db.cursor() as cursor:
-            # Obtener productos con información de línea de producto
-            cursor.execute("""
-                SELECT p.*, lp.Nombre as linea_nombre 
-                FROM producto p 
-                LEFT JOIN linea_producto lp ON p.Id_Linea_Producto = lp.Id_Linea_Producto
-                ORDER BY p.Nombre
-            """)
-            productos = cursor.fetchall()
+        resultados = _indice_vigente(db).buscar(consulta, limite)
+        productos = []
+        if resultados:
+            relevancia = dict(resultados)
+            with db.cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT {columnas} 
+                    FROM producto p 
+                    {join}
+                    WHERE p.Id_Producto IN ({', '.join(['%s'] * len(relevancia))})
+                """, list(relevancia))
+                por_id = {fila['Id_Producto']: fila for fila in cursor.fetchall()}
+            for id_producto, puntaje in resultados:
+                if id_producto in por_id:
+                    productos.append({**por_id[id_producto], 'relevancia': puntaje})
+        
+        return jsonify({
+            'success': True,
+            'productos': productos,
+            'total': len(productos)
+        }), 200
             
-            return jsonify({
-                'success': True,
-                'productos': productos,
-                'total': len(productos)
-            }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False, 
+            'message': f'Error al buscar productos: {str(e)}'
+        }), 500
+
+def consulta_producto(args, id):
+    """(sql, params) de GET /productos/<id>; ValueError si ?fields= no es válido"""
+    columnas, join = _proyeccion_productos(args, con_linea=False)
+    return f"SELECT {columnas} FROM producto p {join} WHERE p.Id_Producto = %s", (id,)
+
+# Lectura por lote (carrito, pedidos): un IN (...) por chunk en lugar de un GET por producto
+LOTE_MAXIMO = int(os.getenv('LOTE_MAXIMO', 500))
+LOTE_CHUNK = int(os.getenv('LOTE_CHUNK', 200))
+
+def ids_lote(valores):
+    """Ids enteros sin repetir en el orden pedido; ValueError si no son válidos"""
+    if not isinstance(valores, list):
+        raise ValueError('ids debe ser una lista de enteros')
+    try:
+        ids = list(dict.fromkeys(int(str(valor).strip()) for valor in valores if str(valor).strip()))
+    except ValueError:
+        raise ValueError('ids debe ser una lista de enteros')
+    if not ids:
+        raise ValueError('ids no puede estar vacío')
+    if len(ids) > LOTE_MAXIMO:
+        raise ValueError(f'Máximo {LOTE_MAXIMO} ids por lote')
+    return ids
+
+def consultas_lote(args, ids):
+    """[(sql, params)] con un IN (...) por cada LOTE_CHUNK ids; misma forma que GET /productos/<id>"""
+    columnas, join = _proyeccion_productos(args, con_linea=False)
+    consultas = []
+    for inicio in range(0, len(ids), LOTE_CHUNK):
+        chunk = ids[inicio:inicio + LOTE_CHUNK]
+        consultas.append((
+            f"SELECT {columnas} FROM producto p {join} "
+            f"WHERE p.Id_Producto IN ({', '.join(['%s'] * len(chunk))})",
+            chunk
+        ))
+    return consultas
+
+def cuerpo_lote(ids, filas):
+    """Productos en el orden pedido y los ids que no existen"""
+    por_id = {fila['Id_Producto']: fila for fila in filas}
+    return {
+        'success': True,
+        'productos': [por_id[id_producto] for id_producto in ids if id_producto in por_id],
+        'total': len(por_id),
+        'faltantes': [id_producto for id_producto in ids if id_producto not in por_id]
+    }
+
+def responder_lote(valores):
+    try:
+        ids = ids_lote(valores)
+        consultas = consultas_lote(request.args, ids)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Parámetros inválidos: {str(e)}'
+        }), 400
+    
+    db = get_db()
+    if not db:
+        return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
+    
+    filas = []
+    with db.cursor() as cursor:
+        for sql, params in consultas:
+            cursor.execute(sql, params)
+            filas.extend(cursor.fetchall())
+    return jsonify(cuerpo_lote(ids, filas)), 200
+
+@productos_bp.route('/productos/lote', methods=['POST'])
+def get_productos_lote():
+    """Varios productos por id en una request: {"ids": [3, 1, 2]} (?fields= opcional)"""
+    try:
+        data = request.get_json(silent=True)
+        valores = data.get('ids') if isinstance(data, dict) else data
+        return responder_lote(valores)
             
     except Exception as e:
         return jsonify({
@@ -35,14 +380,22 @@ def get_productos():
 
 @productos_bp.route('/productos/<int:id>', methods=['GET'])
 def get_producto(id):
-    """Obtener un producto específico"""
+    """Obtener un producto específico (?fields= para elegir columnas)"""
     try:
+        try:
+            sql, params = consulta_producto(request.args, id)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Parámetros inválidos: {str(e)}'
+            }), 400
+        
         db = get_db()
         if not db:
             return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
         
         with db.cursor() as cursor:
-            cursor.execute("SELECT * FROM producto WHERE Id_Producto = %s", (id,))
+            cursor.execute(sql, params)
             producto = cursor.fetchone()
             
             if producto:
@@ -80,17 +433,23 @@ def create_producto():
         
         with db.cursor() as cursor:
             cursor.execute("""
-                INSERT INTO producto (Nombre, Descripcion, Precio, Stock, Id_Linea_Producto)
+                INSERT INTO producto (Nombre, Descripcion, Valor_Unitario, Cantidad, Id_Linea)
                 VALUES (%s, %s, %s, %s, %s)
             """, (
                 data['nombre'],
                 data.get('descripcion', ''),
                 data['precio'],
                 data.get('stock', 0),
-                data.get('id_linea_producto', 1)
+                data.get('id_linea', data.get('id_linea_producto', 1))
             ))
             
             db.commit()
+            invalidar_catalogo()
+            indice_productos.agregar({
+                'Id_Producto': cursor.lastrowid,
+                'Nombre': data['nombre'],
+                'Descripcion': data.get('descripcion', '')
+            })
             return jsonify({
                 'success': True, 
                 'message': 'Producto creado exitosamente',
@@ -103,34 +462,144 @@ def create_producto():
             'message': f'Error al crear producto: {str(e)}'
         }), 500
 
+@productos_bp.route('/productos/importar', methods=['POST'])
+def importar():
+    """Importación masiva (solo admin): arreglo JSON o CSV, ?upsert=nombre|id"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        if not usuario_actual or usuario_actual.get('rol') != 'admin':
+            return jsonify({
+                'success': False,
+                'message': 'No autorizado. Se requiere rol de administrador'
+            }), 403
+        
+        upsert = request.args.get('upsert')
+        if upsert and upsert not in MODOS_UPSERT:
+            return jsonify({
+                'success': False,
+                'message': 'upsert inválido. Use "nombre" o "id"'
+            }), 400
+        
+        if 'archivo' in request.files:
+            filas = leer_csv(request.files['archivo'].stream)
+        elif request.mimetype == 'text/csv':
+            filas = leer_csv(request.stream)
+        else:
+            filas = request.get_json(silent=True)
+            if not isinstance(filas, list):
+                return jsonify({
+                    'success': False,
+                    'message': 'Se espera un arreglo JSON de productos o un archivo CSV'
+                }), 400
+        
+        db = get_db()
+        if not db:
+            return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
+        
+        resumen = importar_productos(db, filas, upsert)
+        indice_productos.invalidar()
+        invalidar_catalogo()
+        return jsonify({
+            'success': True,
+            'message': 'Importación finalizada',
+            **resumen
+        }), 200
+            
+    except Exception as e:
+        return jsonify({
+            'success': False, 
+            'message': f'Error al importar productos: {str(e)}'
+        }), 500
+
+def _version_esperada(data):
+    """Versión leída por el cliente ("version" en el JSON o If-Match); None si no la envió"""
+    valor = data.get('version', request.headers.get('If-Match'))
+    if valor is None:
+        return None
+    try:
+        return int(str(valor).strip().strip('"'))
+    except ValueError:
+        raise ValueError('version debe ser un entero')
+
 @productos_bp.route('/productos/<int:id>', methods=['PUT'])
 def update_producto(id):
-    """Actualizar producto (solo admin)"""
+    """Actualizar producto (solo admin); con "version" solo se aplica si nadie lo cambió antes"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
+        
+        if not data.get('nombre') or not data.get('precio'):
+            return jsonify({
+                'success': False,
+                'message': 'Nombre y precio son requeridos'
+            }), 400
+        
+        try:
+            version = _version_esperada(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Parámetros inválidos: {str(e)}'
+            }), 400
+        
+        columnas = {
+            'Nombre': data['nombre'],
+            'Descripcion': data.get('descripcion', ''),
+            'Valor_Unitario': data['precio'],
+            'Id_Linea': data.get('id_linea', data.get('id_linea_producto', 1))
+        }
+        # El stock solo se pisa si viene en el cuerpo (Cantidad ya excluye las unidades reservadas)
+        if 'stock' in data or 'cantidad' in data:
+            columnas['Cantidad'] = data.get('stock', data.get('cantidad'))
+        if 'fecha_vencimiento' in data:
+            columnas['Fecha_Vencimiento'] = data['fecha_vencimiento']
+        
+        sql = f"""
+            UPDATE producto 
+            SET {', '.join(f'{columna}=%s' for columna in columnas)}, Version=Version + 1
+            WHERE Id_Producto=%s
+        """
+        params = list(columnas.values()) + [id]
+        if version is not None:
+            # Compare-and-swap: sin bloqueos; si otro proceso escribió antes, 0 filas
+            sql += " AND Version=%s"
+            params.append(version)
         
         db = get_db()
         if not db:
             return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
         
         with db.cursor() as cursor:
-            cursor.execute("""
-                UPDATE producto 
-                SET Nombre=%s, Descripcion=%s, Precio=%s, Stock=%s, Id_Linea_Producto=%s
-                WHERE Id_Producto=%s
-            """, (
-                data['nombre'],
-                data.get('descripcion', ''),
-                data['precio'],
-                data.get('stock', 0),
-                data.get('id_linea_producto', 1),
-                id
-            ))
+            cursor.execute(sql, params)
             
+            if cursor.rowcount == 0:
+                db.rollback()
+                cursor.execute("SELECT Version FROM producto WHERE Id_Producto=%s", (id,))
+                actual = cursor.fetchone()
+                if not actual:
+                    return jsonify({
+                        'success': False,
+                        'message': 'Producto no encontrado'
+                    }), 404
+                return jsonify({
+                    'success': False,
+                    'message': 'El producto cambió desde que se leyó; vuelva a consultarlo',
+                    'version': actual['Version']
+                }), 409
+            
+            if version is None:
+                cursor.execute("SELECT Version FROM producto WHERE Id_Producto=%s", (id,))
+                version = cursor.fetchone()['Version'] - 1
             db.commit()
+            invalidar_catalogo()
+            indice_productos.agregar({
+                'Id_Producto': id,
+                'Nombre': data['nombre'],
+                'Descripcion': data.get('descripcion', '')
+            })
             return jsonify({
                 'success': True, 
-                'message': 'Producto actualizado exitosamente'
+                'message': 'Producto actualizado exitosamente',
+                'version': version + 1
             }), 200
             
     except Exception as e:
@@ -139,24 +608,57 @@ def update_producto(id):
             'message': f'Error al actualizar producto: {str(e)}'
         }), 500
 
+# Datos de referencia: cambian casi nunca y se consultan en cada carga del catálogo
+cache_referencia = CacheTTL(
+    max_entradas=int(os.getenv('REFERENCIA_CACHE_MAX', 64)),
+    ttl=float(os.getenv('REFERENCIA_CACHE_TTL', 300))
+)
+
+CONSULTAS_REFERENCIA = {
+    'lineas': "SELECT * FROM linea_producto ORDER BY Nombre",
+    'municipios': "SELECT * FROM municipio ORDER BY Nombre",
+    'departamentos': """
+        SELECT d.*, m.Nombre as municipio_nombre 
+        FROM departamento d 
+        LEFT JOIN municipio m ON d.Id_Municipio = m.Id_Municipio
+        ORDER BY d.Nombre
+    """
+}
+
+def _obtener_referencia(nombre):
+    """Lee una tabla de referencia desde el cache o, si no está, desde MySQL"""
+    def cargar():
+        db = get_db()
+        if not db:
+            raise ConnectionError('Error de conexión a BD')
+        with db.cursor() as cursor:
+            cursor.execute(CONSULTAS_REFERENCIA[nombre])
+            return cursor.fetchall()
+    return cache_referencia.obtener(nombre, cargar)
+
+def invalidar_referencia(nombre=None):
+    """Hook de invalidación: llamar tras modificar líneas, municipios o departamentos"""
+    cache_referencia.invalidar(nombre)
+    if nombre in (None, 'lineas'):
+        cache_respuestas.invalidar(('lineas',))
+
 @productos_bp.route('/lineas-producto', methods=['GET'])
 def get_lineas():
     """Obtener todas las líneas de producto"""
     try:
-        db = get_db()
-        if not db:
-            return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
-        
-        with db.cursor() as cursor:
-            cursor.execute("SELECT * FROM linea_producto ORDER BY Nombre")
-            lineas = cursor.fetchall()
-            
-            return jsonify({
+        cuerpo = cache_respuestas.get(('lineas',))
+        if cuerpo is None:
+            lineas = _obtener_referencia('lineas')
+            cuerpo = cuerpo_json({
                 'success': True,
                 'lineas': lineas,
                 'total': len(lineas)
-            }), 200
+            })
+            cache_respuestas.set(('lineas',), cuerpo, ttl=cache_referencia.ttl)
+        return respuesta_precomprimida(cuerpo)
             
+    except ConnectionError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
     except Exception as e:
         return jsonify({
             'success': False, 
@@ -167,20 +669,15 @@ def get_lineas():
 def get_municipios():
     """Obtener todos los municipios"""
     try:
-        db = get_db()
-        if not db:
-            return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
-        
-        with db.cursor() as cursor:
-            cursor.execute("SELECT * FROM municipio ORDER BY Nombre")
-            municipios = cursor.fetchall()
-            
-            return jsonify({
-                'success': True,
-                'municipios': municipios,
-                'total': len(municipios)
-            }), 200
+        municipios = _obtener_referencia('municipios')
+        return jsonify({
+            'success': True,
+            'municipios': municipios,
+            'total': len(municipios)
+        }), 200
             
+    except ConnectionError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
     except Exception as e:
         return jsonify({
             'success': False, 
@@ -191,27 +688,67 @@ def get_municipios():
 def get_departamentos():
     """Obtener todos los departamentos"""
     try:
-        db = get_db()
-        if not db:
-            return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
-        
-        with db.cursor() as cursor:
-            cursor.execute("""
-                SELECT d.*, m.Nombre as municipio_nombre 
-                FROM departamento d 
-                LEFT JOIN municipio m ON d.Id_Municipio = m.Id_Municipio
-                ORDER BY d.Nombre
-            """)
-            departamentos = cursor.fetchall()
-            
-            return jsonify({
-                'success': True,
-                'departamentos': departamentos,
-                'total': len(departamentos)
-            }), 200
+        departamentos = _obtener_referencia('departamentos')
+        return jsonify({
+            'success': True,
+            'departamentos': departamentos,
+            'total': len(departamentos)
+        }), 200
             
+    except ConnectionError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
     except Exception as e:
         return jsonify({
             'success': False, 
             'message': f'Error al obtener departamentos: {str(e)}'
-        }), 500
\ No newline at end of file
+        }), 500
+
+@productos_bp.route('/referencia', methods=['GET'])
+def get_referencia():
+    """Obtener líneas, municipios y departamentos en una sola respuesta"""
+    try:
+        return jsonify({
+            'success': True,
+            'lineas': _obtener_referencia('lineas'),
+            'municipios': _obtener_referencia('municipios'),
+            'departamentos': _obtener_referencia('departamentos')
+        }), 200
+            
+    except ConnectionError as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    except Exception as e:
+        return jsonify({
+            'success': False, 
+            'message': f'Error al obtener datos de referencia: {str(e)}'
+        }), 500
+
+@productos_bp.route('/referencia/cache', methods=['GET'])
+def get_referencia_cache():
+    """Contadores de aciertos/fallos del cache de referencia"""
+    return jsonify({
+        'success': True,
+        'cache': cache_referencia.estadisticas()
+    }), 200
+
+@productos_bp.route('/referencia/cache', methods=['DELETE'])
+def delete_referencia_cache():
+    """Invalidar el cache de referencia (solo admin, ?tabla= para una sola)"""
+    usuario_actual = obtener_usuario_actual()
+    if not usuario_actual or usuario_actual.get('rol') != 'admin':
+        return jsonify({
+            'success': False,
+            'message': 'No autorizado. Se requiere rol de administrador'
+        }), 403
+    
+    tabla = request.args.get('tabla')
+    if tabla and tabla not in CONSULTAS_REFERENCIA:
+        return jsonify({
+            'success': False,
+            'message': f'Tabla inválida: {tabla}'
+        }), 400
+    
+    invalidar_referencia(tabla)
+    return jsonify({
+        'success': True,
+        'message': 'Cache de referencia invalidado'
+    }), 200
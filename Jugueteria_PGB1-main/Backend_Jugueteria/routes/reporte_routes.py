@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify
+from datetime import date
+from Database.conexion import get_db
+from Database.reportes import resumen_ventas
+from routes.auth_routes import obtener_usuario_actual
+
+reportes_bp = Blueprint('reportes', __name__)
+
+@reportes_bp.route('/reportes/ventas', methods=['GET'])
+def get_reporte_ventas():
+    """Reporte de ventas desde las tablas de resumen (solo admin, ?desde=&hasta=&top=)"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        if not usuario_actual or usuario_actual.get('rol') != 'admin':
+            return jsonify({
+                'success': False,
+                'message': 'No autorizado. Se requiere rol de administrador'
+            }), 403
+        
+        try:
+            desde = date.fromisoformat(request.args['desde']) if request.args.get('desde') else None
+            hasta = date.fromisoformat(request.args['hasta']) if request.args.get('hasta') else None
+            top = min(max(int(request.args.get('top', 10)), 1), 100)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Parámetros inválidos: fechas AAAA-MM-DD y top entero'
+            }), 400
+        
+        db = get_db()
+        if not db:
+            return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
+        
+        return jsonify({
+            'success': True,
+            'reporte': resumen_ventas(db, desde, hasta, top)
+        }), 200
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al obtener reporte: {str(e)}'
+        }), 500
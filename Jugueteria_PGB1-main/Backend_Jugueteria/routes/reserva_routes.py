@@ -0,0 +1,217 @@
+from flask import Blueprint, request, jsonify
+import os
+import threading
+import time
+from Database.models import Reserva, ConflictoVentaError
+from routes.auth_routes import obtener_usuario_actual
+from routes.producto_routes import invalidar_catalogo
+
+reservas_bp = Blueprint('reservas', __name__)
+
+# Cada cuántos segundos el barrendero devuelve al stock las reservas vencidas
+RESERVAS_BARRIDO_SEGUNDOS = float(os.getenv('RESERVAS_BARRIDO_SEGUNDOS', 5))
+
+_barrendero_pid = None
+_barrendero_lock = threading.Lock()
+
+def barrer_reservas():
+    """Expira las reservas vencidas hasta vaciar la cola; devuelve cuántas expiró"""
+    total = 0
+    while True:
+        expiradas = Reserva.expirar_vencidas()
+        total += expiradas
+        if not expiradas:
+            break
+    if total:
+        # El stock volvió a estar disponible: las páginas del catálogo en cache ya no valen
+        invalidar_catalogo()
+    return total
+
+def _barrendero():
+    while True:
+        time.sleep(RESERVAS_BARRIDO_SEGUNDOS)
+        try:
+            expiradas = barrer_reservas()
+            if expiradas:
+                print(f"🧹 {expiradas} reservas expiradas devueltas al stock")
+        except Exception as e:
+            print(f"❌ Error en el barrido de reservas: {e}")
+
+@reservas_bp.before_app_request
+def iniciar_barrendero():
+    """Arranca el hilo de barrido en la primera request de cada proceso (también tras un fork)"""
+    global _barrendero_pid
+    if _barrendero_pid == os.getpid() or RESERVAS_BARRIDO_SEGUNDOS <= 0:
+        return
+    with _barrendero_lock:
+        if _barrendero_pid != os.getpid():
+            threading.Thread(target=_barrendero, name='barrendero-reservas', daemon=True).start()
+            _barrendero_pid = os.getpid()
+
+def _reserva_propia(reserva_id, usuario_actual):
+    """Reserva si existe y es del usuario (o es admin); None si no"""
+    reserva = Reserva.obtener(reserva_id)
+    if not reserva:
+        return None
+    if usuario_actual.get('rol') != 'admin' and reserva['Id_Usuario'] != usuario_actual.get('id'):
+        return None
+    return reserva
+
+@reservas_bp.route('/reservas', methods=['POST'])
+def create_reserva():
+    """Apartar stock por unos minutos: {"detalles": [{"producto_id", "cantidad"}], "ttl": segundos}"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        
+        if not usuario_actual:
+            return jsonify({
+                'success': False,
+                'message': 'Token inválido o expirado'
+            }), 401
+        
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            reserva, mensaje = Reserva.crear(usuario_actual['id'], data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except ConflictoVentaError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e),
+                'detalles': e.detalles
+            }), 409
+        
+        if not reserva:
+            return jsonify({'success': False, 'message': mensaje}), 500
+        
+        invalidar_catalogo()
+        return jsonify({
+            'success': True,
+            'message': mensaje,
+            'reserva': reserva
+        }), 201
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al crear reserva: {str(e)}'
+        }), 500
+
+@reservas_bp.route('/reservas/<int:id>', methods=['GET'])
+def get_reserva(id):
+    """Estado y detalle de una reserva propia"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        
+        if not usuario_actual:
+            return jsonify({
+                'success': False,
+                'message': 'Token inválido o expirado'
+            }), 401
+        
+        reserva = _reserva_propia(id, usuario_actual)
+        if not reserva:
+            return jsonify({
+                'success': False,
+                'message': 'Reserva no encontrada'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'reserva': reserva
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+@reservas_bp.route('/reservas/<int:id>/checkout', methods=['POST'])
+def checkout_reserva(id):
+    """Convertir una reserva vigente en venta"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        
+        if not usuario_actual:
+            return jsonify({
+                'success': False,
+                'message': 'Token inválido o expirado'
+            }), 401
+        
+        if not _reserva_propia(id, usuario_actual):
+            return jsonify({
+                'success': False,
+                'message': 'Reserva no encontrada'
+            }), 404
+        
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            venta, mensaje = Reserva.confirmar(id, data)
+        except ConflictoVentaError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e),
+                'detalles': e.detalles
+            }), 409
+        
+        if not venta:
+            return jsonify({'success': False, 'message': mensaje}), 500
+        
+        return jsonify({
+            'success': True,
+            'message': mensaje,
+            'venta': venta
+        }), 201
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al confirmar reserva: {str(e)}'
+        }), 500
+
+@reservas_bp.route('/reservas/<int:id>', methods=['DELETE'])
+def cancel_reserva(id):
+    """Cancelar una reserva activa y liberar sus unidades"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        
+        if not usuario_actual:
+            return jsonify({
+                'success': False,
+                'message': 'Token inválido o expirado'
+            }), 401
+        
+        if not _reserva_propia(id, usuario_actual):
+            return jsonify({
+                'success': False,
+                'message': 'Reserva no encontrada'
+            }), 404
+        
+        try:
+            ok, mensaje = Reserva.cancelar(id)
+        except ConflictoVentaError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 409
+        
+        if not ok:
+            return jsonify({'success': False, 'message': mensaje}), 500
+        
+        invalidar_catalogo()
+        return jsonify({
+            'success': True,
+            'message': mensaje
+        }), 200
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al cancelar reserva: {str(e)}'
+        }), 500
@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json de la biblioteca estándar
+    orjson = None
+
+# Formato explícito de los tipos que devuelve MySQL:
+#   DECIMAL  -> "12500.00" (texto, sin perder precisión)
+#   DATE     -> "2030-01-01"
+#   DATETIME -> "2026-10-18T16:03:08" (ISO 8601)
+# El proveedor por defecto de Flask convertía fechas a formato HTTP ("Tue, 01 Jan 2030 00:00:00 GMT")
+# mientras la exportación NDJSON usaba ISO; ahora toda la API usa ISO.
+
+def valor_json(valor):
+    """Encoder de los tipos que no son JSON nativo"""
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode('utf-8')
+    if isinstance(valor, (set, frozenset)):
+        return sorted(valor)
+    raise TypeError(f'Tipo no serializable: {type(valor).__name__}')
+
+def a_json_bytes_stdlib(obj):
+    return json.dumps(
+        obj, default=valor_json, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    ).encode('utf-8')
+
+if orjson is not None:
+    _OPCIONES_ORJSON = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def a_json_bytes(obj):
+        # orjson serializa date/datetime en ISO por su cuenta; Decimal pasa por valor_json
+        return orjson.dumps(obj, default=valor_json, option=_OPCIONES_ORJSON)
+
+    desde_json = orjson.loads
+else:
+    a_json_bytes = a_json_bytes_stdlib
+    desde_json = json.loads
+
+def a_json(obj):
+    return a_json_bytes(obj).decode('utf-8')
+
+class ProveedorJSON(JSONProvider):
+    """Proveedor de JSON de la app (jsonify, request.get_json) con orjson si está instalado"""
+
+    mimetype = 'application/json'
+    motor = 'orjson' if orjson is not None else 'json'
+    serializar = staticmethod(a_json_bytes)
+
+    def dumps(self, obj, **kwargs):
+        return self.serializar(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return desde_json(s)
+
+    def response(self, *args, **kwargs):
+        # Se arma la respuesta directo en bytes, sin pasar por str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.serializar(obj) + b'\n', mimetype=self.mimetype)
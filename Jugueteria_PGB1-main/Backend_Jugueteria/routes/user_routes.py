@@ -1,27 +1,69 @@
 from flask import Blueprint, request, jsonify
-import jwt
-import os
 from Database.conexion import get_db
+from routes.auth_routes import obtener_usuario_actual
+from routes.exportacion import FORMATOS_EXPORTACION, respuesta_exportacion, formato_invalido
+from routes.campos import lista_select, proyeccion
+from routes.producto_routes import codificar_cursor, decodificar_cursor
 
 usuarios_bp = Blueprint('usuarios', __name__)
 
-def verificar_token(token):
-    """Verificar token JWT"""
-    try:
-        secret_key = os.getenv('JWT_SECRET', 'jwt_secret_key')
-        payload = jwt.decode(token, secret_key, algorithms=['HS256'])
-        return payload
-    except:
-        return None
+# Whitelist de ?fields= (nunca incluye password)
+COLUMNAS_USUARIO = {
+    nombre: nombre for nombre in (
+        'id', 'username', 'email', 'nombre', 'apellido', 'telefono', 'direccion', 'rol', 'fecha_creacion'
+    )
+}
+
+USUARIOS_POR_PAGINA = 50
+USUARIOS_MAXIMO = 500
+
+def _columnas_usuario(args, obligatorias=('id',)):
+    """Lista SELECT según ?fields= (todas las columnas de perfil si no vino); ValueError si no es válido"""
+    campos = proyeccion(args.get('fields'), COLUMNAS_USUARIO, obligatorias)
+    return lista_select(campos or list(COLUMNAS_USUARIO), COLUMNAS_USUARIO)
+
+def consulta_usuarios(args):
+    """(sql, params, limite) de una página de GET /usuarios, del más reciente al más antiguo"""
+    limite = min(int(args.get('limit', USUARIOS_POR_PAGINA)), USUARIOS_MAXIMO)
+    if limite < 1:
+        raise ValueError('limit debe ser mayor que 0')
+    # fecha_creacion e id arman el next_cursor: van aunque ?fields= no los pida
+    columnas = _columnas_usuario(args, ('id', 'fecha_creacion'))
+    where = ''
+    params = []
+    if args.get('cursor'):
+        fecha, usuario_id = decodificar_cursor(args['cursor'])
+        where = 'WHERE (fecha_creacion < %s OR (fecha_creacion = %s AND id < %s))'
+        params = [fecha, fecha, usuario_id]
+    sql = f"""
+        SELECT {columnas}
+        FROM usuarios {where}
+        ORDER BY fecha_creacion DESC, id DESC
+        LIMIT %s
+    """
+    return sql, (*params, limite + 1), limite
+
+def consulta_usuario(args, user_id):
+    """(sql, params) de GET /usuarios/<id>; ValueError si ?fields= no es válido"""
+    return f"""
+        SELECT {_columnas_usuario(args)}
+        FROM usuarios WHERE id = %s
+    """, (user_id,)
 
-def obtener_usuario_actual():
-    """Obtener usuario actual desde el token"""
-    token = request.headers.get('Authorization', '').replace('Bearer ', '')
-    return verificar_token(token)
+def _campos_invalidos(e):
+    return jsonify({
+        'success': False,
+        'message': f'Parámetros inválidos: {str(e)}'
+    }), 400
+
+@usuarios_bp.before_request
+def cargar_usuario_actual():
+    """Decodifica el token una vez por request y deja la identidad en flask.g"""
+    obtener_usuario_actual()
 
 @usuarios_bp.route('/usuarios/perfil', methods=['GET'])
 def get_perfil():
-    """Obtener perfil del usuario actual"""
+    """Obtener perfil del usuario actual (?fields= para elegir columnas)"""
     try:
         usuario_actual = obtener_usuario_actual()
         
@@ -31,13 +73,18 @@ def get_perfil():
                 'message': 'Token inválido o expirado'
             }), 401
         
+        try:
+            columnas = _columnas_usuario(request.args)
+        except ValueError as e:
+            return _campos_invalidos(e)
+        
         db = get_db()
         if not db:
             return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
         
         with db.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, username, email, nombre, apellido, telefono, direccion, rol, fecha_creacion
+            cursor.execute(f"""
+                SELECT {columnas}
                 FROM usuarios WHERE id = %s
             """, (usuario_actual['id'],))
             
@@ -112,7 +159,7 @@ def update_perfil():
 
 @usuarios_bp.route('/usuarios', methods=['GET'])
 def get_usuarios():
-    """Obtener todos los usuarios (solo admin)"""
+    """Obtener usuarios paginados por cursor (solo admin, ?limit=&cursor=&fields=; ?format=ndjson|csv exporta todos)"""
     try:
         usuario_actual = obtener_usuario_actual()
         
@@ -129,21 +176,46 @@ def get_usuarios():
                 'message': 'No autorizado. Se requiere rol de administrador'
             }), 403
         
+        # Exportación en streaming (?format=ndjson|csv): todos los usuarios
+        formato = request.args.get('format')
+        if formato:
+            if formato not in FORMATOS_EXPORTACION:
+                return formato_invalido(formato)
+            try:
+                columnas = _columnas_usuario(request.args)
+            except ValueError as e:
+                return _campos_invalidos(e)
+            return respuesta_exportacion(f"""
+                SELECT {columnas}
+                FROM usuarios ORDER BY fecha_creacion DESC
+            """, (), formato, 'usuarios')
+        
+        try:
+            sql, params, limite = consulta_usuarios(request.args)
+        except ValueError as e:
+            return _campos_invalidos(e)
+        
         db = get_db()
         if not db:
             return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
         
         with db.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, username, email, nombre, apellido, telefono, direccion, rol, fecha_creacion
-                FROM usuarios ORDER BY fecha_creacion DESC
-            """)
+            cursor.execute(sql, params)
             usuarios = cursor.fetchall()
             
+            # Se leyó una fila extra para saber si existe una página siguiente
+            siguiente = None
+            if len(usuarios) > limite:
+                usuarios = usuarios[:limite]
+                ultimo = usuarios[-1]
+                siguiente = codificar_cursor(str(ultimo['fecha_creacion']), ultimo['id'])
+            
             return jsonify({
                 'success': True,
                 'usuarios': usuarios,
-                'total': len(usuarios)
+                'total': len(usuarios),
+                'limit': limite,
+                'next_cursor': siguiente
             }), 200
             
     except Exception as e:
@@ -154,7 +226,7 @@ def get_usuarios():
 
 @usuarios_bp.route('/usuarios/<int:user_id>', methods=['GET'])
 def get_usuario(user_id):
-    """Obtener un usuario específico (solo admin)"""
+    """Obtener un usuario específico (solo admin, ?fields=)"""
     try:
         usuario_actual = obtener_usuario_actual()
         
@@ -171,15 +243,17 @@ def get_usuario(user_id):
                 'message': 'No autorizado'
             }), 403
         
+        try:
+            sql, params = consulta_usuario(request.args, user_id)
+        except ValueError as e:
+            return _campos_invalidos(e)
+        
         db = get_db()
         if not db:
             return jsonify({'success': False, 'message': 'Error de conexión a BD'}), 500
         
         with db.cursor() as cursor:
-            cursor.execute("""
-                SELECT id, username, email, nombre, apellido, telefono, direccion, rol, fecha_creacion
-                FROM usuarios WHERE id = %s
-            """, (user_id,))
+            cursor.execute(sql, params)
             
             usuario = cursor.fetchone()
             
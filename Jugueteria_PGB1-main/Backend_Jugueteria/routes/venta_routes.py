@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+from Database.models import Venta, ConflictoVentaError
+from routes.auth_routes import obtener_usuario_actual
+from routes.producto_routes import invalidar_catalogo
+from routes.pedido_routes import VENTAS_WRITE_BEHIND, encolar_pedido
+
+ventas_bp = Blueprint('ventas', __name__)
+
+@ventas_bp.route('/ventas', methods=['POST'])
+def create_venta():
+    """Registrar una venta (checkout) descontando stock"""
+    try:
+        usuario_actual = obtener_usuario_actual()
+        
+        if not usuario_actual:
+            return jsonify({
+                'success': False,
+                'message': 'Token inválido o expirado'
+            }), 401
+        
+        data = request.get_json(silent=True) or {}
+        
+        if VENTAS_WRITE_BEHIND:
+            # Modo write-behind: el pedido queda en la cola durable y MySQL se actualiza en lotes
+            return encolar_pedido(usuario_actual, data)
+        
+        try:
+            venta, mensaje = Venta.crear(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except ConflictoVentaError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e),
+                'detalles': e.detalles
+            }), 409
+        
+        if not venta:
+            return jsonify({'success': False, 'message': mensaje}), 500
+        
+        # El stock cambió: las páginas del catálogo en cache ya no valen
+        invalidar_catalogo()
+        return jsonify({
+            'success': True,
+            'message': mensaje,
+            'venta': venta
+        }), 201
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error al crear venta: {str(e)}'
+        }), 500
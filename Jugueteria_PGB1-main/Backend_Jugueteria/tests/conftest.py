@@ -0,0 +1,102 @@
+# Tests de la API con app.test_client() sobre el backend SQLite (DB_URL=sqlite:///), sin MySQL:
+#   python -m pytest -q tests        (desde Backend_Jugueteria)
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# Las variables se fijan antes de importar la app: varios módulos leen su configuración al
+# importarse y load_dotenv() no pisa lo que ya está en el entorno
+_DIRECTORIO = tempfile.mkdtemp(prefix='jugueteria-tests-')
+os.environ['DB_URL'] = f"sqlite:///{os.path.join(_DIRECTORIO, 'jugueteria.db')}"
+os.environ['COLA_PEDIDOS_RUTA'] = os.path.join(_DIRECTORIO, 'cola_pedidos.db')
+os.environ['LIMITES_ACTIVOS'] = 'false'
+os.environ['BCRYPT_ROUNDS'] = '4'
+# Sin barrendero de reservas en segundo plano: los tests barren a mano
+os.environ['RESERVAS_BARRIDO_SEGUNDOS'] = '0'
+os.environ['VENTAS_WRITE_BEHIND'] = 'false'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Database.conexion import get_db_connection, init_db  # noqa: E402
+from Database.models import Usuario  # noqa: E402
+
+PASSWORD = 'clave123'
+
+@pytest.fixture(scope='session')
+def app():
+    assert init_db()
+    from app import create_app
+    from routes import pedido_routes
+    aplicacion = create_app({'TESTING': True})
+    # Sin worker de pedidos en segundo plano: los tests drenan la cola con drenar_pedidos()
+    pedido_routes._worker_pid = os.getpid()
+    return aplicacion
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _crear_usuario(client, rol='cliente'):
+    username = f'{rol}_{uuid.uuid4().hex[:8]}'
+    usuario, mensaje = Usuario.crear_usuario({
+        'username': username,
+        'email': f'{username}@test.com',
+        'password': PASSWORD,
+        'rol': rol
+    })
+    assert usuario, mensaje
+    respuesta = client.post('/api/auth/login', json={'username': username, 'password': PASSWORD})
+    assert respuesta.status_code == 200, respuesta.get_json()
+    return {'Authorization': f"Bearer {respuesta.get_json()['token']}"}
+
+@pytest.fixture
+def cliente(client):
+    """Encabezados de un usuario cliente nuevo"""
+    return _crear_usuario(client)
+
+@pytest.fixture
+def otro_cliente(client):
+    return _crear_usuario(client)
+
+@pytest.fixture
+def admin(client):
+    return _crear_usuario(client, rol='admin')
+
+def consultar(sql, params=()):
+    db = get_db_connection()
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+    finally:
+        db.close()
+
+def ejecutar(sql, params=()):
+    db = get_db_connection()
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(sql, params)
+            ultimo = cursor.lastrowid
+        db.commit()
+        return ultimo
+    finally:
+        db.close()
+
+@pytest.fixture
+def producto(app):
+    """Fábrica de productos: producto(cantidad=5, precio=10) -> Id_Producto"""
+    if not consultar("SELECT Id_Linea FROM linea_producto WHERE Id_Linea = 1"):
+        ejecutar("INSERT INTO linea_producto (Id_Linea, Nombre) VALUES (1, 'Pruebas')")
+
+    def crear(cantidad=5, precio=10):
+        return ejecutar(
+            "INSERT INTO producto (Nombre, Descripcion, Valor_Unitario, Cantidad, Id_Linea) VALUES (%s, %s, %s, %s, 1)",
+            (f'Juguete {uuid.uuid4().hex[:8]}', 'prueba', precio, cantidad)
+        )
+    return crear
+
+def stock(producto_id):
+    return consultar("SELECT Cantidad FROM producto WHERE Id_Producto = %s", (producto_id,))[0]['Cantidad']
@@ -0,0 +1,12 @@
+import pytest
+
+asgi = pytest.importorskip('asgi')
+
+@pytest.mark.parametrize('query', [b'limit=5&limit=50', b'linea=1&linea=2&limit=3', b'format=&format=csv'])
+def test_parametros_repetidos_como_flask(app, query):
+    ruta = asgi._ruta_async({'method': 'GET', 'path': '/api/productos', 'query_string': query})
+    with app.test_request_context(f"/api/productos?{query.decode()}"):
+        from flask import request
+        esperado = {clave: request.args.get(clave) for clave in request.args}
+    assert ruta is not None
+    assert ruta[2][0] == esperado
@@ -0,0 +1,11 @@
+from routes import contrasenas
+
+def test_bcrypt_workers_se_lee_al_crear_el_executor(monkeypatch):
+    # gunicorn.conf.py fija BCRYPT_WORKERS después de importar la app (python app.py)
+    monkeypatch.setenv('BCRYPT_WORKERS', '1')
+    monkeypatch.setattr(contrasenas, '_executor_pid', None)
+    hashed = contrasenas.hashear_password('clave123')
+    assert contrasenas.verificar_password('clave123', hashed)
+    assert contrasenas._executor._max_workers == 1
+    assert contrasenas.estadisticas()['workers'] == 1
+    monkeypatch.setattr(contrasenas, '_executor_pid', None)
@@ -0,0 +1,47 @@
+import uuid
+
+from conftest import consultar
+
+def _importar(client, admin, filas, upsert):
+    respuesta = client.post(f'/api/productos/importar?upsert={upsert}', headers=admin, json=filas)
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+def _fila(producto_id):
+    return consultar(
+        "SELECT Nombre, Descripcion, Cantidad, Valor_Unitario, Id_Linea, Version FROM producto WHERE Id_Producto = %s",
+        (producto_id,)
+    )[0]
+
+def test_upsert_solo_pisa_las_columnas_presentes(client, admin, producto):
+    producto_id = producto(cantidad=7, precio=10)
+    antes = _fila(producto_id)
+    resumen = _importar(client, admin, [{'id': producto_id, 'nombre': antes['Nombre'], 'precio': 12}], 'id')
+    assert resumen['actualizados'] == 1
+    despues = _fila(producto_id)
+    assert despues['Cantidad'] == 7
+    assert despues['Descripcion'] == antes['Descripcion']
+    assert despues['Id_Linea'] == antes['Id_Linea']
+    assert float(despues['Valor_Unitario']) == 12
+    assert despues['Version'] == antes['Version'] + 1
+
+def test_upsert_por_id_inexistente_se_reporta(client, admin):
+    total = consultar("SELECT COUNT(*) AS n FROM producto")[0]['n']
+    resumen = _importar(client, admin, [{'id': 999999, 'nombre': 'Fantasma', 'precio': 1}], 'id')
+    assert resumen['insertados'] == 0
+    assert resumen['errores'] == [{'fila': 1, 'errores': ['id 999999 no existe']}]
+    assert consultar("SELECT COUNT(*) AS n FROM producto")[0]['n'] == total
+
+def test_upsert_por_nombre_inserta_con_valores_por_defecto(client, admin, producto):
+    producto()
+    nombre = f'Pelota {uuid.uuid4().hex[:8]}'
+    resumen = _importar(client, admin, [
+        {'nombre': nombre, 'precio': 5},
+        # Mismo nombre con otras mayúsculas dentro del lote: es el mismo producto
+        {'nombre': nombre.upper(), 'precio': 6}
+    ], 'nombre')
+    assert resumen['insertados'] == 1
+    fila = consultar("SELECT Cantidad, Valor_Unitario FROM producto WHERE Nombre IN (%s, %s)", (nombre, nombre.upper()))
+    assert len(fila) == 1
+    assert fila[0]['Cantidad'] == 0
+    assert float(fila[0]['Valor_Unitario']) == 6
@@ -0,0 +1,68 @@
+import pytest
+
+from routes import limites
+
+@pytest.fixture
+def activar_limites(monkeypatch):
+    """Activa los límites con un tope en curso y sobrescrituras LIMITE_* nuevas"""
+    def activar(en_curso=200, **entorno):
+        for clave, valor in entorno.items():
+            monkeypatch.setenv(clave, valor)
+        monkeypatch.setattr(limites, 'LIMITES_ACTIVOS', True)
+        monkeypatch.setattr(limites, 'LIMITE_EN_CURSO', en_curso)
+        monkeypatch.setattr(limites, 'admision', limites._Admision())
+        return limites.admision
+    return activar
+
+def test_parsear_limite():
+    assert limites.parsear_limite('10/m') == (10, 10 / 60)
+    assert limites.parsear_limite('5') == (5, 5)
+    assert limites.parsear_limite('') is None
+    assert limites.parsear_limite('0') is None
+    with pytest.raises(ValueError):
+        limites.parsear_limite('10/dia')
+
+def test_rafaga_excedida_responde_429(client, producto, activar_limites):
+    producto_id = producto()
+    activar_limites(LIMITE_PRODUCTOS_GET_PRODUCTO_IP='2/h')
+    estados = [client.get(f'/api/productos/{producto_id}').status_code for _ in range(3)]
+    assert estados == [200, 200, 429]
+    respuesta = client.get(f'/api/productos/{producto_id}')
+    assert int(respuesta.headers['Retry-After']) >= 1
+
+def test_tope_en_curso_responde_503_sin_gastar_fichas(client, producto, activar_limites):
+    producto_id = producto()
+    admision = activar_limites(en_curso=1, LIMITE_PRODUCTOS_GET_PRODUCTO_IP='1/h')
+    assert admision.tomar()
+    try:
+        respuesta = client.get(f'/api/productos/{producto_id}')
+        assert respuesta.status_code == 503
+        assert respuesta.headers['Retry-After'] == '1'
+        # El monitoreo sigue respondiendo con el proceso saturado
+        assert client.get('/api/health').status_code == 200
+    finally:
+        admision.liberar()
+    # La única ficha sigue disponible después de los 503
+    assert client.get(f'/api/productos/{producto_id}').status_code == 200
+    assert client.get(f'/api/productos/{producto_id}').status_code == 429
+
+def test_streaming_ocupa_su_lugar_hasta_cerrar(client, admin, producto, activar_limites):
+    producto_id = producto()
+    admision = activar_limites(en_curso=1)
+    respuesta = client.get('/api/usuarios?format=csv', headers=admin, buffered=False)
+    assert respuesta.status_code == 200
+    assert client.get(f'/api/productos/{producto_id}').status_code == 503
+    assert b''.join(respuesta.response).startswith(b'id,')
+    respuesta.close()
+    respuesta.close()
+    assert client.get(f'/api/productos/{producto_id}').status_code == 200
+    # El semáforo quedó con su único lugar libre (liberar de más lanzaría ValueError)
+    assert admision.tomar()
+    admision.liberar()
+
+def test_limite_por_usuario(client, cliente, producto, activar_limites):
+    producto_id = producto(cantidad=10)
+    activar_limites(LIMITE_VENTAS_CREATE_VENTA_USUARIO='1/h')
+    venta = {'detalles': [{'producto_id': producto_id, 'cantidad': 1}]}
+    assert client.post('/api/ventas', headers=cliente, json=venta).status_code == 201
+    assert client.post('/api/ventas', headers=cliente, json=venta).status_code == 429
@@ -0,0 +1,89 @@
+import uuid
+
+import pytest
+
+from conftest import consultar, stock
+from Database.models import Venta
+from routes.pedido_routes import drenar_pedidos
+
+def _pedido(producto_id, cantidad=1, pedido_id=None):
+    return {
+        'pedido_id': pedido_id or uuid.uuid4().hex,
+        'detalles': [{'producto_id': producto_id, 'cantidad': cantidad}]
+    }
+
+def _drenar():
+    while drenar_pedidos():
+        pass
+
+def test_pedido_repetido_se_aplica_una_vez(client, cliente, producto):
+    producto_id = producto(cantidad=5)
+    pedido = _pedido(producto_id, 2)
+    primera = client.post('/api/pedidos', headers=cliente, json=pedido)
+    segunda = client.post('/api/pedidos', headers=cliente, json=pedido)
+    assert primera.status_code == segunda.status_code == 202
+    assert primera.get_json()['message'] == 'Pedido recibido'
+    assert segunda.get_json()['message'] == 'Pedido ya recibido'
+
+    _drenar()
+    estado = client.get(f"/api/pedidos/{pedido['pedido_id']}", headers=cliente).get_json()['pedido']
+    assert estado['estado'] == 'procesado'
+    assert stock(producto_id) == 3
+
+def test_reintento_despues_del_commit_no_duplica(client, cliente, producto):
+    # El worker cae entre el commit en la base y completar() en la cola: el lote se reintenta
+    producto_id = producto(cantidad=5)
+    pedido = _pedido(producto_id)
+    client.post('/api/pedidos', headers=cliente, json=pedido)
+    _drenar()
+    estado = client.get(f"/api/pedidos/{pedido['pedido_id']}", headers=cliente).get_json()['pedido']
+    ventas = consultar("SELECT COUNT(*) AS n FROM venta")[0]['n']
+
+    clave = (estado['usuario_id'], pedido['pedido_id'])
+    resultados = Venta.aplicar_pedidos([(clave, {'usuario_id': clave[0], 'detalles': pedido['detalles']})])
+    assert resultados[clave]['Id_Venta'] == estado['venta_id']
+    assert consultar("SELECT COUNT(*) AS n FROM venta")[0]['n'] == ventas
+    assert stock(producto_id) == 4
+
+def test_mismo_pedido_id_de_otro_usuario_no_se_descarta(client, cliente, otro_cliente, producto):
+    producto_id = producto(cantidad=5)
+    pedido = _pedido(producto_id)
+    assert client.post('/api/pedidos', headers=cliente, json=pedido).get_json()['message'] == 'Pedido recibido'
+    assert client.post('/api/pedidos', headers=otro_cliente, json=pedido).get_json()['message'] == 'Pedido recibido'
+    _drenar()
+
+    propio = client.get(f"/api/pedidos/{pedido['pedido_id']}", headers=cliente).get_json()['pedido']
+    ajeno = client.get(f"/api/pedidos/{pedido['pedido_id']}", headers=otro_cliente).get_json()['pedido']
+    assert propio['estado'] == ajeno['estado'] == 'procesado'
+    assert propio['venta_id'] != ajeno['venta_id']
+    assert stock(producto_id) == 3
+
+def test_pedido_sin_stock_se_rechaza_sin_tumbar_el_lote(client, cliente, producto):
+    agotado = producto(cantidad=0)
+    disponible = producto(cantidad=1)
+    rechazado = _pedido(agotado)
+    aceptado = _pedido(disponible)
+    client.post('/api/pedidos', headers=cliente, json=rechazado)
+    client.post('/api/pedidos', headers=cliente, json=aceptado)
+    _drenar()
+    assert client.get(f"/api/pedidos/{rechazado['pedido_id']}", headers=cliente).get_json()['pedido']['estado'] == 'rechazado'
+    assert client.get(f"/api/pedidos/{aceptado['pedido_id']}", headers=cliente).get_json()['pedido']['estado'] == 'procesado'
+    assert stock(disponible) == 0
+
+def test_pedido_id_invalido(client, cliente, producto):
+    respuesta = client.post('/api/pedidos', headers=cliente, json=_pedido(producto(), pedido_id='no válido'))
+    assert respuesta.status_code == 400
+
+def test_error_en_completar_no_deja_la_transaccion_abierta(tmp_path):
+    from Database.cola_pedidos import ColaPedidos
+    cola = ColaPedidos(str(tmp_path / 'cola.db'))
+    cola.agregar(1, 'a', {'usuario_id': 1, 'detalles': []})
+    lote = cola.tomar(10)
+    with pytest.raises(KeyError):
+        # Resultado incompleto: falla entre BEGIN y COMMIT
+        cola.completar({lote[0][0]: {'Estado': 'procesado'}})
+    with pytest.raises(ValueError):
+        cola.reintentar([(1, 'a', 'sobra')], 'error')
+    # La conexión del hilo sigue usable
+    cola.completar({lote[0][0]: {'Estado': 'procesado', 'Id_Venta': 7, 'Mensaje': None}})
+    assert cola.estado(1, 'a')['estado'] == 'procesado'
@@ -0,0 +1,60 @@
+import pytest
+
+from Database.conexion import PoolAgotadoError, PoolConexiones, _crear_conexion, estadisticas_pool
+
+def test_cada_request_devuelve_su_conexion(client, producto):
+    producto_id = producto()
+    for _ in range(5):
+        assert client.get(f'/api/productos/{producto_id}').status_code == 200
+    estadisticas = estadisticas_pool()
+    assert estadisticas['en_uso'] == 0
+    assert estadisticas['abiertas'] <= estadisticas['tamano']
+
+def test_exportacion_cerrada_sin_leer_libera_la_conexion(client, admin):
+    respuesta = client.get('/api/usuarios?format=csv', headers=admin, buffered=False)
+    assert respuesta.status_code == 200
+    assert respuesta.is_streamed
+    respuesta.close()
+    respuesta.close()
+    assert estadisticas_pool()['en_uso'] == 0
+
+def test_pool_agotado_espera_y_falla():
+    pool = PoolConexiones(_crear_conexion, tamano=1, espera=0.05)
+    prestada = pool.obtener()
+    with pytest.raises(PoolAgotadoError):
+        pool.obtener()
+    prestada.close()
+    # close() es idempotente: no devuelve dos veces la misma conexión
+    prestada.close()
+    assert pool.estadisticas() == {'tamano': 1, 'abiertas': 1, 'libres': 1, 'en_uso': 0}
+    pool.obtener().close()
+
+def test_pool_reutiliza_la_conexion_mas_reciente():
+    pool = PoolConexiones(_crear_conexion, tamano=2)
+    primera = pool.obtener()
+    fisica = primera._conn
+    primera.close()
+    segunda = pool.obtener()
+    assert segunda._conn is fisica
+    segunda.close()
+
+def test_pool_recicla_conexiones_vencidas():
+    pool = PoolConexiones(_crear_conexion, tamano=1, vida_maxima=0)
+    primera = pool.obtener()
+    fisica = primera._conn
+    primera.close()
+    # Con vida máxima vencida se cierra al devolverla y la siguiente es una conexión nueva
+    assert pool.estadisticas()['abiertas'] == 0
+    segunda = pool.obtener()
+    assert segunda._conn is not fisica
+    with segunda.cursor() as cursor:
+        cursor.execute("SELECT 1 AS uno")
+        assert cursor.fetchone()['uno'] == 1
+    segunda.close()
+    assert pool.estadisticas()['abiertas'] == 0
+
+def test_descartar_libera_el_lugar():
+    pool = PoolConexiones(_crear_conexion, tamano=1, espera=0.05)
+    pool.obtener().descartar()
+    assert pool.estadisticas()['abiertas'] == 0
+    pool.obtener().close()
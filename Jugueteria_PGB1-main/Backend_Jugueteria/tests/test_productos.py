@@ -0,0 +1,37 @@
+from conftest import consultar
+
+def _actualizar(client, admin, producto_id, **extra):
+    return client.put(f'/api/productos/{producto_id}', headers=admin, json={
+        'nombre': 'Robot', 'precio': 15, **extra
+    })
+
+def test_version_compare_and_swap(client, admin, producto):
+    producto_id = producto()
+    respuesta = _actualizar(client, admin, producto_id, version=0)
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['version'] == 1
+
+    # Otro cliente con la versión vieja pierde y recibe la actual
+    respuesta = _actualizar(client, admin, producto_id, version=0, precio=99)
+    assert respuesta.status_code == 409
+    assert respuesta.get_json()['version'] == 1
+    fila = consultar("SELECT Valor_Unitario, Version FROM producto WHERE Id_Producto = %s", (producto_id,))[0]
+    assert fila['Valor_Unitario'] == 15
+    assert fila['Version'] == 1
+
+def test_version_por_if_match(client, admin, producto):
+    producto_id = producto()
+    respuesta = client.put(f'/api/productos/{producto_id}', headers={**admin, 'If-Match': '0'}, json={
+        'nombre': 'Robot', 'precio': 15
+    })
+    assert respuesta.status_code == 200
+    assert respuesta.get_json()['version'] == 1
+
+def test_sin_version_tambien_incrementa(client, admin, producto):
+    producto_id = producto()
+    assert _actualizar(client, admin, producto_id).get_json()['version'] == 1
+    assert _actualizar(client, admin, producto_id).get_json()['version'] == 2
+
+def test_version_invalida_y_producto_inexistente(client, admin, producto):
+    assert _actualizar(client, admin, producto(), version='x').status_code == 400
+    assert _actualizar(client, admin, 999999, version=0).status_code == 404
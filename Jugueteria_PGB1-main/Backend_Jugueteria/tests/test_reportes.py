@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+from conftest import ejecutar
+from Database.conexion import get_db_connection
+from Database.reportes import reconstruir
+
+def _vender(client, headers, producto_id, cantidad):
+    respuesta = client.post('/api/ventas', headers=headers, json={
+        'detalles': [{'producto_id': producto_id, 'cantidad': cantidad}]
+    })
+    assert respuesta.status_code == 201
+    return respuesta.get_json()['venta']['id']
+
+def _reporte(client, admin, **args):
+    respuesta = client.get('/api/reportes/ventas', headers=admin, query_string=args)
+    assert respuesta.status_code == 200
+    return respuesta.get_json()['reporte']
+
+def _unidades(filas, clave, valor):
+    return sum(int(fila['Unidades']) for fila in filas if fila[clave] == valor)
+
+def test_rango_filtra_productos_y_lineas(client, admin, cliente, producto):
+    producto_id = producto(cantidad=20, precio=10)
+    vieja = _vender(client, cliente, producto_id, 3)
+    _vender(client, cliente, producto_id, 2)
+    # La primera venta pasa a un día lejano y los resúmenes se recalculan desde el historial
+    ejecutar("UPDATE venta SET Fecha = %s WHERE Id_Venta = %s", ('2020-01-15 12:00:00', vieja))
+    db = get_db_connection()
+    try:
+        reconstruir(db)
+    finally:
+        db.close()
+
+    hoy = date.today()
+    reporte = _reporte(client, admin, desde=(hoy - timedelta(days=1)).isoformat(), hasta=hoy.isoformat(), top=100)
+    assert _unidades(reporte['top_productos'], 'Id_Producto', producto_id) == 2
+    assert _unidades(reporte['top_productos_unidades'], 'Id_Producto', producto_id) == 2
+    assert _unidades(reporte['por_linea'], 'Id_Linea', 1) == sum(int(f['Unidades']) for f in reporte['por_dia'])
+
+    historico = _reporte(client, admin, top=100)
+    assert _unidades(historico['top_productos'], 'Id_Producto', producto_id) == 5
+
+    enero = _reporte(client, admin, desde='2020-01-01', hasta='2020-01-31', top=100)
+    assert _unidades(enero['top_productos'], 'Id_Producto', producto_id) == 3
+
+def test_venta_nueva_suma_al_resumen_del_dia(client, admin, cliente, producto):
+    producto_id = producto(cantidad=5, precio=4)
+    hoy = date.today().isoformat()
+    _vender(client, cliente, producto_id, 2)
+    reporte = _reporte(client, admin, desde=hoy, hasta=hoy, top=100)
+    fila = next(f for f in reporte['top_productos'] if f['Id_Producto'] == producto_id)
+    assert int(fila['Unidades']) == 2
+    assert float(fila['Ingresos']) == 8
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from conftest import consultar, ejecutar, stock
+from routes.reserva_routes import barrer_reservas
+
+def _reservar(client, headers, producto_id, cantidad, ttl=600):
+    return client.post('/api/reservas', headers=headers, json={
+        'detalles': [{'producto_id': producto_id, 'cantidad': cantidad}],
+        'ttl': ttl
+    })
+
+def _vencer(reserva_id):
+    ejecutar(
+        "UPDATE reserva SET Expira_En = %s WHERE Id_Reserva = %s",
+        (datetime.now().replace(microsecond=0) - timedelta(seconds=1), reserva_id)
+    )
+
+def test_reserva_aparta_stock(client, cliente, producto):
+    producto_id = producto(cantidad=3)
+    respuesta = _reservar(client, cliente, producto_id, 2)
+    assert respuesta.status_code == 201
+    assert stock(producto_id) == 1
+    # Lo reservado ya no se puede vender
+    assert _reservar(client, cliente, producto_id, 2).status_code == 409
+
+def test_reserva_vencida_devuelve_el_stock(client, cliente, producto):
+    producto_id = producto(cantidad=5)
+    vencida = _reservar(client, cliente, producto_id, 2).get_json()['reserva']['id']
+    vigente = _reservar(client, cliente, producto_id, 1).get_json()['reserva']['id']
+    assert stock(producto_id) == 2
+
+    _vencer(vencida)
+    assert barrer_reservas() >= 1
+    assert stock(producto_id) == 4
+    assert client.get(f'/api/reservas/{vencida}', headers=cliente).get_json()['reserva']['Estado'] == 'expirada'
+    assert client.get(f'/api/reservas/{vigente}', headers=cliente).get_json()['reserva']['Estado'] == 'activa'
+
+    # Un segundo barrido no devuelve dos veces
+    barrer_reservas()
+    assert stock(producto_id) == 4
+
+def test_checkout_de_reserva_vencida_responde_409(client, cliente, producto):
+    producto_id = producto(cantidad=2)
+    reserva_id = _reservar(client, cliente, producto_id, 2).get_json()['reserva']['id']
+    _vencer(reserva_id)
+    assert client.post(f'/api/reservas/{reserva_id}/checkout', headers=cliente, json={}).status_code == 409
+
+def test_checkout_no_vuelve_a_descontar(client, cliente, producto):
+    producto_id = producto(cantidad=2)
+    reserva_id = _reservar(client, cliente, producto_id, 2).get_json()['reserva']['id']
+    respuesta = client.post(f'/api/reservas/{reserva_id}/checkout', headers=cliente, json={})
+    assert respuesta.status_code == 201
+    assert stock(producto_id) == 0
+    venta_id = respuesta.get_json()['venta']['id']
+    assert consultar("SELECT Id_Venta FROM reserva WHERE Id_Reserva = %s", (reserva_id,))[0]['Id_Venta'] == venta_id
+    # El barrido no toca reservas confirmadas
+    _vencer(reserva_id)
+    barrer_reservas()
+    assert stock(producto_id) == 0
+
+def test_reserva_ajena_no_se_ve(client, cliente, otro_cliente, producto):
+    reserva_id = _reservar(client, cliente, producto(), 1).get_json()['reserva']['id']
+    assert client.get(f'/api/reservas/{reserva_id}', headers=otro_cliente).status_code == 404
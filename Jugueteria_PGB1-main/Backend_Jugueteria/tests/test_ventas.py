@@ -0,0 +1,48 @@
+from conftest import consultar, stock
+
+def test_venta_descuenta_stock(client, cliente, producto):
+    producto_id = producto(cantidad=3, precio=10)
+    respuesta = client.post('/api/ventas', headers=cliente, json={
+        'detalles': [{'producto_id': producto_id, 'cantidad': 2}]
+    })
+    assert respuesta.status_code == 201
+    venta = respuesta.get_json()['venta']
+    # Decimal viaja como texto (routes/serializacion.py)
+    assert float(venta['total']) == 20
+    assert stock(producto_id) == 1
+    detalle = consultar("SELECT Precio_Unitario FROM detalle_venta WHERE Id_Venta = %s", (venta['id'],))
+    assert detalle[0]['Precio_Unitario'] == 10
+
+def test_sin_stock_responde_409_sin_tocar_nada(client, cliente, producto):
+    con_stock = producto(cantidad=5)
+    sin_stock = producto(cantidad=1)
+    ventas = consultar("SELECT COUNT(*) AS n FROM venta")[0]['n']
+    respuesta = client.post('/api/ventas', headers=cliente, json={
+        'detalles': [
+            {'producto_id': con_stock, 'cantidad': 2},
+            {'producto_id': sin_stock, 'cantidad': 2}
+        ]
+    })
+    assert respuesta.status_code == 409
+    assert respuesta.get_json()['detalles'] == [
+        {'producto_id': sin_stock, 'solicitado': 2, 'disponible': 1}
+    ]
+    # El descuento condicional es todo o nada
+    assert stock(con_stock) == 5
+    assert stock(sin_stock) == 1
+    assert consultar("SELECT COUNT(*) AS n FROM venta")[0]['n'] == ventas
+
+def test_el_stock_nunca_queda_negativo(client, cliente, producto):
+    producto_id = producto(cantidad=2)
+    estados = [
+        client.post('/api/ventas', headers=cliente, json={
+            'detalles': [{'producto_id': producto_id, 'cantidad': 1}]
+        }).status_code
+        for _ in range(3)
+    ]
+    assert estados == [201, 201, 409]
+    assert stock(producto_id) == 0
+
+def test_detalles_invalidos_responde_400(client, cliente):
+    respuesta = client.post('/api/ventas', headers=cliente, json={'detalles': [{'producto_id': 1, 'cantidad': 0}]})
+    assert respuesta.status_code == 400